@@ -0,0 +1,125 @@
+"""
+管理者向けAPIエンドポイント
+
+X-Admin-Token ヘッダー（ADMIN_API_TOKEN）で認証する。
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse
+from typing import Optional
+from datetime import date
+import os
+
+from schemas.admin import LLMUsageResponse, SystemStatsResponse, WeeklyTrendsResponse
+from services.auth_service import require_admin
+from services.llm_usage_service import LLMUsageService
+from services.stats_service import StatsService
+from services.trend_service import TrendService
+from utils.profiler import PROFILE_SAMPLE_RATE, capture_profile, request_sampling
+
+router = APIRouter(prefix="/api/admin", tags=["Admin"], dependencies=[Depends(require_admin)])
+
+
+@router.get("/llm-usage", response_model=LLMUsageResponse)
+async def get_llm_usage(
+    days: int = Query(7, ge=1, le=90),
+    group_by: str = Query("session", pattern="^(session|owner)$"),
+    owner_type: Optional[str] = Query(None, pattern="^(user|company|system)$"),
+    limit: int = Query(20, ge=1, le=200)
+):
+    """
+    LLMの推定コストが大きい利用者（セッション・ユーザー・企業）の一覧
+    
+    各ワーカーは使用量を LLM_USAGE_FLUSH_SECONDS ごとに書き込むため、
+    直近の呼び出しは反映まで遅れることがある。
+    """
+    consumers = await run_in_threadpool(
+        LLMUsageService.top_consumers, days, group_by, owner_type, limit
+    )
+    return LLMUsageResponse(days=days, group_by=group_by, consumers=consumers)
+
+
+@router.get("/stats", response_model=SystemStatsResponse)
+async def get_stats(
+    refresh: bool = Query(False, description="統計ビューを作り直してから返す")
+):
+    """
+    システム統計（ユーザー・企業・求人・セッション・スカウト）
+    
+    値は STATS_REFRESH_SECONDS ごとに作り直される統計ビューのもので、
+    refreshed_at 時点の集計になる。
+    """
+    if refresh:
+        await run_in_threadpool(StatsService.refresh)
+    stats = await run_in_threadpool(StatsService.get_system_stats)
+    return SystemStatsResponse(**stats)
+
+
+@router.get("/trends", response_model=WeeklyTrendsResponse)
+async def get_trends(
+    week_start: Optional[date] = Query(None, description="週の開始日（省略時は今週）")
+):
+    """
+    週次トレンド（カテゴリ別の上位嗜好・行動イベントの集計・上位求人）
+    
+    スナップショットは定期集計で TREND_SNAPSHOT_SECONDS ごとに作り直され、
+    各ワーカーは TREND_SNAPSHOT_CACHE_SECONDS 秒メモリに保持する。
+    """
+    snapshot = await run_in_threadpool(TrendService.get_weekly_snapshot, week_start)
+    
+    if snapshot is None:
+        raise HTTPException(status_code=404, detail="指定した週のトレンドはありません")
+    
+    return WeeklyTrendsResponse(**snapshot)
+
+
+@router.post("/trends/refresh", response_model=WeeklyTrendsResponse)
+async def refresh_trends():
+    """
+    今週のトレンドのスナップショットをすぐに作り直す
+    
+    過去の週のスナップショットは週ごとの集計がない期間のものもあるため作り直さない。
+    """
+    snapshot = await run_in_threadpool(TrendService.build_weekly_snapshot)
+    return WeeklyTrendsResponse(**snapshot)
+
+
+@router.get("/profile", response_class=PlainTextResponse)
+async def get_profile(
+    seconds: float = Query(10.0, gt=0, le=60),
+    interval_ms: float = Query(10.0, ge=1, le=1000)
+):
+    """
+    このリクエストを処理したワーカーを指定秒数プロファイル
+    
+    folded 形式（flamegraph.pl / speedscope / inferno で描画可能）で返す。
+    gunicorn の複数ワーカーのうちどれが計測されたかは X-Profile-Pid ヘッダーで分かる。
+    """
+    try:
+        sampler = await capture_profile(seconds, interval_ms)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    
+    return PlainTextResponse(sampler.folded(), headers={
+        "X-Profile-Pid": str(os.getpid()),
+        "X-Profile-Samples": str(sampler.sample_count),
+        "X-Profile-Dropped-Stacks": str(sampler.dropped),
+    })
+
+
+@router.get("/profile/sampled", response_class=PlainTextResponse)
+async def get_sampled_profile(reset: bool = Query(True)):
+    """
+    PROFILE_SAMPLE_RATE でサンプルしたリクエストの処理中に採取したスタック（このワーカー分）
+    
+    reset=true の場合は返した分を集計から消す。
+    """
+    sampler = request_sampling.sampler
+    samples = sampler.sample_count
+    folded = sampler.reset() if reset else sampler.folded()
+    return PlainTextResponse(folded, headers={
+        "X-Profile-Pid": str(os.getpid()),
+        "X-Profile-Samples": str(samples),
+        "X-Profile-Sample-Rate": str(PROFILE_SAMPLE_RATE),
+    })
@@ -2,25 +2,73 @@
 企業向けAPIエンドポイント
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
+from typing import Optional
 from psycopg2.extras import RealDictCursor, Json
+import tempfile
 import uuid
 from datetime import datetime
 
 from config.database import get_db_conn
 from schemas.company import (
     CompanyRegister, CompanyLogin, CompanyProfile, 
-    ScoutSearchRequest, ScoutSearchResponse, ScoutMessageRequest, ScoutMessageResponse
+    ScoutSearchRequest, ScoutSearchResponse, ScoutMessageRequest, ScoutMessageResponse,
+    CompanyEnrichmentRequestList, CompanyStatsResponse
+)
+from schemas.job import (
+    JobCreate, JobUpdate, JobResponse, JobListResponse, JobSearchRequest, JobSearchResponse,
+    JobImportError, JobImportResponse
 )
-from schemas.job import JobCreate, JobUpdate, JobResponse, JobSearchRequest, JobSearchResponse
 from schemas.user import Token
-from services.auth_service import get_password_hash, verify_password, create_access_token, get_current_company
-from services.matching_service import MatchingService
+from services.auth_service import get_password_hash_async, authenticate_password, create_access_token, get_current_company
+from services.enrichment_service import EnrichmentService
+from services.job_import_service import (
+    JOB_IMPORT_EMBEDDING_BATCH, JOB_IMPORT_MAX_BYTES, JobImportRejected, JobImportService
+)
+from services.matching_service import MatchingService, JOB_LIST_COLUMNS
+from services.preference_service import PreferenceService
+from services.stats_service import StatsService
 from utils.helpers import clean_dict_for_json
+from utils.export import export_response, stream_rows
+from utils.pagination import DEFAULT_PAGE_SIZE, clamp_page_size, decode_cursor, split_page
 
 router = APIRouter(prefix="/api/company", tags=["Company"])
 
+# スカウト検索で1リクエストあたりに走査する候補者数
+SCOUT_SCAN_PAGE_SIZE = 100
+
+# 仮のスカウトマッチスコア（実際はスコアリング関数を使用）
+SCOUT_PLACEHOLDER_MATCH_SCORE = 75
+
+# エクスポートの列（SELECT の列順。求人は一括登録で取り込める列をすべて含める）
+JOB_EXPORT_COLUMNS = (
+    "id", "external_id", "job_title", "job_description", "employment_type", "location_prefecture",
+    "location_city", "salary_min", "salary_max", "required_skills", "benefits", "remote_option",
+    "flex_time", "side_job_allowed", "work_style_details", "team_culture_details",
+    "growth_opportunities_details", "additional_questions", "status",
+    "view_count", "apply_count", "created_at", "updated_at",
+)
+SCOUT_CANDIDATE_EXPORT_COLUMNS = (
+    "user_id", "name", "job_title", "location_prefecture", "salary_min", "salary_max",
+    "remote_work_preference", "match_score",
+)
+SCOUT_RESULT_EXPORT_COLUMNS = (
+    "id", "job_id", "job_title", "user_id", "user_name", "match_score", "status",
+    "sent_at", "read_at", "replied_at",
+)
+
+# 一括登録でアップロードをメモリに置く上限（超えた分は一時ファイルに書く）
+JOB_IMPORT_SPOOL_BYTES = 1024 * 1024
+
+# Content-Type から一括登録の形式を判定
+JOB_IMPORT_CONTENT_TYPES = {
+    "text/csv": "csv",
+    "application/x-ndjson": "jsonl",
+    "application/jsonl": "jsonl",
+    "application/x-jsonlines": "jsonl",
+}
+
 
 @router.post("/register", response_model=Token)
 async def register(company_data: CompanyRegister):
@@ -40,7 +88,7 @@ async def register(company_data: CompanyRegister):
         )
     
     # 企業作成（company_idはUUIDで自動生成）
-    hashed_password = get_password_hash(company_data.password)
+    hashed_password = await get_password_hash_async(company_data.password)
     
     cur.execute("""
         INSERT INTO company_date 
@@ -88,7 +136,7 @@ async def login(login_data: CompanyLogin):
     cur.close()
     conn.close()
     
-    if not company or not verify_password(login_data.password, company['password']):
+    if not company or not await authenticate_password(login_data.password, company['password'], "company_date", company['company_id']):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="メールアドレスまたはパスワードが正しくありません"
@@ -187,31 +235,138 @@ async def create_job(
     return JobResponse(**clean_dict_for_json(job_dict))
 
 
-@router.get("/jobs", response_model=List[JobResponse])
+@router.post("/jobs/import", response_model=JobImportResponse)
+async def import_jobs(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    file_format: Optional[str] = Query(None, alias="format", pattern="^(csv|jsonl)$"),
+    skip_invalid: bool = False,
+    current_company: str = Depends(get_current_company)
+):
+    """
+    求人の一括登録（リクエストボディに CSV または JSONL をそのまま送る）
+    
+    各行は求人登録と同じ項目（＋ external_id）で検証し、全行を1トランザクションで反映する。
+    external_id が既存の求人と一致する行は更新になる。不正な行があれば何も登録せず422を返す
+    （skip_invalid=true の場合は飛ばして残りを登録）。形式は format か Content-Type で指定する。
+    """
+    if file_format is None:
+        content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+        file_format = JOB_IMPORT_CONTENT_TYPES.get(content_type)
+        if file_format is None:
+            raise HTTPException(status_code=400, detail="format=csv|jsonl または Content-Type を指定してください")
+    
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > JOB_IMPORT_MAX_BYTES:
+        raise HTTPException(status_code=413, detail="ファイルサイズが上限を超えています")
+    
+    # 受信しながら一時ファイルに書き、全体をメモリに載せない
+    spool = tempfile.SpooledTemporaryFile(max_size=JOB_IMPORT_SPOOL_BYTES)
+    try:
+        received = 0
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > JOB_IMPORT_MAX_BYTES:
+                raise HTTPException(status_code=413, detail="ファイルサイズが上限を超えています")
+            spool.write(chunk)
+        spool.seek(0)
+        
+        result = await run_in_threadpool(
+            JobImportService.import_jobs, current_company, spool, file_format, skip_invalid
+        )
+    except JobImportRejected as e:
+        raise HTTPException(status_code=422, detail={
+            "message": str(e),
+            "errors": [{"line": line, "message": message} for line, message in e.errors],
+        })
+    finally:
+        spool.close()
+    
+    # embedding はレスポンス後にまとめて取得する
+    if result["job_ids"] and JOB_IMPORT_EMBEDDING_BATCH > 0:
+        background_tasks.add_task(JobImportService.update_embeddings, result["job_ids"])
+    
+    return JobImportResponse(
+        inserted=result["inserted"],
+        updated=result["updated"],
+        skipped=result["skipped"],
+        errors=[JobImportError(line=line, message=message) for line, message in result["errors"]]
+    )
+
+
+@router.get("/jobs", response_model=JobListResponse)
 async def get_jobs(
     status_filter: str = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
     current_company: str = Depends(get_current_company)
 ):
-    """求人一覧取得"""
+    """求人一覧取得（created_at, id のキーセットページネーション）"""
     
-    conn = get_db_conn()
-    cur = conn.cursor(cursor_factory=RealDictCursor)
+    limit = clamp_page_size(limit)
     
-    query = "SELECT * FROM company_profile WHERE company_id = %s"
+    query = f"SELECT {JOB_LIST_COLUMNS} FROM company_profile cp WHERE cp.company_id = %s"
     params = [current_company]
     
     if status_filter:
-        query += " AND status = %s"
+        query += " AND cp.status = %s"
         params.append(status_filter)
     
-    query += " ORDER BY created_at DESC"
+    if cursor:
+        try:
+            cursor_values = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="カーソルが不正です")
+        query += " AND (cp.created_at, cp.id) < (%s, %s)"
+        params.extend(cursor_values)
+    
+    query += " ORDER BY cp.created_at DESC, cp.id DESC LIMIT %s"
+    params.append(limit + 1)
+    
+    conn = get_db_conn()
+    cur = conn.cursor(cursor_factory=RealDictCursor)
     
     cur.execute(query, tuple(params))
     jobs = cur.fetchall()
     cur.close()
     conn.close()
     
-    return [JobResponse(**clean_dict_for_json(dict(job))) for job in jobs]
+    page, next_cursor = split_page(jobs, limit, key=lambda r: (r['created_at'], r['id']))
+    
+    return JobListResponse(
+        # datetime は文字列にせずそのまま渡す（モデル側で再パースさせない）
+        jobs=[JobResponse(**job) for job in page],
+        limit=limit,
+        next_cursor=next_cursor
+    )
+
+
+@router.get("/jobs/export")
+async def export_jobs(
+    file_format: str = Query("csv", alias="format", pattern="^(csv|jsonl)$"),
+    status_filter: Optional[str] = None,
+    current_company: str = Depends(get_current_company)
+):
+    """
+    自社の求人一覧を CSV / JSONL でダウンロード（新しい順）
+    
+    サーバーサイドカーソルから読みながら送るため、件数によらずメモリ使用量は一定。
+    一括登録（POST /api/company/jobs/import）で取り込める列をすべて含むため、そのまま再登録できる
+    （external_id のある求人は更新、ない求人は新規の求人として登録される）。
+    """
+    query = f"""
+        SELECT {", ".join(f"cp.{c}" for c in JOB_EXPORT_COLUMNS)}
+        FROM company_profile cp
+        WHERE cp.company_id = %s
+    """
+    params = [current_company]
+    if status_filter:
+        query += " AND cp.status = %s"
+        params.append(status_filter)
+    query += " ORDER BY cp.created_at DESC, cp.id DESC"
+    
+    rows = await run_in_threadpool(stream_rows, query, params)
+    return export_response(JOB_EXPORT_COLUMNS, rows, file_format, "jobs")
 
 
 @router.put("/jobs/{job_id}", response_model=JobResponse)
@@ -270,6 +425,8 @@ async def update_job(
     cur.close()
     conn.close()
     
+    EnrichmentService.invalidate_job(job_id)
+    
     return JobResponse(**clean_dict_for_json(dict(updated_job)))
 
 
@@ -297,44 +454,145 @@ async def search_scout_candidates(
         conn.close()
         raise HTTPException(status_code=404, detail="求人が見つかりません")
     
-    # ユーザー取得
-    cur.execute("""
-        SELECT pd.user_id, pd.name, upp.preferences
-        FROM personal_date pd
-        LEFT JOIN user_preferences_profile upp ON pd.user_id = upp.user_id
-        LIMIT 100
-    """)
-    
-    users = cur.fetchall()
-    cur.close()
-    conn.close()
-    
-    # スコアリング（簡易版）
-    from schemas.matching import ScoutCandidate
+    # 候補者は (created_at, user_id) の降順で返し、次カーソルは最後に返した候補者から作る
+    cursor_values = None
+    if search_data.cursor:
+        try:
+            cursor_values = decode_cursor(search_data.cursor)
+        except ValueError:
+            cur.close()
+            conn.close()
+            raise HTTPException(status_code=400, detail="カーソルが不正です")
+    
+    # 仮のマッチスコアが条件に届かなければ、全ユーザーを走査しても候補者はいない
+    if SCOUT_PLACEHOLDER_MATCH_SCORE < search_data.min_match_score:
+        cur.close()
+        conn.close()
+        return ScoutSearchResponse(job_id=search_data.job_id, candidates=[], next_cursor=None)
     
+    # 条件を満たす候補者が limit+1 人そろうまで、SCOUT_SCAN_PAGE_SIZE 人ずつ走査
     candidates = []
-    for user in users:
-        # 仮のマッチスコア
-        match_score = 75  # 実際はスコアリング関数を使用
-        
-        if match_score >= search_data.min_match_score:
-            candidates.append({
-                "user_id": user['user_id'],
-                "name": user['name'],
-                "match_score": match_score,
-                "matched_features": ["スキルマッチ", "希望条件一致"],
-                "profile_summary": f"{user['name']}さん"
-            })
+    try:
+        while len(candidates) <= search_data.limit:
+            query = """
+                SELECT pd.user_id, pd.name, pd.created_at
+                FROM personal_date pd
+            """
+            params = []
+            if cursor_values:
+                query += " WHERE (pd.created_at, pd.user_id) < (%s, %s)"
+                params.extend(cursor_values)
+            query += " ORDER BY pd.created_at DESC, pd.user_id DESC LIMIT %s"
+            params.append(SCOUT_SCAN_PAGE_SIZE)
+            
+            cur.execute(query, tuple(params))
+            users = cur.fetchall()
+            if not users:
+                break
+            cursor_values = (users[-1]['created_at'], users[-1]['user_id'])
+            
+            # 希望条件はスナップショットキャッシュからまとめて取得
+            snapshots = PreferenceService.get_snapshots([user['user_id'] for user in users])
+            
+            for user in users:
+                # 仮のマッチスコア
+                match_score = SCOUT_PLACEHOLDER_MATCH_SCORE
+                if match_score < search_data.min_match_score:
+                    continue
+                
+                snapshot = snapshots[str(user['user_id'])]
+                profile_summary = f"{user['name']}さん"
+                if snapshot.job_title:
+                    profile_summary += f"（希望職種: {snapshot.job_title}）"
+                
+                candidates.append({
+                    "user_id": str(user['user_id']),
+                    "name": user['name'],
+                    "match_score": match_score,
+                    "matched_features": ["スキルマッチ", "希望条件一致"],
+                    "profile_summary": profile_summary,
+                    "scan_key": (user['created_at'], user['user_id']),
+                })
+            
+            if len(users) < SCOUT_SCAN_PAGE_SIZE:
+                break
+    finally:
+        cur.close()
+        conn.close()
     
-    candidates.sort(key=lambda x: x['match_score'], reverse=True)
+    page, next_cursor = split_page(candidates, search_data.limit, key=lambda c: c['scan_key'])
     
     return ScoutSearchResponse(
         job_id=search_data.job_id,
-        candidates=candidates[:search_data.limit],
-        total_count=len(candidates)
+        candidates=page,
+        next_cursor=next_cursor
     )
 
 
+@router.get("/scout/candidates/export")
+async def export_scout_candidates(
+    job_id: str,
+    min_match_score: int = Query(70, ge=0, le=100),
+    file_format: str = Query("csv", alias="format", pattern="^(csv|jsonl)$"),
+    current_company: str = Depends(get_current_company)
+):
+    """
+    求人に対するスカウト候補者を CSV / JSONL でダウンロード（スカウト候補検索の全ページ分）
+    """
+    conn = get_db_conn()
+    cur = conn.cursor()
+    cur.execute("SELECT 1 FROM company_profile WHERE id = %s AND company_id = %s", (job_id, current_company))
+    job = cur.fetchone()
+    cur.close()
+    conn.close()
+    
+    if not job:
+        raise HTTPException(status_code=404, detail="求人が見つかりません")
+    
+    rows = await run_in_threadpool(stream_rows, """
+        SELECT pd.user_id, pd.name, up.job_title, up.location_prefecture, up.salary_min, up.salary_max,
+               up.remote_work_preference
+        FROM personal_date pd
+        LEFT JOIN user_preferences_profile up ON up.user_id = pd.user_id
+        ORDER BY pd.created_at DESC, pd.user_id DESC
+    """)
+    
+    def candidates():
+        for row in rows:
+            match_score = SCOUT_PLACEHOLDER_MATCH_SCORE
+            if match_score >= min_match_score:
+                yield (*row, match_score)
+    
+    return export_response(SCOUT_CANDIDATE_EXPORT_COLUMNS, candidates(), file_format, f"scout_candidates_{job_id}")
+
+
+@router.get("/scout/export")
+async def export_scout_results(
+    status_filter: Optional[str] = None,
+    file_format: str = Query("csv", alias="format", pattern="^(csv|jsonl)$"),
+    current_company: str = Depends(get_current_company)
+):
+    """
+    送信済みスカウトと既読・返信状況を CSV / JSONL でダウンロード（送信日時の新しい順）
+    """
+    query = """
+        SELECT sm.id, sm.job_id, cp.job_title, sm.user_id, pd.name, sm.match_score, sm.status,
+               sm.sent_at, sm.read_at, sm.replied_at
+        FROM scout_messages sm
+        LEFT JOIN company_profile cp ON cp.id = sm.job_id
+        LEFT JOIN personal_date pd ON pd.user_id = sm.user_id
+        WHERE sm.company_id = %s
+    """
+    params = [current_company]
+    if status_filter:
+        query += " AND sm.status = %s"
+        params.append(status_filter)
+    query += " ORDER BY sm.sent_at DESC, sm.id DESC"
+    
+    rows = await run_in_threadpool(stream_rows, query, params)
+    return export_response(SCOUT_RESULT_EXPORT_COLUMNS, rows, file_format, "scout_results")
+
+
 @router.post("/scout/send", response_model=ScoutMessageResponse)
 async def send_scout_message(
     scout_data: ScoutMessageRequest,
@@ -369,3 +627,48 @@ async def send_scout_message(
     conn.close()
     
     return ScoutMessageResponse(**clean_dict_for_json(dict(scout)))
+
+
+@router.get("/stats", response_model=CompanyStatsResponse)
+async def get_company_stats(current_company: str = Depends(get_current_company)):
+    """
+    自社の求人・スカウト統計
+    
+    統計ビューの値のため、直近の求人登録やスカウト送信は次の更新（STATS_REFRESH_SECONDS）まで反映されない。
+    """
+    stats = await run_in_threadpool(StatsService.get_company_stats, current_company)
+    return CompanyStatsResponse(**stats)
+
+
+@router.get("/enrichment/requests", response_model=CompanyEnrichmentRequestList)
+async def get_enrichment_requests(
+    status_filter: str = "pending",
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    current_company: str = Depends(get_current_company)
+):
+    """
+    求職者がチャットで尋ねたが求人に未登録だった項目への追加質問（優先度順）
+    
+    (priority_score, id) のキーセットページネーション。
+    """
+    
+    limit = clamp_page_size(limit)
+    
+    cursor_values = None
+    if cursor:
+        try:
+            cursor_values = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="カーソルが不正です")
+    
+    rows = await run_in_threadpool(
+        EnrichmentService.list_requests, current_company, status_filter, limit + 1, cursor_values
+    )
+    page, next_cursor = split_page(rows, limit, key=lambda r: (r['priority_score'], r['id']))
+    
+    return CompanyEnrichmentRequestList(
+        requests=page,
+        limit=limit,
+        next_cursor=next_cursor
+    )
@@ -2,6 +2,7 @@
 ユーザー向けAPIエンドポイント
 """
 
+import logging
 from fastapi import APIRouter, Depends, HTTPException, status, Request
 from typing import Optional
 from psycopg2.extras import RealDictCursor
@@ -10,12 +11,19 @@ from datetime import datetime
 
 from config.database import get_db_conn
 from schemas.user import UserRegister, UserLogin, UserProfile, UserProfileUpdate, Token
+from schemas.job import JobInteractionBatch, JobInteractionResponse
 from schemas.matching import ChatMessage, ChatResponse, RecommendationRequest, RecommendationResponse
-from services.auth_service import get_password_hash, verify_password, create_access_token, get_current_user
+from services.auth_service import get_password_hash_async, authenticate_password, create_access_token, get_current_user, invalidate_principal
 from services.conversation_service import ConversationService
+from services.interaction_service import InteractionService
+from services.llm_usage_service import set_usage_scope
 from services.matching_service import MatchingService
+from services.preference_service import PreferenceService
 from utils.helpers import clean_dict_for_json
 
+
+logger = logging.getLogger(__name__)
+
 router = APIRouter(prefix="/api/user", tags=["User"])
 
 
@@ -37,7 +45,7 @@ async def register(user_data: UserRegister):
         )
     
     # ユーザー作成（user_idはSERIALで自動採番）
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await get_password_hash_async(user_data.password)
     
     cur.execute("""
         INSERT INTO personal_date 
@@ -85,7 +93,7 @@ async def login(login_data: UserLogin):
     cur.close()
     conn.close()
     
-    if not user or not verify_password(login_data.password, user['password']):
+    if not user or not await authenticate_password(login_data.password, user['password'], "personal_date", user['user_id']):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="メールアドレスまたはパスワードが正しくありません"
@@ -117,19 +125,14 @@ async def get_profile(current_user: str = Depends(get_current_user)):
         conn.close()
         raise HTTPException(status_code=404, detail="ユーザーが見つかりません")
     
-    # プリファレンス取得
-    cur.execute("""
-        SELECT preferences
-        FROM user_preferences_profile
-        WHERE user_id = %s
-    """, (current_user,))
-    
-    pref_row = cur.fetchone()
     cur.close()
     conn.close()
     
+    # プリファレンス取得（スナップショットキャッシュ経由）
+    snapshot = PreferenceService.get_snapshot(current_user)
+    
     user_dict = dict(user)
-    user_dict['preferences'] = pref_row['preferences'] if pref_row else None
+    user_dict['preferences'] = snapshot.to_session_preferences() if snapshot.found else None
     
     return UserProfile(**clean_dict_for_json(user_dict))
 
@@ -187,6 +190,9 @@ async def update_profile(
     cur.close()
     conn.close()
     
+    PreferenceService.invalidate(current_user)
+    invalidate_principal("user", current_user)
+    
     return UserProfile(**clean_dict_for_json(dict(updated_user)))
 
 
@@ -213,18 +219,12 @@ async def chat(
         chat_service = ChatService()
         session_id = message_data.context.get("session_id") if message_data.context else None
         
-        print(f"🔍 受信データ:")
-        print(f"   メッセージ: {message_data.message}")
-        print(f"   context: {message_data.context}")
-        print(f"   session_id: {session_id}")
-        
         # 初回接続
         if not session_id or message_data.message in ['初回接続', '']:
-            print("📢 初回チャット開始")
             result = chat_service.start_chat(current_user)
         else:
             # 通常の会話処理
-            print(f"💬 チャット処理: session={session_id[:8]}...")
+            set_usage_scope("user", current_user, session_id)
             result = chat_service.process_message(
                 user_id=current_user,
                 user_message=message_data.message,
@@ -261,13 +261,9 @@ async def chat(
             current_score=result.current_score  # スコアを追加
         )
         
-    except Exception as e:
-        print(f"❌ チャットエラー: {e}")
-        import traceback
-        traceback.print_exc()
-        
+    except Exception:
         # フォールバック: 古いシステムを使用
-        print("⚠️ 新システムエラー、フォールバックに切り替え")
+        logger.exception("チャットエラー、フォールバックに切り替え")
         
         session_id = message_data.context.get("session_id") if message_data.context else None
         
@@ -331,4 +327,45 @@ async def get_recommendations(
         min_score=min_score
     )
     
-    return RecommendationResponse(**result)
\ No newline at end of file
+    return RecommendationResponse(**result)
+
+
+@router.post("/interactions", response_model=JobInteractionResponse, status_code=status.HTTP_202_ACCEPTED)
+async def record_interactions(
+    batch: JobInteractionBatch,
+    current_user: str = Depends(get_current_user)
+):
+    """
+    求人の閲覧・クリック・お気に入り・応募イベントを受け付け
+    
+    イベントはワーカー内に溜めて一括で書き込むため、反映まで最大 INTERACTION_FLUSH_SECONDS 秒かかる。
+    occurred_at は INTERACTION_MAX_AGE_HOURS 時間前から現在（時計のずれ分を許容）までのみ受け付ける。
+    お気に入り・応募は求人のカウンタにはユーザーごとに1回だけ数える。
+    accepted はバッファに積めた件数（DB障害などでバッファが上限に達した分は含まない）。
+    1件も積めなかった場合は 503 を返す。
+    """
+    for index, event in enumerate(batch.events):
+        if event.occurred_at is not None and not InteractionService.is_acceptable_time(event.occurred_at):
+            raise HTTPException(
+                status_code=422,
+                detail=f"events[{index}].occurred_at が受け付ける範囲外です"
+            )
+
+    accepted = sum(
+        InteractionService.record(
+            user_id=current_user,
+            job_id=event.job_id,
+            interaction_type=event.interaction_type,
+            session_id=event.session_id,
+            interaction_data=event.interaction_data,
+            created_at=event.occurred_at
+        )
+        for event in batch.events
+    )
+    if not accepted:
+        raise HTTPException(
+            status_code=503,
+            detail="イベントを受け付けられません。しばらくしてから再送してください"
+        )
+    
+    return JobInteractionResponse(accepted=accepted)
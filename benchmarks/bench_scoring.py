@@ -0,0 +1,346 @@
+"""
+スコアリング処理のマイクロベンチマーク
+
+rule_based_scoring / _extract_job_text / _get_remote_flag /
+JobRecommender._calculate_job_score / merge_accumulated_insights を
+固定のフィクスチャ（1k / 10k / 100k 件）で計測し、ops/sec と
+全件を1回処理する間のメモリピーク（tracemalloc）を出力する。
+
+ベースラインを保存しておけば、比較時に閾値を超えて遅くなったケースがあると
+終了コード1で失敗する（CIでの回帰検出用）。
+
+使い方:
+    python -m benchmarks.bench_scoring --save-baseline benchmarks/baseline_scoring.json
+    python -m benchmarks.bench_scoring --compare benchmarks/baseline_scoring.json --threshold 0.15
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+# ai_utils はimport時にOpenAIクライアントを生成するため、キー未設定でもimportできるようにする
+# （ベンチマーク対象はルールベースの処理のみで、APIは呼ばない）
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+from benchmarks.seed_data import EMPLOYMENT_TYPES, JOB_TITLES, PREFECTURES
+from services.job_recommender import JobRecommender
+from utils.helpers import merge_accumulated_insights
+from utils.scoring_utils import _extract_job_text, _get_remote_flag, rule_based_scoring
+
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+
+# (件数, シード) -> [(ケース名, 全件を1回処理する関数)]
+BuildCases = Callable[[int, int], List[Tuple[str, Callable[[], Any]]]]
+
+REMOTE_TEXTS = ["フルリモート可", "一部リモート可（週2日）", "リモート不可", "在宅勤務可能", "出社", None]
+REMOTE_OPTIONS = ["full_remote", "hybrid", "on_site", "リモート可", "在宅OK"]
+
+
+def make_jobs(size: int, seed: int = 42) -> List[Dict[str, Any]]:
+    """
+    スコアリング用の求人行（SCORING_COLUMNS の形）を生成
+
+    Args:
+        size: 件数
+        seed: 乱数シード
+
+    Returns:
+        求人の辞書リスト
+    """
+    rng = random.Random(f"{seed}:bench_jobs:{size}")
+    titles = list(JOB_TITLES.keys())
+    jobs = []
+    for i in range(size):
+        title = rng.choice(titles)
+        (low, high), skills, _, industry = JOB_TITLES[title]
+        prefecture, _, cities = rng.choice(PREFECTURES)
+        salary_min = rng.randrange(low, high - 100, 10)
+        required = rng.sample(skills, min(len(skills), rng.randint(2, 4)))
+        jobs.append({
+            "id": f"job-{i}",
+            "company_name": f"テスト株式会社{i % 500}",
+            "job_title": title,
+            "job_description": f"{title}として{'・'.join(required)}を活かして活躍していただきます。{industry}業界の成長企業です。",
+            "employment_type": rng.choice(EMPLOYMENT_TYPES)[0],
+            "location_prefecture": prefecture,
+            "location_city": rng.choice(cities),
+            "salary_min": salary_min,
+            "salary_max": salary_min + rng.randrange(100, 400, 10),
+            "remote_option": rng.choice(REMOTE_OPTIONS),
+            "remote_work": rng.choice(REMOTE_TEXTS),
+            "required_skills": required,
+        })
+    return jobs
+
+
+def make_recommender_rows(jobs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """JobRecommender.get_recommendations のSELECT結果の形に変換"""
+    return [
+        {
+            "job_id": job["id"],
+            "job_title": job["job_title"],
+            "company_name": job["company_name"],
+            "salary_min": job["salary_min"],
+            "salary_max": job["salary_max"],
+            "location_prefecture": job["location_prefecture"],
+            "location_city": job["location_city"],
+            "remote_option": job["remote_option"],
+            "employment_type": job["employment_type"],
+            "required_skills": "",
+        }
+        for job in jobs
+    ]
+
+
+def make_intents(size: int, seed: int = 42) -> List[Dict[str, Any]]:
+    """会話ターンごとの抽出意図（merge_accumulated_insights 用）を生成"""
+    rng = random.Random(f"{seed}:bench_intents:{size}")
+    titles = list(JOB_TITLES.keys())
+    intents = []
+    for _ in range(size):
+        title = rng.choice(titles)
+        _, skills, _, _ = JOB_TITLES[title]
+        intents.append({
+            "keywords": [title, *rng.sample(skills, 2)],
+            "pain_points": rng.sample(["残業が多い", "年収が低い", "通勤が長い", "評価が不透明"], 2),
+            "flexible_needs": rng.sample(["フレックス", "リモート", "副業OK", "時短"], 1),
+            "explicit_preferences": {
+                "location_prefecture": rng.choice(PREFECTURES)[0],
+                "salary_min": rng.choice([400, 500, 600]),
+            },
+            "implicit_values": {"work_life_balance": round(rng.random(), 2)},
+        })
+    return intents
+
+
+USER_INTENT = {
+    "keywords": ["Python", "React", "リモート", "バックエンドエンジニア", "AWS", "SQL"],
+    "flexible_needs": ["フレックス", "副業"],
+    "explicit_preferences": {
+        "remote_work": "リモート希望",
+        "location_prefecture": "東京都",
+        "location_city": "渋谷区",
+    },
+    "job_change_request": {"new_job_titles": ["バックエンドエンジニア", "Webエンジニア"]},
+    "confidence": 0.9,
+}
+
+USER_PREFERENCES = {"job_title": "エンジニア", "location": "東京都", "salary_min": 500}
+CONVERSATION_KEYWORDS = ["Python", "React", "AWS", "リモート", "SQL"]
+
+
+def build_cases(size: int, seed: int) -> List[Tuple[str, Callable[[], Any]]]:
+    """
+    サイズごとの計測ケースを構築
+
+    Returns:
+        [(ケース名, 全件を1回処理する関数)]
+    """
+    jobs = make_jobs(size, seed)
+    rows = make_recommender_rows(jobs)
+    intents = make_intents(size, seed)
+
+    def run_rule_based():
+        for job in jobs:
+            rule_based_scoring(USER_INTENT, job)
+
+    def run_extract_text():
+        for job in jobs:
+            _extract_job_text(job)
+
+    def run_remote_flag():
+        for job in jobs:
+            _get_remote_flag(job)
+
+    def run_calculate_score():
+        for row in rows:
+            JobRecommender._calculate_job_score(row, USER_PREFERENCES, CONVERSATION_KEYWORDS)
+
+    def run_merge_insights():
+        insights: Dict[str, Any] = {}
+        for intent in intents:
+            insights = merge_accumulated_insights(insights, intent)
+
+    return [
+        ("rule_based_scoring", run_rule_based),
+        ("_extract_job_text", run_extract_text),
+        ("_get_remote_flag", run_remote_flag),
+        ("JobRecommender._calculate_job_score", run_calculate_score),
+        ("merge_accumulated_insights", run_merge_insights),
+    ]
+
+
+def measure(func: Callable[[], Any], size: int, repeat: int, min_time: float = 0.2) -> Dict[str, Any]:
+    """
+    1ケースを計測（GCを止めて repeat 回実行し最速値を採用、その後メモリを1回計測）
+
+    1回の計測が min_time 秒未満の場合は複数回まとめて実行してタイマー誤差を抑える。
+
+    Returns:
+        ops_per_sec / best_ms（全件1回あたり） / peak_kib
+    """
+    started = time.perf_counter()
+    func()  # ウォームアップ
+    elapsed = time.perf_counter() - started
+    loops = max(1, int(min_time / elapsed) + 1) if elapsed > 0 else 1
+
+    timings = []
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            for _ in range(loops):
+                func()
+            timings.append((time.perf_counter() - started) / loops)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    best = min(timings)
+    return {
+        "ops_per_sec": round(size / best, 1) if best > 0 else None,
+        "best_ms": round(best * 1000, 3),
+        "peak_kib": round(peak / 1024, 1),
+    }
+
+
+def run(
+    build: BuildCases,
+    sizes: List[int],
+    repeat: int,
+    seed: int,
+    only: Optional[str] = None
+) -> Dict[str, Dict[str, Any]]:
+    """
+    全ケースを計測
+
+    Args:
+        build: (件数, シード) から [(ケース名, 全件を1回処理する関数)] を作る関数
+        sizes: 件数のリスト
+        repeat: 計測回数
+        seed: 乱数シード
+        only: ケース名の部分一致で絞り込み
+
+    Returns:
+        {"ケース名[件数]": 計測結果}
+    """
+    results: Dict[str, Dict[str, Any]] = {}
+    for size in sizes:
+        for name, func in build(size, seed):
+            if only and only not in name:
+                continue
+            result = measure(func, size, repeat)
+            key = f"{name}[{size}]"
+            results[key] = result
+            print(f"  {key:<48}{result['ops_per_sec']:>14,.0f} ops/s{result['best_ms']:>12.2f} ms{result['peak_kib']:>12.1f} KiB")
+    return results
+
+
+def compare(
+    results: Dict[str, Dict[str, Any]],
+    baseline: Dict[str, Dict[str, Any]],
+    threshold: float,
+    memory_threshold: float
+) -> List[str]:
+    """
+    ベースラインと比較して回帰したケースを返す
+
+    Args:
+        results: 今回の計測結果
+        baseline: 保存済みの計測結果
+        threshold: 許容する ops/sec の低下率（0.10 = 10%）
+        memory_threshold: 許容するメモリピークの増加率
+
+    Returns:
+        回帰の説明文のリスト
+    """
+    regressions = []
+    for key, current in results.items():
+        base = baseline.get(key)
+        if not base:
+            continue
+
+        if base.get("ops_per_sec") and current.get("ops_per_sec"):
+            change = current["ops_per_sec"] / base["ops_per_sec"] - 1
+            marker = "🔴" if change < -threshold else ("🟢" if change > threshold else "  ")
+            print(f"  {marker} {key:<48}{change:>+8.1%} ops/s")
+            if change < -threshold:
+                regressions.append(f"{key}: ops/sec {base['ops_per_sec']:,.0f} -> {current['ops_per_sec']:,.0f} ({change:+.1%})")
+
+        if base.get("peak_kib") and current.get("peak_kib") is not None:
+            mem_change = current["peak_kib"] / base["peak_kib"] - 1
+            if mem_change > memory_threshold:
+                regressions.append(f"{key}: peak {base['peak_kib']} KiB -> {current['peak_kib']} KiB ({mem_change:+.1%})")
+
+    return regressions
+
+
+def run_cli(title: str, build: BuildCases, default_sizes: List[int], sizes_help: str = "件数（カンマ区切り）") -> None:
+    """
+    コマンドライン引数を読んで計測し、ベースラインの保存・比較を行う（各ベンチマークの main から呼ぶ）
+
+    Args:
+        title: ベンチマーク名（「スコアリング」など）
+        build: run に渡すケース構築関数
+        default_sizes: --sizes の既定値
+        sizes_help: --sizes の説明
+    """
+    parser = argparse.ArgumentParser(description=f"{title}のマイクロベンチマーク")
+    parser.add_argument("--sizes", default=",".join(str(s) for s in default_sizes), help=sizes_help)
+    parser.add_argument("--repeat", type=int, default=5, help="計測回数（最速値を採用）")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--only", help="ケース名の部分一致で絞り込み")
+    parser.add_argument("--save-baseline", help="結果をベースラインとして保存するパス")
+    parser.add_argument("--compare", help="比較するベースラインのパス")
+    parser.add_argument("--threshold", type=float, default=0.15, help="許容する ops/sec の低下率")
+    parser.add_argument("--memory-threshold", type=float, default=0.25, help="許容するメモリピークの増加率")
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    print(f"⏱️  {title}ベンチマーク (Python {platform.python_version()}, sizes={sizes}, repeat={args.repeat})")
+    results = run(build, sizes, args.repeat, args.seed, args.only)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump({
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "results": results,
+            }, f, ensure_ascii=False, indent=2)
+        print(f"💾 ベースライン保存: {args.save_baseline}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        print(f"\n📊 ベースライン比較 ({args.compare}, 閾値 {args.threshold:.0%})")
+        regressions = compare(results, baseline, args.threshold, args.memory_threshold)
+        if regressions:
+            print("\n❌ 性能回帰を検出しました:")
+            for r in regressions:
+                print(f"   - {r}")
+            sys.exit(1)
+        print("✅ 回帰なし")
+
+
+def main() -> None:
+    run_cli("スコアリング", build_cases, DEFAULT_SIZES, sizes_help="求人件数（カンマ区切り）")
+
+
+if __name__ == "__main__":
+    main()
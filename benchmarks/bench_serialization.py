@@ -0,0 +1,159 @@
+"""
+行のシリアライズのマイクロベンチマーク
+
+クエリ結果（RealDictCursor の行）を JSON レスポンスにするまでの処理を、
+変更前の serialize_for_json（isinstance の再帰）と比較する。
+
+- 行ごとの変換: 変更前の serialize_for_json / clean_dict_for_json / serialize_rows
+- JSON 化まで: 変換 + json.dumps / dumps_json（orjson）で行を直接変換
+- モデル化: 変換した行 / DBの行をそのまま JobResponse に渡す
+
+計測前に serialize_rows・dumps_json の結果が変更前の変換と一致することを確認する。
+計測・出力・--save-baseline / --compare は bench_scoring の run_cli を使う。
+
+使い方:
+    python -m benchmarks.bench_serialization
+    python -m benchmarks.bench_serialization --sizes 10000,100000 --save-baseline benchmarks/baseline_serialization.json
+    python -m benchmarks.bench_serialization --compare benchmarks/baseline_serialization.json --threshold 0.15
+"""
+
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Tuple
+import json
+import os
+import random
+
+import orjson
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+from benchmarks.bench_scoring import run_cli
+from benchmarks.seed_data import EMPLOYMENT_TYPES, JOB_TITLES, PREFECTURES
+from schemas.job import JobResponse
+from utils.helpers import clean_dict_for_json, dumps_json, serialize_rows
+
+
+DEFAULT_SIZES = [10000]
+
+STATUSES = ["active", "active", "active", "paused", "closed"]
+
+
+def legacy_serialize_for_json(obj: Any) -> Any:
+    """変更前の utils.helpers.serialize_for_json（比較用）"""
+    if isinstance(obj, Decimal):
+        return float(obj)
+    elif isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    elif isinstance(obj, dict):
+        return {k: legacy_serialize_for_json(v) for k, v in obj.items()}
+    elif isinstance(obj, list):
+        return [legacy_serialize_for_json(item) for item in obj]
+    return obj
+
+
+def make_rows(size: int, seed: int = 42) -> List[Dict[str, Any]]:
+    """
+    求人一覧・検索のSELECT結果の形の行を生成（NUMERIC / TIMESTAMP / DATE / JSONB / 配列を含む）
+
+    Args:
+        size: 件数
+        seed: 乱数シード
+
+    Returns:
+        行の辞書リスト
+    """
+    rng = random.Random(f"{seed}:bench_rows:{size}")
+    titles = list(JOB_TITLES.keys())
+    base = datetime(2025, 1, 1, 9, 0, 0)
+    rows = []
+    for i in range(size):
+        title = rng.choice(titles)
+        (low, high), skills, _, _ = JOB_TITLES[title]
+        prefecture, _, cities = rng.choice(PREFECTURES)
+        salary_min = rng.randrange(low, high - 100, 10)
+        created_at = base + timedelta(minutes=rng.randrange(0, 500000))
+        rows.append({
+            "id": f"00000000-0000-4000-8000-{i:012d}",
+            "company_id": f"00000000-0000-4000-9000-{i % 500:012d}",
+            "company_name": f"テスト株式会社{i % 500}",
+            "job_title": title,
+            "job_description": f"{title}として活躍していただきます。",
+            "employment_type": rng.choice(EMPLOYMENT_TYPES)[0],
+            "location_prefecture": prefecture,
+            "location_city": rng.choice(cities),
+            "salary_min": salary_min,
+            "salary_max": salary_min + rng.randrange(100, 400, 10),
+            "required_skills": ", ".join(rng.sample(skills, min(len(skills), 3))),
+            "benefits": None if i % 3 == 0 else "社会保険完備",
+            "remote_option": rng.choice(["full_remote", "hybrid", "on_site", None]),
+            "status": rng.choice(STATUSES),
+            "created_at": created_at,
+            "updated_at": created_at + timedelta(days=rng.randrange(0, 30)),
+            "start_date": None if i % 4 == 0 else (created_at + timedelta(days=60)).date(),
+            "avg_match_score": None if i % 5 == 0 else Decimal(rng.randrange(0, 10000)) / 100,
+            "tags": rng.sample(skills, min(len(skills), 2)),
+            "features": {"flex": rng.random() < 0.5, "reviewed_at": None},
+        })
+    return rows
+
+
+def check_equivalence(rows: List[Dict[str, Any]]) -> None:
+    """高速経路の結果が変更前の変換と一致することを確認"""
+    expected = [legacy_serialize_for_json(row) for row in rows]
+    if serialize_rows(rows) != expected:
+        raise AssertionError("serialize_rows の結果が serialize_for_json と一致しません")
+    if [clean_dict_for_json(row) for row in rows] != expected:
+        raise AssertionError("clean_dict_for_json の結果が変更前と一致しません")
+    if orjson.loads(dumps_json(rows)) != json.loads(json.dumps(expected)):
+        raise AssertionError("dumps_json の結果が json.dumps と一致しません")
+
+
+def build_cases(size: int, seed: int) -> List[Tuple[str, Callable[[], Any]]]:
+    """
+    サイズごとの計測ケースを構築
+
+    Returns:
+        [(ケース名, 全件を1回処理する関数)]
+    """
+    rows = make_rows(size, seed)
+    check_equivalence(rows)
+
+    def run_legacy():
+        [legacy_serialize_for_json(row) for row in rows]
+
+    def run_clean_dict():
+        [clean_dict_for_json(row) for row in rows]
+
+    def run_serialize_rows():
+        serialize_rows(rows)
+
+    def run_legacy_dumps():
+        json.dumps([legacy_serialize_for_json(row) for row in rows], ensure_ascii=False).encode("utf-8")
+
+    def run_orjson_dumps():
+        dumps_json(rows)
+
+    def run_legacy_model():
+        [JobResponse(**legacy_serialize_for_json(row)) for row in rows]
+
+    def run_raw_model():
+        [JobResponse(**row) for row in rows]
+
+    return [
+        ("legacy serialize_for_json", run_legacy),
+        ("clean_dict_for_json", run_clean_dict),
+        ("serialize_rows", run_serialize_rows),
+        ("legacy serialize + json.dumps", run_legacy_dumps),
+        ("dumps_json (orjson)", run_orjson_dumps),
+        ("legacy serialize + JobResponse", run_legacy_model),
+        ("JobResponse(**row)", run_raw_model),
+    ]
+
+
+def main() -> None:
+    run_cli("シリアライズ", build_cases, DEFAULT_SIZES, sizes_help="行数（カンマ区切り）")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+"""
+負荷試験ハーネス
+
+シード済みのDBとOpenAIスタブ（benchmarks/openai_stub.py）に向けたアプリに対して、
+ユーザー／企業のセッションを並列に実行し、エンドポイントごとの
+p50/p95/p99 レイテンシとRPSを集計する。
+
+トークンはアプリと同じ SECRET_KEY でローカル発行する（ログインのbcryptを計測に含めないため）。
+
+使い方:
+    python -m benchmarks.load_test --base-url http://127.0.0.1:8000 \\
+        --concurrency 20 --duration 60 --mix user_chat=6,scout_chat=2,recommendations=2
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+import argparse
+import asyncio
+import json
+import math
+import random
+import time
+
+import httpx
+
+from config.database import get_db_conn
+from services.auth_service import create_access_token
+
+
+USER_MESSAGES = [
+    "Webエンジニアとして働きたいです",
+    "リモートワークができる会社がいいです",
+    "年収は500万円以上を希望しています",
+    "Pythonでの開発経験が3年あります",
+    "残業が少ない職場がいいです",
+    "東京か大阪で探しています",
+]
+
+SCOUT_MESSAGES = [
+    "フルリモートでも構いません",
+    "ReactとTypeScriptの経験がある方を探しています",
+    "経験3年以上を想定しています",
+]
+
+
+class EndpointStats:
+    """エンドポイントごとの計測結果"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.latencies: List[float] = []  # ミリ秒
+        self.errors: Dict[str, int] = {}
+
+    def record(self, latency_ms: float, status: Optional[int], error: Optional[str] = None) -> None:
+        if error is not None or status is None or status >= 400:
+            key = error or str(status)
+            self.errors[key] = self.errors.get(key, 0) + 1
+            return
+        self.latencies.append(latency_ms)
+
+    def summary(self, elapsed: float) -> Dict[str, Any]:
+        """p50/p95/p99・RPSを集計"""
+        values = sorted(self.latencies)
+        error_count = sum(self.errors.values())
+        return {
+            "endpoint": self.name,
+            "requests": len(values) + error_count,
+            "errors": error_count,
+            "error_detail": self.errors,
+            "rps": round(len(values) / elapsed, 2) if elapsed > 0 else 0.0,
+            "p50_ms": _percentile(values, 50),
+            "p95_ms": _percentile(values, 95),
+            "p99_ms": _percentile(values, 99),
+            "max_ms": round(values[-1], 1) if values else None,
+        }
+
+
+def _percentile(sorted_values: List[float], percentile: float) -> Optional[float]:
+    """最近傍順位法でパーセンタイルを計算"""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(percentile / 100.0 * len(sorted_values)))
+    return round(sorted_values[rank - 1], 1)
+
+
+class LoadTest:
+    """シナリオを並列実行して計測する"""
+
+    def __init__(self, base_url: str, concurrency: int, duration: float, mix: Dict[str, int], seed: int = 42):
+        self.base_url = base_url.rstrip("/")
+        self.concurrency = concurrency
+        self.duration = duration
+        self.mix = mix
+        self.rng = random.Random(seed)
+        self.stats: Dict[str, EndpointStats] = {}
+        self.user_tokens: List[str] = []
+        self.company_tokens: List[str] = []
+
+    def load_tokens(self, user_limit: int = 1000, company_limit: int = 200) -> None:
+        """シード済みのユーザー・企業IDからトークンを発行"""
+        conn = get_db_conn()
+        cur = conn.cursor()
+        try:
+            cur.execute("SELECT user_id FROM personal_date ORDER BY user_id LIMIT %s", (user_limit,))
+            self.user_tokens = [
+                create_access_token({"sub": str(row[0]), "type": "user"}) for row in cur.fetchall()
+            ]
+            cur.execute("SELECT company_id FROM company_date ORDER BY company_id LIMIT %s", (company_limit,))
+            self.company_tokens = [
+                create_access_token({"sub": str(row[0]), "type": "company"}) for row in cur.fetchall()
+            ]
+        finally:
+            cur.close()
+            conn.close()
+
+        if not self.user_tokens:
+            raise RuntimeError("personal_date にユーザーがいません。先にデータをシードしてください")
+        if self.mix.get("scout_chat") and not self.company_tokens:
+            raise RuntimeError("company_date に企業がいません。先にデータをシードしてください")
+
+    async def _request(
+        self,
+        client: httpx.AsyncClient,
+        name: str,
+        method: str,
+        path: str,
+        token: str,
+        **kwargs: Any
+    ) -> Optional[httpx.Response]:
+        """1リクエストを実行して計測"""
+        stats = self.stats.setdefault(name, EndpointStats(name))
+        headers = {"Authorization": f"Bearer {token}"}
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, path, headers=headers, **kwargs)
+        except httpx.HTTPError as e:
+            stats.record((time.perf_counter() - started) * 1000, None, type(e).__name__)
+            return None
+
+        stats.record((time.perf_counter() - started) * 1000, response.status_code)
+        return response
+
+    async def user_chat(self, client: httpx.AsyncClient, rng: random.Random) -> None:
+        """ユーザーチャット: 初回接続から数ターン会話"""
+        token = rng.choice(self.user_tokens)
+        response = await self._request(
+            client, "POST /api/user/chat", "POST", "/api/user/chat", token,
+            json={"message": "初回接続", "context": {}}
+        )
+        if response is None or response.status_code >= 400:
+            return
+
+        session_id = response.json().get("conversation_id")
+        for message in rng.sample(USER_MESSAGES, 3):
+            response = await self._request(
+                client, "POST /api/user/chat", "POST", "/api/user/chat", token,
+                json={"message": message, "context": {"session_id": session_id}}
+            )
+            if response is None or response.status_code >= 400:
+                return
+
+    async def scout_chat(self, client: httpx.AsyncClient, rng: random.Random) -> None:
+        """企業スカウトチャット: 3ターン（応答の context を引き継ぐ）"""
+        token = rng.choice(self.company_tokens)
+        context: Dict[str, Any] = {
+            "job_title": rng.choice(["Webエンジニア", "デザイナー", "営業"]),
+            "location": rng.choice(["東京都", "大阪府"]),
+            "salary_min": rng.choice([400, 500, 600]),
+        }
+        for message in SCOUT_MESSAGES:
+            response = await self._request(
+                client, "POST /api/scout/chat", "POST", "/api/scout/chat", token,
+                json={"message": message, "context": context}
+            )
+            if response is None or response.status_code >= 400:
+                return
+            context = response.json().get("context") or context
+
+    async def recommendations(self, client: httpx.AsyncClient, rng: random.Random) -> None:
+        """おすすめ求人取得"""
+        token = rng.choice(self.user_tokens)
+        await self._request(
+            client, "GET /api/user/recommendations", "GET", "/api/user/recommendations", token,
+            params={"limit": 10}
+        )
+
+    async def _virtual_user(self, client: httpx.AsyncClient, deadline: float, seed: int) -> None:
+        """終了時刻までシナリオを繰り返す（クローズドループ）"""
+        rng = random.Random(seed)
+        scenarios = [(getattr(self, name), weight) for name, weight in self.mix.items() if weight > 0]
+        functions = [s for s, _ in scenarios]
+        weights = [w for _, w in scenarios]
+
+        while time.monotonic() < deadline:
+            scenario = rng.choices(functions, weights=weights)[0]
+            await scenario(client, rng)
+
+    async def run(self) -> Tuple[float, List[Dict[str, Any]]]:
+        """
+        負荷試験を実行
+
+        Returns:
+            (経過秒数, エンドポイントごとの集計)
+        """
+        limits = httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+        async with httpx.AsyncClient(base_url=self.base_url, timeout=120.0, limits=limits) as client:
+            started = time.monotonic()
+            deadline = started + self.duration
+            await asyncio.gather(*[
+                self._virtual_user(client, deadline, self.rng.randrange(2 ** 32))
+                for _ in range(self.concurrency)
+            ])
+            elapsed = time.monotonic() - started
+
+        return elapsed, [s.summary(elapsed) for s in self.stats.values()]
+
+
+def _parse_mix(value: str) -> Dict[str, int]:
+    """'user_chat=6,scout_chat=2' 形式をパース"""
+    mix: Dict[str, int] = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in ("user_chat", "scout_chat", "recommendations"):
+            raise argparse.ArgumentTypeError(f"不明なシナリオ: {name}")
+        mix[name] = int(weight or 1)
+    return mix
+
+
+def print_report(elapsed: float, results: List[Dict[str, Any]]) -> None:
+    """集計結果を表形式で表示"""
+    print("\n" + "=" * 96)
+    print(f"📊 負荷試験結果（{elapsed:.1f}秒）")
+    print("=" * 96)
+    print(f"{'endpoint':<34}{'reqs':>7}{'errors':>8}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}")
+    for r in sorted(results, key=lambda x: x["endpoint"]):
+        print(
+            f"{r['endpoint']:<34}{r['requests']:>7}{r['errors']:>8}{r['rps']:>9}"
+            f"{str(r['p50_ms']):>9}{str(r['p95_ms']):>9}{str(r['p99_ms']):>9}{str(r['max_ms']):>9}"
+        )
+        if r["error_detail"]:
+            print(f"{'':<34}errors: {r['error_detail']}")
+    print("=" * 96)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="負荷試験ハーネス")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--concurrency", type=int, default=10, help="並列セッション数")
+    parser.add_argument("--duration", type=float, default=30.0, help="実行時間（秒）")
+    parser.add_argument("--mix", type=_parse_mix, default="user_chat=6,scout_chat=2,recommendations=2",
+                        help="シナリオの重み（user_chat / scout_chat / recommendations）")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="結果をJSONで保存するパス")
+    args = parser.parse_args()
+
+    test = LoadTest(args.base_url, args.concurrency, args.duration, args.mix, seed=args.seed)
+    test.load_tokens()
+    print(f"🚀 負荷試験開始: {args.base_url} 並列={args.concurrency} 時間={args.duration}秒 mix={args.mix}")
+
+    elapsed, results = asyncio.run(test.run())
+    print_report(elapsed, results)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({
+                "base_url": args.base_url,
+                "concurrency": args.concurrency,
+                "duration": elapsed,
+                "mix": args.mix,
+                "results": results,
+            }, f, ensure_ascii=False, indent=2)
+        print(f"💾 結果保存: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+"""
+OpenAI互換スタブサーバー（負荷試験用）
+
+api.openai.com の代わりに起動し、アプリの OpenAI クライアントを
+OPENAI_BASE_URL で向けることで、外部APIに依存せずスループットを測定する。
+応答はプロンプトの種類（意図抽出・相性分析・スコアリング・質問生成）に応じた形で返す。
+
+使い方:
+    python -m benchmarks.openai_stub --port 8100 --latency-ms 800 --latency-sigma 0.4
+    OPENAI_BASE_URL=http://127.0.0.1:8100/v1 OPENAI_API_KEY=stub uvicorn main:app
+"""
+
+from typing import Any, Dict, List, Optional
+import argparse
+import asyncio
+import json
+import math
+import random
+import time
+import uuid
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+
+class StubConfig:
+    """応答遅延・エラー率の設定"""
+
+    def __init__(
+        self,
+        latency_ms: float = 500.0,
+        latency_sigma: float = 0.0,
+        embedding_latency_ms: float = 50.0,
+        error_rate: float = 0.0,
+        seed: int = 42
+    ):
+        self.latency_ms = latency_ms  # 遅延の中央値
+        self.latency_sigma = latency_sigma  # 対数正規分布のσ（0なら固定遅延）
+        self.embedding_latency_ms = embedding_latency_ms
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+
+    def sample_latency(self, median_ms: float) -> float:
+        """遅延（秒）をサンプリング"""
+        if median_ms <= 0:
+            return 0.0
+        if self.latency_sigma <= 0:
+            return median_ms / 1000.0
+        return self.rng.lognormvariate(math.log(median_ms), self.latency_sigma) / 1000.0
+
+
+_KEYWORDS = ["Python", "React", "リモート", "フレックス", "Webデザイナー", "エンジニア", "営業", "年収アップ"]
+
+_QUESTIONS = [
+    "ありがとうございます。リモートワークの希望はありますか？",
+    "普段使っている技術スタックやツールを教えてください。",
+    "これまでの経験年数はどのくらいですか？",
+    "チームの規模や働き方で重視することはありますか？",
+    "年収以外に重視している条件があれば教えてください。",
+]
+
+
+def _estimate_tokens(text: str) -> int:
+    """トークン数の概算（日本語混じりのため2文字≒1トークン）"""
+    return max(1, len(text) // 2)
+
+
+def _intent_reply(rng: random.Random) -> Dict[str, Any]:
+    """extract_user_intent の出力形式"""
+    return {
+        "keywords": rng.sample(_KEYWORDS, 3),
+        "pain_points": ["残業が多い"],
+        "flexible_needs": ["フレックス勤務"],
+        "explicit_preferences": {
+            "location_prefecture": rng.choice(["東京都", "大阪府", "福岡県"]),
+            "remote_work": rng.choice(["full_remote", "hybrid", None]),
+            "salary_min": rng.choice([400, 500, 600]),
+        },
+        "implicit_values": {"work_life_balance": 0.8},
+        "confidence": round(rng.uniform(0.5, 0.95), 2),
+    }
+
+
+def _compatibility_reply(rng: random.Random) -> Dict[str, Any]:
+    """analyze_job_compatibility の出力形式"""
+    return {
+        "score": rng.randint(40, 95),
+        "reasoning": "希望条件と求人内容がおおむね一致しています",
+        "matched_features": ["勤務地", "リモート可"],
+        "concerns": ["年収レンジがやや低い"],
+    }
+
+
+def build_reply(messages: List[Dict[str, Any]], json_mode: bool, rng: random.Random) -> str:
+    """
+    プロンプトの種類に応じた応答本文を生成
+
+    Args:
+        messages: chat.completions の messages
+        json_mode: response_format が json_object か
+        rng: 乱数生成器
+
+    Returns:
+        assistant メッセージの本文
+    """
+    system = next((m.get("content") or "" for m in messages if m.get("role") == "system"), "")
+    last_user = next((m.get("content") or "" for m in reversed(messages) if m.get("role") == "user"), "")
+
+    if json_mode:
+        if "相性" in system:
+            return json.dumps(_compatibility_reply(rng), ensure_ascii=False)
+        return json.dumps(_intent_reply(rng), ensure_ascii=False)
+
+    if "マッチ度" in last_user or "スコア" in last_user:
+        return f"スコア: {rng.randint(40, 95)}\n理由: 会話内容から希望条件との一致度を評価しました。"
+
+    return rng.choice(_QUESTIONS)
+
+
+def create_app(config: StubConfig) -> FastAPI:
+    """スタブサーバーのアプリケーションを生成"""
+    app = FastAPI(title="OpenAI Stub", docs_url=None, redoc_url=None)
+
+    def _error() -> Optional[JSONResponse]:
+        if config.error_rate > 0 and config.rng.random() < config.error_rate:
+            return JSONResponse(
+                status_code=500,
+                content={"error": {"message": "stub injected error", "type": "server_error"}}
+            )
+        return None
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        await asyncio.sleep(config.sample_latency(config.latency_ms))
+
+        error = _error()
+        if error is not None:
+            return error
+
+        messages = body.get("messages", [])
+        json_mode = (body.get("response_format") or {}).get("type") == "json_object"
+        content = build_reply(messages, json_mode, config.rng)
+
+        prompt_tokens = sum(_estimate_tokens(str(m.get("content") or "")) for m in messages)
+        completion_tokens = _estimate_tokens(content)
+
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "gpt-4o"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+
+    @app.post("/v1/embeddings")
+    async def embeddings(request: Request):
+        body = await request.json()
+        await asyncio.sleep(config.sample_latency(config.embedding_latency_ms))
+
+        error = _error()
+        if error is not None:
+            return error
+
+        inputs = body.get("input", [])
+        if isinstance(inputs, str):
+            inputs = [inputs]
+
+        data = []
+        for i, text in enumerate(inputs):
+            # 同じ入力には同じベクトルを返す（1536次元 = text-embedding-ada-002）
+            rng = random.Random(str(text))
+            vector = [rng.uniform(-1, 1) for _ in range(1536)]
+            norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+            data.append({"object": "embedding", "index": i, "embedding": [v / norm for v in vector]})
+
+        tokens = sum(_estimate_tokens(str(t)) for t in inputs)
+        return {
+            "object": "list",
+            "data": data,
+            "model": body.get("model", "text-embedding-ada-002"),
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+        }
+
+    @app.get("/v1/models")
+    async def models():
+        return {"object": "list", "data": [{"id": "gpt-4o", "object": "model"}, {"id": "gpt-4o-mini", "object": "model"}]}
+
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="OpenAI互換スタブサーバー")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--latency-ms", type=float, default=500.0, help="chat応答遅延の中央値（ミリ秒）")
+    parser.add_argument("--latency-sigma", type=float, default=0.0, help="対数正規分布のσ（0で固定遅延）")
+    parser.add_argument("--embedding-latency-ms", type=float, default=50.0, help="embedding応答遅延の中央値（ミリ秒）")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="500エラーを返す割合（0〜1）")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    import uvicorn
+
+    config = StubConfig(
+        latency_ms=args.latency_ms,
+        latency_sigma=args.latency_sigma,
+        embedding_latency_ms=args.embedding_latency_ms,
+        error_rate=args.error_rate,
+        seed=args.seed,
+    )
+    print(f"🧪 OpenAIスタブ起動: http://{args.host}:{args.port}/v1 (latency={args.latency_ms}ms, σ={args.latency_sigma})")
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
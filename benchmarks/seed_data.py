@@ -0,0 +1,448 @@
+"""
+大規模ダミーデータ生成（COPYで一括投入）
+
+企業・求人・ユーザー（プロフィール・希望条件）・会話ログ・行動履歴を
+件数指定で生成する。同じ --seed なら同じデータになる（テーブルごとに独立した乱数系列）。
+
+使い方:
+    python -m benchmarks.seed_data --users 1000000 --companies 20000 --jobs 200000 \\
+        --conversations 300000 --interactions 2000000 --seed 42
+"""
+
+from typing import Any, Dict, Iterator, List, Sequence, Tuple
+from datetime import datetime, timedelta
+import argparse
+import math
+import random
+import time
+import uuid
+
+from config.database import get_db_conn
+from services.auth_service import get_password_hash
+from services.interaction_service import InteractionService
+from utils.pg_copy import copy_rows
+
+
+# 都道府県（重み付き: 求人・ユーザーは都市部に偏る）
+PREFECTURES: List[Tuple[str, int, List[str]]] = [
+    ("東京都", 30, ["千代田区", "中央区", "港区", "新宿区", "渋谷区", "品川区"]),
+    ("大阪府", 10, ["大阪市北区", "大阪市中央区", "堺市"]),
+    ("神奈川県", 8, ["横浜市", "川崎市", "相模原市"]),
+    ("愛知県", 6, ["名古屋市中区", "名古屋市中村区", "豊田市"]),
+    ("福岡県", 5, ["福岡市博多区", "福岡市中央区", "北九州市"]),
+    ("埼玉県", 4, ["さいたま市", "川口市"]),
+    ("千葉県", 4, ["千葉市", "船橋市"]),
+    ("北海道", 3, ["札幌市中央区", "札幌市北区"]),
+    ("兵庫県", 3, ["神戸市中央区", "姫路市"]),
+    ("京都府", 3, ["京都市下京区", "京都市中京区"]),
+    ("宮城県", 2, ["仙台市青葉区"]),
+    ("広島県", 2, ["広島市中区"]),
+    ("静岡県", 2, ["静岡市", "浜松市"]),
+    ("沖縄県", 1, ["那覇市"]),
+    ("新潟県", 1, ["新潟市"]),
+]
+
+# 職種 -> (給与帯（万円）, 必須スキル候補, 技術スタック候補, 業界)
+JOB_TITLES: Dict[str, Tuple[Tuple[int, int], List[str], Dict[str, List[str]], str]] = {
+    "Webエンジニア": ((400, 900), ["JavaScript", "TypeScript", "React", "Node.js", "SQL", "Git"],
+                      {"frontend": ["React", "Vue.js", "Next.js"], "backend": ["Node.js", "Go", "Ruby on Rails"]}, "IT"),
+    "バックエンドエンジニア": ((450, 1000), ["Python", "Go", "Java", "SQL", "AWS", "Docker"],
+                              {"backend": ["Python", "Go", "Java"], "infra": ["AWS", "GCP", "Kubernetes"]}, "IT"),
+    "フロントエンドエンジニア": ((400, 850), ["JavaScript", "TypeScript", "React", "Vue.js", "CSS"],
+                                {"frontend": ["React", "Vue.js", "Svelte"], "tools": ["Vite", "Storybook"]}, "IT"),
+    "インフラエンジニア": ((450, 950), ["AWS", "Linux", "Terraform", "Kubernetes", "ネットワーク"],
+                          {"infra": ["AWS", "Azure", "Terraform"], "monitoring": ["Datadog", "Prometheus"]}, "IT"),
+    "データサイエンティスト": ((500, 1200), ["Python", "SQL", "機械学習", "統計", "pandas"],
+                              {"ml": ["PyTorch", "scikit-learn"], "data": ["BigQuery", "Snowflake"]}, "IT"),
+    "Webデザイナー": ((350, 650), ["Figma", "Photoshop", "Illustrator", "HTML", "CSS"],
+                      {"design": ["Figma", "Adobe XD"], "frontend": ["HTML", "CSS"]}, "広告・デザイン"),
+    "UI/UXデザイナー": ((400, 800), ["Figma", "ユーザーリサーチ", "プロトタイピング", "Sketch"],
+                        {"design": ["Figma", "Sketch", "Miro"]}, "IT"),
+    "プロジェクトマネージャー": ((550, 1100), ["プロジェクト管理", "アジャイル", "スクラム", "要件定義"],
+                                {"tools": ["Jira", "Confluence", "Backlog"]}, "IT"),
+    "法人営業": ((350, 800), ["法人営業", "提案力", "CRM", "交渉"],
+                 {"tools": ["Salesforce", "HubSpot"]}, "商社"),
+    "カスタマーサクセス": ((350, 700), ["顧客折衝", "SaaS", "データ分析", "CRM"],
+                          {"tools": ["Zendesk", "Salesforce"]}, "IT"),
+    "マーケティング": ((400, 850), ["デジタルマーケティング", "SEO", "広告運用", "Google Analytics"],
+                       {"tools": ["Google Analytics", "Google Ads", "HubSpot"]}, "広告・デザイン"),
+    "人事・採用担当": ((350, 700), ["採用", "労務", "面接", "人事制度"],
+                      {"tools": ["SmartHR", "HRMOS"]}, "人材"),
+    "経理": ((350, 700), ["簿記", "決算", "会計ソフト", "税務"],
+             {"tools": ["freee", "マネーフォワード"]}, "金融"),
+    "看護師": ((350, 600), ["看護師免許", "病棟経験", "チーム医療"],
+               {}, "医療・福祉"),
+    "介護スタッフ": ((250, 450), ["介護福祉士", "身体介護", "コミュニケーション"],
+                     {}, "医療・福祉"),
+    "施工管理": ((400, 900), ["施工管理技士", "CAD", "安全管理", "工程管理"],
+                 {"tools": ["AutoCAD", "Jw_cad"]}, "建設"),
+}
+
+EMPLOYMENT_TYPES = [("正社員", 75), ("契約社員", 10), ("業務委託", 8), ("アルバイト・パート", 7)]
+REMOTE_OPTIONS = [("full_remote", 20), ("hybrid", 45), ("on_site", 35)]
+COMPANY_SIZES = ["1-10名", "11-50名", "51-300名", "301-1000名", "1001名以上"]
+COMPANY_SUFFIXES = ["株式会社", "合同会社", "ホールディングス", "テクノロジーズ", "ソリューションズ"]
+COMPANY_WORDS = ["未来", "グローバル", "ネクスト", "サクラ", "フジ", "アオバ", "ヒカリ", "ミライ", "ソラ", "ハヤテ"]
+BENEFITS = ["社会保険完備", "交通費支給", "リモート手当", "書籍購入補助", "資格取得支援", "住宅手当", "ストックオプション"]
+LAST_NAMES = ["佐藤", "鈴木", "高橋", "田中", "伊藤", "渡辺", "山本", "中村", "小林", "加藤"]
+FIRST_NAMES = ["太郎", "花子", "翔太", "美咲", "大輔", "陽菜", "健太", "さくら", "拓也", "結衣"]
+USER_MESSAGES = [
+    "{title}として働きたいです",
+    "リモートワークができる会社がいいです",
+    "年収は{salary}万円以上を希望しています",
+    "{skill}の経験を活かしたいです",
+    "残業が少ない職場がいいです",
+    "{prefecture}で探しています",
+]
+AI_MESSAGES = [
+    "ありがとうございます。リモートワークの希望はありますか？",
+    "普段使っているスキルやツールを教えてください。",
+    "希望年収について教えてください。",
+    "働き方で重視することはありますか？",
+]
+INTERACTION_TYPES = [("view", 70), ("click", 20), ("favorite", 7), ("apply", 3)]
+
+# 生成データの時間範囲
+EPOCH = datetime(2024, 1, 1)
+SPAN_SECONDS = 365 * 24 * 3600
+
+EMBEDDING_DIM = 1536
+
+
+def _weighted(rng: random.Random, items: Sequence[Tuple[Any, int]]) -> Any:
+    return rng.choices([v for v, _ in items], weights=[w for _, w in items])[0]
+
+
+def _prefecture(rng: random.Random) -> Tuple[str, str]:
+    name, _, cities = rng.choices(PREFECTURES, weights=[w for _, w, _ in PREFECTURES])[0]
+    return name, rng.choice(cities)
+
+
+def _timestamp(rng: random.Random) -> datetime:
+    return EPOCH + timedelta(seconds=rng.randrange(SPAN_SECONDS))
+
+
+def _uuid(rng: random.Random) -> uuid.UUID:
+    return uuid.UUID(int=rng.getrandbits(128), version=4)
+
+
+class SeedGenerator:
+    """テーブルごとの行を生成する（テーブルごとに独立したシードを使う）"""
+
+    def __init__(self, seed: int, user_offset: int = 0, with_embeddings: bool = False):
+        self.seed = seed
+        self.user_offset = user_offset
+        self.with_embeddings = with_embeddings
+        self.password_hash = get_password_hash("password")
+        self.company_ids: List[uuid.UUID] = []
+        self.job_ids: List[uuid.UUID] = []
+        self._title_vectors: Dict[str, List[float]] = {}
+
+    def _rng(self, table: str) -> random.Random:
+        return random.Random(f"{self.seed}:{table}")
+
+    def companies(self, count: int) -> Iterator[Tuple[Any, ...]]:
+        rng = self._rng("company_date")
+        industries = sorted({v[3] for v in JOB_TITLES.values()})
+        for i in range(count):
+            company_id = _uuid(rng)
+            self.company_ids.append(company_id)
+            name = f"{rng.choice(COMPANY_WORDS)}{rng.choice(COMPANY_WORDS)}{rng.choice(COMPANY_SUFFIXES)}"
+            created_at = _timestamp(rng)
+            yield (
+                company_id, name, f"seed{self.seed}_company{i}@example.com", self.password_hash,
+                rng.choice(industries), rng.choice(COMPANY_SIZES), rng.randint(1950, 2023),
+                f"https://example.com/company/{i}", f"{name}の会社紹介です。", created_at, created_at,
+            )
+
+    def _embedding(self, rng: random.Random, title: str) -> str:
+        """職種ごとの基準ベクトルにノイズを加えたembedding（pgvectorのリテラル）"""
+        base = self._title_vectors.get(title)
+        if base is None:
+            base_rng = random.Random(f"{self.seed}:embedding:{title}")
+            base = [base_rng.gauss(0, 1) for _ in range(EMBEDDING_DIM)]
+            self._title_vectors[title] = base
+        vector = [b + rng.gauss(0, 0.3) for b in base]
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        return "[" + ",".join(f"{v / norm:.5f}" for v in vector) + "]"
+
+    def jobs(self, count: int) -> Iterator[Tuple[Any, ...]]:
+        rng = self._rng("company_profile")
+        embedding_rng = self._rng("embedding")  # embeddingの有無で他の列が変わらないよう別系列
+        titles = list(JOB_TITLES.keys())
+        for _ in range(count):
+            job_id = _uuid(rng)
+            self.job_ids.append(job_id)
+            title = rng.choice(titles)
+            (low, high), skills, stack, _ = JOB_TITLES[title]
+            salary_min = rng.randrange(low, high - 100, 10)
+            salary_max = salary_min + rng.randrange(100, 400, 10)
+            prefecture, city = _prefecture(rng)
+            required = rng.sample(skills, min(len(skills), rng.randint(2, 4)))
+            tech_stack = {k: rng.sample(v, min(len(v), rng.randint(1, 2))) for k, v in stack.items()} or None
+            created_at = _timestamp(rng)
+            status = "active" if rng.random() < 0.9 else "closed"
+            yield (
+                job_id, rng.choice(self.company_ids), title,
+                f"{title}として{'・'.join(required)}を活かして活躍していただきます。",
+                prefecture, city, salary_min, salary_max, _weighted(rng, EMPLOYMENT_TYPES),
+                _weighted(rng, REMOTE_OPTIONS), rng.random() < 0.5, rng.random() < 0.3,
+                tech_stack, required, rng.sample(BENEFITS, 3),
+                self._embedding(embedding_rng, title) if self.with_embeddings else None,
+                status, created_at, created_at,
+            )
+
+    def users(self, count: int) -> Iterator[Tuple[Any, ...]]:
+        rng = self._rng("personal_date")
+        for i in range(count):
+            user_id = self.user_offset + i + 1
+            created_at = _timestamp(rng)
+            yield (
+                user_id, f"{rng.choice(LAST_NAMES)} {rng.choice(FIRST_NAMES)}",
+                f"seed{self.seed}_user{i}@example.com", self.password_hash,
+                rng.randint(20, 60), rng.choice(["男性", "女性", "その他"]),
+                f"090{rng.randrange(10 ** 8):08d}", created_at, created_at,
+            )
+
+    def _user_title(self, user_index: int) -> str:
+        """ユーザーの希望職種（profile と preferences で一致させる）"""
+        return random.Random(f"{self.seed}:user_title:{user_index}").choice(list(JOB_TITLES.keys()))
+
+    def user_profiles(self, count: int) -> Iterator[Tuple[Any, ...]]:
+        rng = self._rng("user_profile")
+        for i in range(count):
+            title = self._user_title(i)
+            (low, high), skills, _, _ = JOB_TITLES[title]
+            prefecture, city = _prefecture(rng)
+            salary_min = rng.randrange(low, high - 100, 10)
+            yield (
+                self.user_offset + i + 1, title, rng.randint(0, 20),
+                rng.sample(skills, min(len(skills), rng.randint(1, 4))),
+                rng.choice(["高校卒", "専門学校卒", "大学卒", "大学院卒"]),
+                prefecture, city, salary_min, salary_min + 200,
+            )
+
+    def user_preferences(self, count: int, ratio: float) -> Iterator[Tuple[Any, ...]]:
+        rng = self._rng("user_preferences_profile")
+        industries = sorted({v[3] for v in JOB_TITLES.values()})
+        for i in range(count):
+            if rng.random() >= ratio:
+                continue
+            title = self._user_title(i)
+            (low, high), _, _, industry = JOB_TITLES[title]
+            prefecture, city = _prefecture(rng)
+            salary_min = rng.randrange(low, high - 100, 10)
+            updated_at = _timestamp(rng)
+            yield (
+                self.user_offset + i + 1, title, prefecture, city, salary_min, salary_min + 300,
+                _weighted(rng, [("full_remote", 25), ("hybrid", 45), ("on_site", 30)]),
+                _weighted(rng, EMPLOYMENT_TYPES),
+                sorted({industry, rng.choice(industries)}), rng.choice(["フレックス", "固定時間", None]),
+                rng.choice(COMPANY_SIZES + [None]), updated_at, updated_at,
+            )
+
+    def conversations(self, sessions: int, users: int, turns: int) -> Iterator[Tuple[Any, ...]]:
+        rng = self._rng("conversation_logs")
+        for _ in range(sessions):
+            user_index = rng.randrange(users)
+            title = self._user_title(user_index)
+            _, skills, _, _ = JOB_TITLES[title]
+            session_id = str(_uuid(rng))
+            started_at = _timestamp(rng)
+            for turn in range(1, turns + 1):
+                message = rng.choice(USER_MESSAGES).format(
+                    title=title, salary=rng.choice([400, 500, 600]),
+                    skill=rng.choice(skills), prefecture=_prefecture(rng)[0],
+                )
+                intent = {"keywords": [title, rng.choice(skills)], "confidence": round(rng.random(), 2)}
+                yield (
+                    session_id, self.user_offset + user_index + 1, turn, message,
+                    rng.choice(AI_MESSAGES), intent, started_at + timedelta(seconds=30 * turn),
+                )
+
+    def interactions(self, count: int, users: int) -> Iterator[Tuple[Any, ...]]:
+        rng = self._rng("user_interactions")
+        for _ in range(count):
+            yield (
+                self.user_offset + rng.randrange(users) + 1, rng.choice(self.job_ids),
+                _weighted(rng, INTERACTION_TYPES), None, None, _timestamp(rng),
+            )
+
+
+# (テーブル, 列)
+COMPANY_COLUMNS = (
+    "company_id", "company_name", "email", "password", "industry", "company_size",
+    "founded_year", "website_url", "description", "created_at", "updated_at",
+)
+JOB_COLUMNS = (
+    "id", "company_id", "job_title", "job_description", "location_prefecture", "location_city",
+    "salary_min", "salary_max", "employment_type", "remote_option", "flex_time", "side_job_allowed",
+    "tech_stack", "required_skills", "benefits", "embedding", "status", "created_at", "updated_at",
+)
+USER_COLUMNS = ("user_id", "name", "email", "password", "age", "gender", "phone", "created_at", "updated_at")
+USER_PROFILE_COLUMNS = (
+    "user_id", "job_title", "years_of_experience", "skills", "education_level",
+    "location_prefecture", "location_city", "salary_min", "salary_max",
+)
+USER_PREFERENCE_COLUMNS = (
+    "user_id", "job_title", "location_prefecture", "location_city", "salary_min", "salary_max",
+    "remote_work_preference", "employment_type", "industry_preferences", "work_hours_preference",
+    "company_size_preference", "created_at", "updated_at",
+)
+CONVERSATION_COLUMNS = (
+    "session_id", "user_id", "turn_number", "user_message", "ai_response", "extracted_intent", "created_at",
+)
+INTERACTION_COLUMNS = ("user_id", "job_id", "interaction_type", "session_id", "interaction_data", "created_at")
+
+# --truncate で空にするテーブル（依存関係の逆順）
+SEED_TABLES = [
+    "user_interaction_summary", "user_interactions", "conversation_logs", "user_preferences_profile", "user_profile",
+    "personal_date", "company_profile", "company_date",
+]
+
+
+def _copy(conn, table: str, columns: Sequence[str], rows: Iterator[Tuple[Any, ...]]) -> int:
+    """1テーブル分をCOPYしてコミット"""
+    started = time.perf_counter()
+    cur = conn.cursor()
+    try:
+        count = copy_rows(cur, table, columns, rows)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+
+    elapsed = time.perf_counter() - started
+    print(f"  ✅ {table}: {count:,}件 ({elapsed:.1f}秒, {count / elapsed if elapsed else 0:,.0f}行/秒)")
+    return count
+
+
+def seed(
+    users: int,
+    companies: int,
+    jobs: int,
+    conversations: int,
+    turns: int = 4,
+    interactions: int = 0,
+    preference_ratio: float = 0.8,
+    seed_value: int = 42,
+    truncate: bool = False,
+    with_embeddings: bool = False
+) -> Dict[str, int]:
+    """
+    ダミーデータを投入
+
+    Args:
+        users: ユーザー数
+        companies: 企業数
+        jobs: 求人数
+        conversations: 会話セッション数
+        turns: 1セッションあたりのターン数
+        interactions: 行動履歴の件数
+        preference_ratio: 希望条件を登録済みのユーザーの割合
+        seed_value: 乱数シード
+        truncate: 投入前に対象テーブルを空にするか
+        with_embeddings: 求人のembeddingを生成するか（職種ごとにクラスタ化したランダムベクトル）
+
+    Returns:
+        テーブルごとの投入件数
+    """
+    conn = get_db_conn()
+    counts: Dict[str, int] = {}
+
+    try:
+        cur = conn.cursor()
+        if truncate:
+            print("🧹 既存データを削除...")
+            cur.execute("TRUNCATE " + ", ".join(SEED_TABLES) + " RESTART IDENTITY CASCADE")
+            conn.commit()
+
+        cur.execute("SELECT COALESCE(MAX(user_id), 0) FROM personal_date")
+        user_offset = cur.fetchone()[0]
+        cur.close()
+
+        generator = SeedGenerator(seed_value, user_offset=user_offset, with_embeddings=with_embeddings)
+        print(f"🌱 データ生成開始 (seed={seed_value}, user_id開始={user_offset + 1})")
+
+        counts["company_date"] = _copy(conn, "company_date", COMPANY_COLUMNS, generator.companies(companies))
+        counts["company_profile"] = _copy(conn, "company_profile", JOB_COLUMNS, generator.jobs(jobs))
+        counts["personal_date"] = _copy(conn, "personal_date", USER_COLUMNS, generator.users(users))
+
+        # user_id を明示して投入したので SERIAL のシーケンスを進める
+        cur = conn.cursor()
+        cur.execute(
+            "SELECT setval(pg_get_serial_sequence('personal_date', 'user_id'), "
+            "(SELECT COALESCE(MAX(user_id), 1) FROM personal_date))"
+        )
+        conn.commit()
+        cur.close()
+
+        counts["user_profile"] = _copy(conn, "user_profile", USER_PROFILE_COLUMNS, generator.user_profiles(users))
+        counts["user_preferences_profile"] = _copy(
+            conn, "user_preferences_profile", USER_PREFERENCE_COLUMNS,
+            generator.user_preferences(users, preference_ratio)
+        )
+        if conversations and users:
+            counts["conversation_logs"] = _copy(
+                conn, "conversation_logs", CONVERSATION_COLUMNS,
+                generator.conversations(conversations, users, turns)
+            )
+        if interactions and users and jobs:
+            counts["user_interactions"] = _copy(
+                conn, "user_interactions", INTERACTION_COLUMNS, generator.interactions(interactions, users)
+            )
+            # COPY は取り込みAPIを通らないため、集計テーブルはまとめて作り直す
+            counts["user_interaction_summary"] = InteractionService.rebuild_summary(conn)
+            conn.commit()
+            print(f"  ✅ user_interaction_summary: {counts['user_interaction_summary']:,}件（集計）")
+
+        # プランナー統計を更新（大量投入直後は古い統計で実行計画が崩れるため）
+        print("📈 ANALYZE...")
+        cur = conn.cursor()
+        for table in counts:
+            cur.execute(f"ANALYZE {table}")
+        conn.commit()
+        cur.close()
+    finally:
+        conn.close()
+
+    return counts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="大規模ダミーデータ生成")
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--companies", type=int, default=500)
+    parser.add_argument("--jobs", type=int, default=5000)
+    parser.add_argument("--conversations", type=int, default=5000, help="会話セッション数")
+    parser.add_argument("--turns", type=int, default=4, help="1セッションあたりのターン数")
+    parser.add_argument("--interactions", type=int, default=0, help="行動履歴（user_interactions）の件数")
+    parser.add_argument("--preference-ratio", type=float, default=0.8, help="希望条件を登録済みのユーザーの割合")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--truncate", action="store_true", help="投入前に対象テーブルを空にする")
+    parser.add_argument("--with-embeddings", action="store_true", help="求人embeddingも生成する")
+    args = parser.parse_args()
+
+    if args.jobs and not args.companies:
+        parser.error("--jobs を指定する場合は --companies も1以上にしてください")
+
+    started = time.perf_counter()
+    counts = seed(
+        users=args.users,
+        companies=args.companies,
+        jobs=args.jobs,
+        conversations=args.conversations,
+        turns=args.turns,
+        interactions=args.interactions,
+        preference_ratio=args.preference_ratio,
+        seed_value=args.seed,
+        truncate=args.truncate,
+        with_embeddings=args.with_embeddings,
+    )
+    print(f"🎉 完了: {sum(counts.values()):,}件 ({time.perf_counter() - started:.1f}秒)")
+
+
+if __name__ == "__main__":
+    main()
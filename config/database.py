@@ -3,15 +3,22 @@
 完全なDBスキーマ(db_schema_complete.sql)に対応
 """
 
+import logging
 import os
+import time
 from typing import Generator
 import psycopg2
 from psycopg2.extras import RealDictCursor
 from psycopg2 import sql
 from dotenv import load_dotenv
 
+from utils.metrics import observe_db_checkout
+from utils.tracing import TracedConnection, span
+
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 
 class DatabaseConfig:
     """データベース設定クラス"""
@@ -45,10 +52,14 @@ def get_db_conn():
         psycopg2.connection: データベース接続オブジェクト
     """
     try:
-        conn = psycopg2.connect(**db_config.get_connection_params())
+        # クエリごとの所要時間をトレースとメトリクスに記録する接続クラスを使う
+        started = time.perf_counter()
+        with span("db.connect"):
+            conn = psycopg2.connect(**db_config.get_connection_params(), connection_factory=TracedConnection)
+        observe_db_checkout(time.perf_counter() - started)
         return conn
     except Exception as e:
-        print(f"❌ データベース接続エラー: {e}")
+        logger.error("データベース接続エラー: %s", e)
         raise
 
 
@@ -91,10 +102,10 @@ def test_connection() -> bool:
         version = cur.fetchone()
         cur.close()
         conn.close()
-        print(f"✅ データベース接続成功: PostgreSQL {version[0]}")
+        logger.info("データベース接続成功: PostgreSQL %s", version[0])
         return True
     except Exception as e:
-        print(f"❌ データベース接続失敗: {e}")
+        logger.error("データベース接続失敗: %s", e)
         return False
 
 
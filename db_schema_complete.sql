@@ -263,17 +263,40 @@ CREATE TABLE IF NOT EXISTS user_interactions (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
--- ユーザーインタラクションサマリー（ビュー）
-CREATE OR REPLACE VIEW user_interaction_summary AS
+-- ユーザーインタラクションサマリー（services/interaction_service.py が取り込み時に差分を加算）
+-- 旧版のビューからの移行
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_views WHERE viewname = 'user_interaction_summary') THEN
+        DROP VIEW user_interaction_summary;
+    END IF;
+END $$;
+
+CREATE TABLE IF NOT EXISTS user_interaction_summary (
+    user_id INTEGER NOT NULL REFERENCES personal_date(user_id) ON DELETE CASCADE,
+    job_id UUID NOT NULL REFERENCES company_profile(id) ON DELETE CASCADE,
+    view_count INTEGER NOT NULL DEFAULT 0,
+    click_count INTEGER NOT NULL DEFAULT 0,
+    favorite_count INTEGER NOT NULL DEFAULT 0,
+    apply_count INTEGER NOT NULL DEFAULT 0,
+    last_interaction TIMESTAMP,
+    PRIMARY KEY (user_id, job_id)
+);
+
+-- 移行時のみ既存の行動履歴から作成（空でなければ何もしない）
+INSERT INTO user_interaction_summary
+    (user_id, job_id, view_count, click_count, favorite_count, apply_count, last_interaction)
 SELECT 
     user_id,
     job_id,
-    COUNT(*) FILTER (WHERE interaction_type = 'view') as view_count,
-    COUNT(*) FILTER (WHERE interaction_type = 'click') as click_count,
-    COUNT(*) FILTER (WHERE interaction_type = 'favorite') as favorite_count,
-    COUNT(*) FILTER (WHERE interaction_type = 'apply') as apply_count,
-    MAX(created_at) as last_interaction
+    COUNT(*) FILTER (WHERE interaction_type = 'view'),
+    COUNT(*) FILTER (WHERE interaction_type = 'click'),
+    COUNT(*) FILTER (WHERE interaction_type = 'favorite'),
+    COUNT(*) FILTER (WHERE interaction_type = 'apply'),
+    MAX(created_at)
 FROM user_interactions
+WHERE user_id IS NOT NULL AND job_id IS NOT NULL
+  AND NOT EXISTS (SELECT 1 FROM user_interaction_summary)
 GROUP BY user_id, job_id;
 
 -- 検索履歴
@@ -286,6 +309,18 @@ CREATE TABLE IF NOT EXISTS search_history (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- 職種関連グラフ（services/job_title_graph.py で再構築）
+CREATE TABLE IF NOT EXISTS job_title_relations (
+    source_title VARCHAR(200) NOT NULL,
+    related_title VARCHAR(200) NOT NULL,
+    weight FLOAT NOT NULL,
+    cooccurrence_score FLOAT DEFAULT 0,
+    embedding_score FLOAT DEFAULT 0,
+    skill_score FLOAT DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (source_title, related_title)
+);
+
 -- ============================================
 -- 5. エンリッチメント・トレンド関連テーブル
 -- ============================================
@@ -329,6 +364,30 @@ CREATE TABLE IF NOT EXISTS global_preference_trends (
     UNIQUE(preference_key, preference_value)
 );
 
+-- ユーザー数の近似用 HyperLogLog スケッチ（services/trend_service.py が更新）
+ALTER TABLE global_preference_trends ADD COLUMN IF NOT EXISTS user_sketch BYTEA;
+
+-- 週ごとの嗜好トレンド（ログの日時の週に加算。週次スナップショットの元データ）
+CREATE TABLE IF NOT EXISTS weekly_preference_trends (
+    week_start DATE NOT NULL,                -- 週の月曜日
+    preference_key VARCHAR(100) NOT NULL,
+    preference_value TEXT NOT NULL,
+    occurrence_count INTEGER NOT NULL DEFAULT 0,
+    unique_users INTEGER NOT NULL DEFAULT 0,
+    user_sketch BYTEA,                       -- ユーザー数の近似用 HyperLogLog スケッチ
+    last_detected TIMESTAMP,
+    trend_score FLOAT NOT NULL DEFAULT 0,    -- last_detected 時点の減衰付き出現回数
+    category VARCHAR(50),
+    PRIMARY KEY (week_start, preference_key, preference_value)
+);
+
+-- 差分集計の処理済み位置（ソースごとの最終ID）
+CREATE TABLE IF NOT EXISTS aggregation_watermarks (
+    source VARCHAR(100) PRIMARY KEY,         -- trends:conversation_logs など
+    last_id BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
 -- トレンド閾値（動的質問生成用）
 CREATE TABLE IF NOT EXISTS trend_thresholds (
     id SERIAL PRIMARY KEY,
@@ -412,6 +471,26 @@ CREATE TABLE IF NOT EXISTS user_question_responses (
     answered_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- ============================================
+-- 9. 運用・コスト管理テーブル
+-- ============================================
+
+-- LLMトークン使用量（services/llm_usage_service.py が日次・セッション単位で加算）
+CREATE TABLE IF NOT EXISTS llm_usage (
+    usage_date DATE NOT NULL,
+    owner_type VARCHAR(20) NOT NULL,         -- user / company / system
+    owner_id VARCHAR(64) NOT NULL,
+    session_id VARCHAR(64) NOT NULL DEFAULT '',
+    operation VARCHAR(100) NOT NULL,         -- extract_user_intent など
+    model VARCHAR(100) NOT NULL,
+    call_count INTEGER NOT NULL DEFAULT 0,
+    prompt_tokens BIGINT NOT NULL DEFAULT 0,
+    completion_tokens BIGINT NOT NULL DEFAULT 0,
+    estimated_cost_usd NUMERIC(14, 6) NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (usage_date, owner_type, owner_id, session_id, operation, model)
+);
+
 -- ============================================
 -- インデックス作成
 -- ============================================
@@ -423,8 +502,29 @@ CREATE INDEX IF NOT EXISTS idx_company_profile_salary ON company_profile(salary_
 CREATE INDEX IF NOT EXISTS idx_company_profile_status ON company_profile(status);
 CREATE INDEX IF NOT EXISTS idx_company_profile_company_id ON company_profile(company_id);
 
+-- おすすめ求人の必須条件絞り込み用（公開中の求人のみ）
+CREATE INDEX IF NOT EXISTS idx_company_profile_active_pref_salary
+    ON company_profile(location_prefecture, salary_max) WHERE status = 'active';
+CREATE INDEX IF NOT EXISTS idx_company_profile_active_type_remote
+    ON company_profile(employment_type, remote_option, salary_max) WHERE status = 'active';
+CREATE INDEX IF NOT EXISTS idx_company_profile_active_created
+    ON company_profile(created_at DESC, id DESC) WHERE status = 'active';
+
+-- 求人一括登録（services/job_import_service.py）で企業側の管理番号が一致する求人を更新する
+ALTER TABLE company_profile ADD COLUMN IF NOT EXISTS external_id VARCHAR(100);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_company_profile_external_id
+    ON company_profile(company_id, external_id) WHERE external_id IS NOT NULL;
+
+-- キーセットページネーション用（created_at, id）
+CREATE INDEX IF NOT EXISTS idx_company_profile_company_created
+    ON company_profile(company_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_personal_date_created
+    ON personal_date(created_at DESC, user_id DESC);
+
 CREATE INDEX IF NOT EXISTS idx_user_interactions_user_job ON user_interactions(user_id, job_id);
 CREATE INDEX IF NOT EXISTS idx_user_interactions_type ON user_interactions(interaction_type);
+CREATE INDEX IF NOT EXISTS idx_user_interactions_created ON user_interactions(created_at);
+CREATE INDEX IF NOT EXISTS idx_user_interaction_summary_job ON user_interaction_summary(job_id);
 
 CREATE INDEX IF NOT EXISTS idx_conversation_logs_session ON conversation_logs(session_id);
 CREATE INDEX IF NOT EXISTS idx_conversation_logs_user ON conversation_logs(user_id);
@@ -435,9 +535,181 @@ CREATE INDEX IF NOT EXISTS idx_score_history_session ON score_history(user_id, s
 CREATE INDEX IF NOT EXISTS idx_missing_job_info_job ON missing_job_info_log(job_id);
 CREATE INDEX IF NOT EXISTS idx_missing_job_info_field ON missing_job_info_log(missing_field);
 
+-- 対応待ちの追加質問は (job_id, missing_field) ごとに1件（services/enrichment_service.py が検知数を加算）
+CREATE UNIQUE INDEX IF NOT EXISTS idx_enrichment_requests_pending
+    ON company_enrichment_requests(job_id, missing_field) WHERE status = 'pending';
+-- 企業向け一覧（優先度順のキーセットページネーション）
+CREATE INDEX IF NOT EXISTS idx_enrichment_requests_company_priority
+    ON company_enrichment_requests(company_id, status, priority_score DESC, id DESC);
+
 CREATE INDEX IF NOT EXISTS idx_global_trends_key ON global_preference_trends(preference_key);
 CREATE INDEX IF NOT EXISTS idx_global_trends_score ON global_preference_trends(trend_score DESC);
 
+CREATE INDEX IF NOT EXISTS idx_llm_usage_owner ON llm_usage(owner_type, owner_id, usage_date);
+
+-- ============================================
+-- 全文検索（pg_trgm + 2-gram tsvector）
+-- ============================================
+-- 日本語は単語区切りがないため、正規化したテキストを2文字ずつに分割して
+-- tsvector化する（services/search_service.py の JobSearchService.grams と同じ規則）
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+ALTER TABLE company_profile ADD COLUMN IF NOT EXISTS search_text TEXT;
+ALTER TABLE company_profile ADD COLUMN IF NOT EXISTS search_vector TSVECTOR;
+
+-- テキストを2-gramの配列に分割（1文字のトークンはそのまま）
+CREATE OR REPLACE FUNCTION job_search_grams(input TEXT) RETURNS TEXT[] AS $$
+DECLARE
+    token TEXT;
+    grams TEXT[] := '{}';
+    i INTEGER;
+BEGIN
+    IF input IS NULL THEN
+        RETURN grams;
+    END IF;
+
+    FOREACH token IN ARRAY regexp_split_to_array(
+        lower(normalize(input, NFKC)),
+        '[[:space:][:punct:]・、。「」『』【】〜]+'
+    ) LOOP
+        IF length(token) = 1 THEN
+            grams := grams || token;
+        ELSIF length(token) > 1 THEN
+            FOR i IN 1 .. length(token) - 1 LOOP
+                grams := grams || substr(token, i, 2);
+            END LOOP;
+        END IF;
+    END LOOP;
+
+    RETURN grams;
+END;
+$$ LANGUAGE plpgsql IMMUTABLE;
+
+-- 2-gramを位置・重み付きのtsvectorに変換（パーサーを通さず語彙素をそのまま格納）
+CREATE OR REPLACE FUNCTION job_search_vector(input TEXT, weight "char") RETURNS TSVECTOR AS $$
+    SELECT COALESCE(
+        setweight(
+            string_agg(
+                '''' || replace(replace(g.gram, '\', '\\'), '''', '''''') || ''':' || LEAST(g.pos, 16383),
+                ' '
+            )::tsvector,
+            weight
+        ),
+        ''::tsvector
+    )
+    FROM unnest(job_search_grams(input)) WITH ORDINALITY AS g(gram, pos);
+$$ LANGUAGE sql IMMUTABLE;
+
+-- 職種名(A) > スキル(B) > 業務内容(D) の重みで検索列を維持
+CREATE OR REPLACE FUNCTION company_profile_search_update() RETURNS TRIGGER AS $$
+BEGIN
+    NEW.search_text := lower(normalize(concat_ws(' ',
+        NEW.job_title,
+        array_to_string(NEW.required_skills, ' '),
+        NEW.job_description
+    ), NFKC));
+    NEW.search_vector :=
+        job_search_vector(NEW.job_title, 'A') ||
+        job_search_vector(array_to_string(NEW.required_skills, ' '), 'B') ||
+        job_search_vector(NEW.job_description, 'D');
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_company_profile_search ON company_profile;
+CREATE TRIGGER trg_company_profile_search
+    BEFORE INSERT OR UPDATE OF job_title, job_description, required_skills ON company_profile
+    FOR EACH ROW EXECUTE FUNCTION company_profile_search_update();
+
+-- 既存行のバックフィル
+UPDATE company_profile SET job_title = job_title WHERE search_vector IS NULL;
+
+CREATE INDEX IF NOT EXISTS idx_company_profile_search_vector
+    ON company_profile USING gin (search_vector);
+CREATE INDEX IF NOT EXISTS idx_company_profile_search_text_trgm
+    ON company_profile USING gin (search_text gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_company_profile_job_title_trgm
+    ON company_profile USING gin (job_title gin_trgm_ops);
+
+-- ============================================
+-- 統計ビュー（services/stats_service.py が REFRESH MATERIALIZED VIEW CONCURRENTLY で定期更新）
+-- ============================================
+-- CONCURRENTLY での更新には一意インデックスが必要
+
+-- 企業ごとの求人・スカウト統計
+CREATE MATERIALIZED VIEW IF NOT EXISTS company_stats AS
+WITH jobs AS (
+    SELECT company_id,
+           COUNT(*) AS total_jobs,
+           COUNT(*) FILTER (WHERE status = 'active') AS active_jobs,
+           COALESCE(SUM(view_count), 0) AS job_views,
+           COALESCE(SUM(apply_count), 0) AS job_applies
+    FROM company_profile
+    GROUP BY company_id
+),
+scouts AS (
+    SELECT company_id,
+           COUNT(*) AS scouts_sent,
+           COUNT(*) FILTER (WHERE sent_at >= date_trunc('month', LOCALTIMESTAMP)) AS scouts_sent_this_month,
+           COUNT(*) FILTER (WHERE read_at IS NOT NULL OR replied_at IS NOT NULL) AS scouts_read,
+           COUNT(replied_at) AS scouts_replied,
+           AVG(match_score) AS avg_scout_match_score
+    FROM scout_messages
+    GROUP BY company_id
+)
+SELECT c.company_id,
+       COALESCE(j.total_jobs, 0) AS total_jobs,
+       COALESCE(j.active_jobs, 0) AS active_jobs,
+       COALESCE(j.job_views, 0) AS job_views,
+       COALESCE(j.job_applies, 0) AS job_applies,
+       COALESCE(s.scouts_sent, 0) AS scouts_sent,
+       COALESCE(s.scouts_sent_this_month, 0) AS scouts_sent_this_month,
+       COALESCE(s.scouts_read, 0) AS scouts_read,
+       COALESCE(s.scouts_replied, 0) AS scouts_replied,
+       s.avg_scout_match_score,
+       CURRENT_TIMESTAMP AS refreshed_at
+FROM company_date c
+LEFT JOIN jobs j ON j.company_id = c.company_id
+LEFT JOIN scouts s ON s.company_id = c.company_id;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_company_stats_company ON company_stats(company_id);
+
+-- システム全体の統計（1行）
+CREATE MATERIALIZED VIEW IF NOT EXISTS system_stats AS
+SELECT 1 AS id,
+       u.total_users, u.new_users_7d,
+       (SELECT COUNT(*) FROM company_date) AS total_companies,
+       j.total_jobs, j.active_jobs,
+       cs.total_sessions, cs.sessions_7d, cs.avg_session_match_percentage,
+       s.scouts_sent, s.scouts_read, s.scouts_replied, s.avg_scout_match_score,
+       CURRENT_TIMESTAMP AS refreshed_at
+FROM (
+    SELECT COUNT(*) AS total_users,
+           COUNT(*) FILTER (WHERE created_at >= LOCALTIMESTAMP - INTERVAL '7 days') AS new_users_7d
+    FROM personal_date
+) u,
+(
+    SELECT COUNT(*) AS total_jobs,
+           COUNT(*) FILTER (WHERE status = 'active') AS active_jobs
+    FROM company_profile
+) j,
+(
+    SELECT COUNT(*) AS total_sessions,
+           COUNT(*) FILTER (WHERE started_at >= LOCALTIMESTAMP - INTERVAL '7 days') AS sessions_7d,
+           AVG(final_match_percentage) AS avg_session_match_percentage
+    FROM conversation_sessions
+) cs,
+(
+    SELECT COUNT(*) AS scouts_sent,
+           COUNT(*) FILTER (WHERE read_at IS NOT NULL OR replied_at IS NOT NULL) AS scouts_read,
+           COUNT(replied_at) AS scouts_replied,
+           AVG(match_score) AS avg_scout_match_score
+    FROM scout_messages
+) s;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_system_stats_id ON system_stats(id);
+
 -- ============================================
 -- サンプルデータ挿入（トレンド閾値）
 -- ============================================
@@ -458,9 +730,15 @@ COMMENT ON TABLE company_date IS '企業基本情報';
 COMMENT ON TABLE company_profile IS '求人情報（3層構造）';
 COMMENT ON TABLE conversation_logs IS '会話ログ（メイン）';
 COMMENT ON TABLE user_interactions IS 'ユーザー行動追跡';
+COMMENT ON TABLE user_interaction_summary IS 'ユーザー×求人ごとの行動回数（取り込み時に加算）';
 COMMENT ON TABLE missing_job_info_log IS '不足情報検知ログ';
 COMMENT ON TABLE company_enrichment_requests IS '企業への追加質問リクエスト';
 COMMENT ON TABLE global_preference_trends IS 'グローバル嗜好トレンド分析';
+COMMENT ON TABLE weekly_preference_trends IS '週ごとの嗜好トレンド（週次スナップショットの元データ）';
+COMMENT ON TABLE aggregation_watermarks IS '差分集計の処理済み位置';
+COMMENT ON TABLE llm_usage IS 'LLMトークン使用量・推定コスト';
+COMMENT ON MATERIALIZED VIEW company_stats IS '企業ごとの求人・スカウト統計（定期更新）';
+COMMENT ON MATERIALIZED VIEW system_stats IS 'システム全体の統計（定期更新）';
 
 -- ============================================
 -- 完了メッセージ
@@ -0,0 +1,12 @@
+"""
+gunicorn 設定
+
+Prometheus の multiprocess モードで、終了したワーカーのメトリクスファイルを片付ける。
+"""
+
+from prometheus_client import multiprocess
+
+
+def child_exit(server, worker):
+    """ワーカー終了時に、そのワーカーのメトリクスを multiprocess の集計に反映"""
+    multiprocess.mark_process_dead(worker.pid)
@@ -3,25 +3,46 @@ FastAPI Job Matching System - Main Application
 """
 
 from fastapi import FastAPI, Request, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, HTMLResponse
+from fastapi.responses import JSONResponse, HTMLResponse, RedirectResponse, Response
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from psycopg2.extras import RealDictCursor
 from datetime import datetime
 from contextlib import asynccontextmanager
+import logging
 import os
+import uuid
 from dotenv import load_dotenv
 
 # 環境変数読み込み
 load_dotenv()
 
+# ログ設定（標準出力への書き込みは別スレッドで行う）
+from utils.logging_config import configure_logging, shutdown_logging
+configure_logging()
+logger = logging.getLogger(__name__)
+
 # 設定のインポート
 from config.database import get_db_conn
+from services.auth_service import get_request_principal, resolve_principal
+from services.enrichment_service import EnrichmentService
+from services.interaction_service import InteractionService
+from services.llm_usage_service import LLMUsageService, set_usage_scope
+from services.preference_service import PreferenceService
+from services.stats_service import StatsService
+from services.trend_service import TrendService
+from services.turn_log_service import TurnLogService
+from utils.metrics import MetricsMiddleware, render_metrics
+from utils.profiler import ProfilingMiddleware
+from utils.responses import ORJSONResponse
+from utils.tracing import TracingMiddleware
 
 # APIルーターのインポート
 from api.user_api import router as user_router
 from api.company_api import router as company_router
+from api.admin_api import router as admin_router
 
 
 # Lifespanイベントハンドラー
@@ -29,27 +50,42 @@ from api.company_api import router as company_router
 async def lifespan(app: FastAPI):
     """アプリケーションのライフサイクル管理"""
     # 起動時処理
-    print("=" * 60)
-    print("🚀 FastAPI Job Matching System Starting...")
-    print("=" * 60)
+    logger.info("FastAPI Job Matching System starting")
     
     # データベース接続テスト
     from config.database import test_connection
     if test_connection():
-        print("✅ データベース接続確認: 成功")
+        logger.info("データベース接続確認: 成功")
     else:
-        print("⚠️  データベース接続確認: 失敗")
+        logger.warning("データベース接続確認: 失敗")
+    
+    # LLM使用量・行動イベント・不足情報・ターン記録の定期書き込み
+    LLMUsageService.start_flusher()
+    InteractionService.start_flusher()
+    EnrichmentService.start_flusher()
+    TurnLogService.start_flusher()
     
-    print(f"📚 API Documentation: http://localhost:8000/docs")
-    print(f"📖 ReDoc: http://localhost:8000/redoc")
-    print("=" * 60)
+    # 嗜好トレンドの差分集計
+    TrendService.start_aggregator()
+    
+    # 統計ビューの定期更新
+    StatsService.start_refresher()
     
     yield
     
     # シャットダウン時処理
-    print("\n" + "=" * 60)
-    print("🛑 FastAPI Job Matching System Shutting down...")
-    print("=" * 60)
+    TrendService.stop_aggregator()
+    StatsService.stop_refresher()
+    await LLMUsageService.stop_flusher()
+    await InteractionService.stop_flusher()
+    await EnrichmentService.stop_flusher()
+    await TurnLogService.stop_flusher()
+    
+    from services.auth_service import shutdown_auth_executor
+    shutdown_auth_executor()
+    
+    logger.info("FastAPI Job Matching System shutting down")
+    shutdown_logging()
 
 
 # アプリケーション初期化
@@ -59,6 +95,7 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
@@ -78,11 +115,30 @@ app.add_middleware(
 )
 
 
+# 認証主体の解決（Cookie / Authorizationヘッダーのトークンを1リクエストにつき1回だけ検証）
+@app.middleware("http")
+async def principal_middleware(request: Request, call_next):
+    """認証主体を request.state.principal に設定"""
+    if not request.url.path.startswith("/static"):
+        principal = resolve_principal(request)
+        if principal is not None:
+            # LLM使用量の既定の紐づけ先（チャットAPIではセッションIDも付ける）
+            set_usage_scope(principal.type, principal.subject)
+    return await call_next(request)
+
+
+# リクエストごとのレイテンシ内訳（Server-Timing ヘッダー＋構造化ログ）
+# 最後に追加したミドルウェアが最も外側になるため、他のミドルウェアの処理時間も含めて計測される
+app.add_middleware(ProfilingMiddleware)
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(TracingMiddleware)
+
+
 # グローバル例外ハンドラー
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
     """グローバル例外ハンドラー"""
-    print(f"❌ エラー発生: {exc}")
+    logger.exception("未処理の例外", exc_info=exc)
     return JSONResponse(
         status_code=500,
         content={
@@ -95,6 +151,7 @@ async def global_exception_handler(request: Request, exc: Exception):
 # ルーター登録
 app.include_router(user_router)
 app.include_router(company_router)
+app.include_router(admin_router)
 
 
 # HTMLページ配信エンドポイント
@@ -113,7 +170,7 @@ async def login_page(request: Request):
 @app.post("/login", response_class=HTMLResponse)
 async def login_submit(request: Request):
     """ユーザーログインフォーム処理"""
-    from services.auth_service import verify_password, create_access_token
+    from services.auth_service import authenticate_password, create_access_token
     
     # フォームデータ取得
     form_data = await request.form()
@@ -134,7 +191,7 @@ async def login_submit(request: Request):
     cur.close()
     conn.close()
     
-    if not user or not verify_password(password, user['password']):
+    if not user or not await authenticate_password(password, user['password'], "personal_date", user['user_id']):
         return templates.TemplateResponse("login.html", {
             "request": request,
             "error": "ユーザー名/メールアドレスまたはパスワードが正しくありません"
@@ -159,7 +216,7 @@ async def register_step1(request: Request):
 @app.post("/step1", response_class=HTMLResponse)
 async def register_step1_submit(request: Request):
     """ユーザー登録 Step1 フォーム処理"""
-    from services.auth_service import get_password_hash, create_access_token
+    from services.auth_service import get_password_hash_async, create_access_token
     
     # フォームデータ取得
     form_data = await request.form()
@@ -170,13 +227,6 @@ async def register_step1_submit(request: Request):
     phone_number = form_data.get("phone_number")
     address = form_data.get("address")
     
-    print("\n" + "="*60)
-    print("📝 Step1フォーム送信:")
-    print(f"   名前: {name}")
-    print(f"   メール: {email}")
-    print(f"   電話: {phone_number}")
-    print("="*60)
-    
     conn = None
     cur = None
     
@@ -185,13 +235,11 @@ async def register_step1_submit(request: Request):
         cur = conn.cursor(cursor_factory=RealDictCursor)
         
         # メールアドレス重複チェック
-        print("🔍 メールアドレス重複チェック開始...")
         cur.execute("SELECT user_id FROM personal_date WHERE email = %s", (email,))
         existing_user = cur.fetchone()
         
         if existing_user:
-            print(f"⚠️  メールアドレス重複: {email}")
-            print("="*60 + "\n")
+            logger.info("Step1: メールアドレス重複")
             cur.close()
             conn.close()
             return templates.TemplateResponse("form_step1.html", {
@@ -199,19 +247,13 @@ async def register_step1_submit(request: Request):
                 "error": "このメールアドレスは既に登録されています"
             })
         
-        print("✅ メールアドレスチェック: OK")
-        
         # ユーザー作成
-        print("🔐 パスワードハッシュ化開始...")
-        hashed_password = get_password_hash(password)
-        print(f"✅ パスワードハッシュ化完了: {hashed_password[:30]}...")
+        hashed_password = await get_password_hash_async(password)
         
         # user_idを生成（UUID形式）
         import uuid
         user_id = str(uuid.uuid4())
-        print(f"🆔 user_id生成: {user_id}")
         
-        print("💾 データベース挿入開始...")
         cur.execute("""
             INSERT INTO personal_date 
             (user_id, name, email, password, phone, created_at, updated_at)
@@ -229,21 +271,16 @@ async def register_step1_submit(request: Request):
         
         result = cur.fetchone()
         user_id = result['user_id']
-        print(f"✅ ユーザー作成成功: user_id={user_id}")
-        
         conn.commit()
-        print("✅ データベースコミット完了")
+        logger.info("ユーザー作成", extra={"user_id": user_id})
         
         cur.close()
         conn.close()
         
         # トークン生成してStep2へ
-        print("🎫 トークン生成開始...")
         access_token = create_access_token(data={"sub": str(user_id), "type": "user"})
-        print(f"✅ トークン生成完了: {access_token[:30]}...")
         
         from fastapi.responses import RedirectResponse
-        print("🔄 Step2へリダイレクト準備...")
         response = RedirectResponse(url="/step2", status_code=303)
         response.set_cookie(
             key="access_token",
@@ -253,23 +290,14 @@ async def register_step1_submit(request: Request):
             samesite="lax",
             path="/"
         )
-        print(f"🍪 Cookie設定完了: access_token=Bearer {access_token[:20]}...")
-        print("✅ リダイレクト準備完了")
-        print("="*60 + "\n")
         return response
         
     except Exception as e:
-        print(f"\n❌ エラー発生: {str(e)}")
-        print("エラータイプ:", type(e).__name__)
-        import traceback
-        print("トレースバック:")
-        traceback.print_exc()
-        print("="*60 + "\n")
+        logger.exception("Step1 登録エラー")
         
         if conn:
             try:
                 conn.rollback()
-                print("✅ ロールバック完了")
             except:
                 pass
         
@@ -301,30 +329,12 @@ async def register_step2(request: Request):
 @app.post("/step2", response_class=HTMLResponse)
 async def register_step2_submit(request: Request):
     """ユーザー登録 Step2 フォーム処理"""
-    from services.auth_service import decode_access_token
-    
-    print("\n" + "="*60)
-    print("📝 Step2フォーム送信:")
-    
-    # Cookieからトークン取得
-    token = request.cookies.get("access_token")
-    if not token:
-        print("⚠️ トークンなし: Step1へリダイレクト")
-        print("="*60 + "\n")
-        from fastapi.responses import RedirectResponse
+    principal = get_request_principal(request, "user")
+    if principal is None:
         return RedirectResponse(url="/step1", status_code=303)
     
-    token = token.replace("Bearer ", "")
-    
-    try:
-        payload = decode_access_token(token)
-        user_id = str(payload.get("sub"))  # UUIDなので文字列として取得
-        print(f"✅ トークン検証成功: user_id={user_id}")
-    except Exception as e:
-        print(f"❌ トークン検証失敗: {e}")
-        print("="*60 + "\n")
-        from fastapi.responses import RedirectResponse
-        return RedirectResponse(url="/step1", status_code=303)
+    user_id = principal.subject
+    token = request.cookies.get("access_token", "").replace("Bearer ", "")
     
     # フォームデータ取得
     form_data = await request.form()
@@ -332,16 +342,11 @@ async def register_step2_submit(request: Request):
     location_prefecture = form_data.get("location_prefecture")
     salary_min = form_data.get("salary_min")
     
-    print(f"   職種: {job_title}")
-    print(f"   勤務地: {location_prefecture}")
-    print(f"   希望年収: {salary_min}")
-    
     conn = get_db_conn()
     cur = conn.cursor()
     
     try:
         # user_preferences_profileに保存
-        print("💾 プロフィール保存開始...")
         cur.execute("""
             INSERT INTO user_preferences_profile
             (user_id, job_title, location_prefecture, salary_min, created_at, updated_at)
@@ -363,11 +368,8 @@ async def register_step2_submit(request: Request):
         conn.commit()
         cur.close()
         conn.close()
-        print("✅ プロフィール保存完了")
-        
-        # チャットページへリダイレクト
-        from fastapi.responses import RedirectResponse
-        print("🔄 チャットページへリダイレクト...")
+        PreferenceService.invalidate(user_id)
+        logger.info("Step2: 希望条件を保存", extra={"user_id": user_id})
         
         # リダイレクト時にCookieを再設定（既存トークンを保持）
         response = RedirectResponse(url="/chat", status_code=303)
@@ -379,15 +381,10 @@ async def register_step2_submit(request: Request):
             samesite="lax",
             path="/"
         )
-        print(f"🍪 Cookie再設定完了: access_token=Bearer {token[:20]}...")
-        print("="*60 + "\n")
         return response
         
     except Exception as e:
-        print(f"❌ エラー発生: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        print("="*60 + "\n")
+        logger.exception("Step2 保存エラー")
         
         if conn:
             conn.rollback()
@@ -402,22 +399,11 @@ async def register_step2_submit(request: Request):
 @app.get("/profile", response_class=HTMLResponse)
 async def profile_page(request: Request):
     """プロフィールページ"""
-    from services.auth_service import decode_access_token
-    
-    # Cookieからトークン取得
-    token = request.cookies.get("access_token")
-    if not token:
-        from fastapi.responses import RedirectResponse
+    principal = get_request_principal(request, "user")
+    if principal is None:
         return RedirectResponse(url="/login", status_code=303)
     
-    token = token.replace("Bearer ", "")
-    
-    try:
-        payload = decode_access_token(token)
-        user_id = int(payload.get("sub"))
-    except:
-        from fastapi.responses import RedirectResponse
-        return RedirectResponse(url="/login", status_code=303)
+    user_id = principal.subject
     
     # ユーザー情報取得
     conn = get_db_conn()
@@ -435,7 +421,6 @@ async def profile_page(request: Request):
     conn.close()
     
     if not user_data:
-        from fastapi.responses import RedirectResponse
         return RedirectResponse(url="/login", status_code=303)
     
     return templates.TemplateResponse("profile.html", {
@@ -451,34 +436,11 @@ async def profile_page(request: Request):
 @app.get("/chat", response_class=HTMLResponse)
 async def chat_page(request: Request):
     """チャットページ（認証必須）"""
-    from services.auth_service import decode_access_token
-    
-    # Cookieからトークンを取得
-    token = request.cookies.get("access_token")
-    
-    if not token:
-        print("⚠️ /chat: トークンがありません - ログインページへリダイレクト")
+    principal = get_request_principal(request, "user")
+    if principal is None:
         return RedirectResponse(url="/login", status_code=303)
     
-    # "Bearer "プレフィックスを除去
-    if token.startswith("Bearer "):
-        token = token[7:]
-    
-    try:
-        # トークンを検証
-        payload = decode_access_token(token)
-        user_id = payload.get("sub")
-        
-        if not user_id:
-            print("⚠️ /chat: トークンにuser_idがありません")
-            return RedirectResponse(url="/login", status_code=303)
-        
-        print(f"✅ /chat: 認証成功 user_id={user_id}")
-        return templates.TemplateResponse("chat.html", {"request": request})
-        
-    except Exception as e:
-        print(f"❌ /chat: トークン検証エラー: {e}")
-        return RedirectResponse(url="/login", status_code=303)
+    return templates.TemplateResponse("chat.html", {"request": request})
 
 
 @app.get("/company/login", response_class=HTMLResponse)
@@ -490,7 +452,7 @@ async def company_login_page(request: Request):
 @app.post("/company/login", response_class=HTMLResponse)
 async def company_login_submit(request: Request):
     """企業ログインフォーム処理"""
-    from services.auth_service import verify_password, create_access_token
+    from services.auth_service import authenticate_password, create_access_token
     
     # フォームデータ取得
     form_data = await request.form()
@@ -511,7 +473,7 @@ async def company_login_submit(request: Request):
     cur.close()
     conn.close()
     
-    if not company or not verify_password(password, company['password']):
+    if not company or not await authenticate_password(password, company['password'], "company_date", company['company_id']):
         return templates.TemplateResponse("company_login.html", {
             "request": request,
             "error": "メールアドレスまたはパスワードが正しくありません"
@@ -536,7 +498,7 @@ async def company_register_page(request: Request):
 @app.post("/company/register", response_class=HTMLResponse)
 async def company_register_submit(request: Request):
     """企業登録フォーム処理"""
-    from services.auth_service import get_password_hash, create_access_token
+    from services.auth_service import get_password_hash_async, create_access_token
     
     # フォームデータ取得
     form_data = await request.form()
@@ -544,8 +506,6 @@ async def company_register_submit(request: Request):
     email = form_data.get("email")
     password = form_data.get("password")
     
-    print(f"🔍 企業登録試行: {company_name}, {email}")
-    
     conn = get_db_conn()
     cur = conn.cursor(cursor_factory=RealDictCursor)
     
@@ -554,7 +514,7 @@ async def company_register_submit(request: Request):
         cur.execute("SELECT company_id FROM company_date WHERE email = %s", (email,))
         existing = cur.fetchone()
         if existing:
-            print(f"⚠️ メール重複: {email}")
+            logger.info("企業登録: メールアドレス重複")
             cur.close()
             conn.close()
             return templates.TemplateResponse("company_register.html", {
@@ -565,9 +525,8 @@ async def company_register_submit(request: Request):
         # 企業作成
         import uuid
         company_id = str(uuid.uuid4())
-        print(f"🏢 company_id生成: {company_id}")
         
-        hashed_password = get_password_hash(password)
+        hashed_password = await get_password_hash_async(password)
         
         cur.execute("""
             INSERT INTO company_date 
@@ -590,26 +549,20 @@ async def company_register_submit(request: Request):
         cur.close()
         conn.close()
         
-        print(f"✅ 企業登録成功: company_id={company_id}")
+        logger.info("企業登録", extra={"company_id": company_id})
         
         # トークン生成
         access_token = create_access_token(data={"sub": company_id, "type": "company"})
         
-        print(f"🔑 トークン生成: {access_token[:20]}...")
-        
         # ダッシュボードにリダイレクト
         from fastapi.responses import RedirectResponse
         response = RedirectResponse(url="/company/dashboard", status_code=303)
         response.set_cookie(key="access_token", value=f"Bearer {access_token}", httponly=True)
         
-        print(f"↪️ リダイレクト: /company/dashboard")
-        
         return response
         
     except Exception as e:
-        print(f"❌ エラー発生: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("企業登録エラー")
         
         if conn:
             conn.rollback()
@@ -624,40 +577,16 @@ async def company_register_submit(request: Request):
 @app.get("/company/dashboard", response_class=HTMLResponse)
 async def company_dashboard(request: Request):
     """企業ダッシュボード"""
-    from services.auth_service import decode_access_token
-    
-    # Cookieからトークン取得
-    token = request.cookies.get("access_token")
-    if not token:
-        from fastapi.responses import RedirectResponse
+    principal = get_request_principal(request, "company")
+    if principal is None:
         return RedirectResponse(url="/company/login", status_code=303)
     
-    token = token.replace("Bearer ", "")
+    company_id = principal.subject
     
-    try:
-        payload = decode_access_token(token)
-        company_id = payload.get("sub")
-    except:
-        from fastapi.responses import RedirectResponse
-        return RedirectResponse(url="/company/login", status_code=303)
-    
-    # 企業情報取得
     conn = get_db_conn()
     cur = conn.cursor(cursor_factory=RealDictCursor)
     
-    cur.execute("""
-        SELECT * FROM company_date WHERE company_id = %s
-    """, (company_id,))
-    
-    company = cur.fetchone()
-    
-    if not company:
-        cur.close()
-        conn.close()
-        from fastapi.responses import RedirectResponse
-        return RedirectResponse(url="/company/login", status_code=303)
-    
-    # 求人数取得
+    # 求人数は登録直後に反映されるよう自社分だけその場で数える（company_id のインデックスで絞れる）
     cur.execute("""
         SELECT COUNT(*) as count FROM company_profile 
         WHERE company_id = %s AND status = 'active'
@@ -667,15 +596,18 @@ async def company_dashboard(request: Request):
     cur.close()
     conn.close()
     
+    # スカウトの件数・返信率は統計ビュー（定期更新）から読む
+    stats = await run_in_threadpool(StatsService.get_company_stats, company_id)
+    
     return templates.TemplateResponse("company_dashboard.html", {
         "request": request,
         "company": {
-            "company_name": company.get("company_name", ""),
-            "email": company.get("email", "")
+            "company_name": principal.name or "",
+            "email": principal.email or ""
         },
         "job_count": job_count,
-        "scout_count": 0,
-        "reply_rate": 0.0
+        "scout_count": stats["scouts_sent_this_month"],
+        "reply_rate": stats["scout_reply_rate"]
     })
 
 
@@ -686,12 +618,9 @@ async def company_dashboard(request: Request):
 @app.get("/scout/ai-search/setup", response_class=HTMLResponse)
 async def scout_setup(request: Request):
     """AIスカウト設定ページ"""
-    from services.auth_service import decode_access_token
-    
     # 認証確認
-    token = request.cookies.get("access_token")
-    if not token:
-        from fastapi.responses import RedirectResponse
+    principal = get_request_principal(request, "company")
+    if principal is None:
         return RedirectResponse(url="/company/login", status_code=303)
     
     return templates.TemplateResponse("scout_ai_setup.html", {"request": request})
@@ -700,22 +629,12 @@ async def scout_setup(request: Request):
 @app.post("/scout/ai-search/setup", response_class=HTMLResponse)
 async def scout_setup_submit(request: Request):
     """AIスカウト設定フォーム処理"""
-    from services.auth_service import decode_access_token
-    
     # 認証確認
-    token = request.cookies.get("access_token")
-    if not token:
-        from fastapi.responses import RedirectResponse
+    principal = get_request_principal(request, "company")
+    if principal is None:
         return RedirectResponse(url="/company/login", status_code=303)
     
-    token = token.replace("Bearer ", "")
-    
-    try:
-        payload = decode_access_token(token)
-        company_id = payload.get("sub")
-    except:
-        from fastapi.responses import RedirectResponse
-        return RedirectResponse(url="/company/login", status_code=303)
+    company_id = principal.subject
     
     # フォームデータ取得
     form_data = await request.form()
@@ -724,7 +643,6 @@ async def scout_setup_submit(request: Request):
     salary_min = form_data.get("salary_min")
     
     # 検索条件をクエリパラメータとしてAI検索ページに渡す
-    from fastapi.responses import RedirectResponse
     from urllib.parse import urlencode
     
     params = urlencode({
@@ -739,12 +657,9 @@ async def scout_setup_submit(request: Request):
 @app.get("/scout/ai-search", response_class=HTMLResponse)
 async def scout_search(request: Request):
     """AIスカウト検索ページ"""
-    from services.auth_service import decode_access_token
-    
     # 認証確認
-    token = request.cookies.get("access_token")
-    if not token:
-        from fastapi.responses import RedirectResponse
+    principal = get_request_principal(request, "company")
+    if principal is None:
         return RedirectResponse(url="/company/login", status_code=303)
     
     # クエリパラメータから検索条件を取得
@@ -763,22 +678,15 @@ async def scout_search(request: Request):
 @app.post("/api/scout/chat")
 async def scout_chat_api(request: Request):
     """スカウトチャットAPI（OpenAI統合版）"""
-    from services.auth_service import decode_access_token
     from utils.ai_utils import generate_scout_question
     
     try:
         # 認証確認
-        token = request.cookies.get("access_token")
-        if not token:
+        principal = get_request_principal(request, "company")
+        if principal is None:
             raise HTTPException(status_code=401, detail="認証が必要です")
         
-        token = token.replace("Bearer ", "")
-        
-        try:
-            payload = decode_access_token(token)
-            company_id = payload.get("sub")
-        except:
-            raise HTTPException(status_code=401, detail="認証が必要です")
+        company_id = principal.subject
         
         # リクエストボディ取得
         data = await request.json()
@@ -787,13 +695,17 @@ async def scout_chat_api(request: Request):
         
         # contextが辞書でない場合は空の辞書にする
         if not isinstance(context, dict):
-            print(f"⚠️ contextが辞書ではありません: {type(context)}")
+            logger.warning("スカウトチャット: contextが辞書ではありません", extra={"context_type": type(context).__name__})
             context = {}
         
         # ターン数をカウント
         turn_count = context.get("turn_count", 0) + 1
         
-        print(f"💬 スカウトチャット: ターン{turn_count}, メッセージ: {user_message[:50]}...")
+        # スカウトセッション（LLM使用量の集計単位）
+        scout_session_id = context.get("session_id") or uuid.uuid4().hex
+        set_usage_scope("company", company_id, scout_session_id)
+        
+        logger.debug("スカウトチャット開始", extra={"turn": turn_count, "session_id": scout_session_id})
         
         # 基本条件を取得（初回設定時に保存されている想定）
         base_conditions = {
@@ -813,9 +725,8 @@ async def scout_chat_api(request: Request):
                 conversation_history=conversation_history,
                 turn_count=turn_count
             )
-            print(f"✅ OpenAI応答: {ai_response[:100]}...")
         except Exception as e:
-            print(f"❌ OpenAI APIエラー: {str(e)}")
+            logger.warning("スカウト質問生成エラー: %s", e)
             # フォールバック: 固定の質問
             if turn_count == 1:
                 ai_response = "ありがとうございます。リモートワークは必須ですか？それとも柔軟に対応可能ですか？"
@@ -828,6 +739,7 @@ async def scout_chat_api(request: Request):
         
         # コンテキスト更新
         updated_context = {
+            "session_id": scout_session_id,
             "turn_count": turn_count,
             "top_score": 0,  # 後で更新
             "messages": conversation_history + [
@@ -899,12 +811,10 @@ async def scout_chat_api(request: Request):
                     # 上位5件のみ
                     candidates = candidates[:5]
                 
-                print(f"📊 候補者検索: {len(candidates)}名見つかりました（最高スコア: {top_score}）")
+                logger.debug("候補者検索", extra={"candidates": len(candidates), "top_score": top_score})
                 
-            except Exception as e:
-                print(f"⚠️ 候補者検索エラー: {str(e)}")
-                import traceback
-                traceback.print_exc()
+            except Exception:
+                logger.exception("候補者検索エラー")
                 candidates = []
             finally:
                 cur.close()
@@ -913,8 +823,6 @@ async def scout_chat_api(request: Request):
         # コンテキストを更新（top_scoreも含める）
         updated_context["top_score"] = top_score
         
-        print(f"✅ 応答生成完了: ターン{turn_count}, 候補者数: {len(candidates)}, 最高スコア: {top_score}")
-        
         return JSONResponse({
             "response": ai_response,
             "context": updated_context,
@@ -927,9 +835,7 @@ async def scout_chat_api(request: Request):
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ スカウトチャットエラー: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("スカウトチャットエラー")
         
         return JSONResponse(
             status_code=500,
@@ -948,22 +854,12 @@ async def scout_chat_api(request: Request):
 @app.get("/scout/history", response_class=HTMLResponse)
 async def scout_history(request: Request):
     """スカウト履歴ページ"""
-    from services.auth_service import decode_access_token
-    
     # 認証確認
-    token = request.cookies.get("access_token")
-    if not token:
-        from fastapi.responses import RedirectResponse
+    principal = get_request_principal(request, "company")
+    if principal is None:
         return RedirectResponse(url="/company/login", status_code=303)
     
-    token = token.replace("Bearer ", "")
-    
-    try:
-        payload = decode_access_token(token)
-        company_id = payload.get("sub")
-    except:
-        from fastapi.responses import RedirectResponse
-        return RedirectResponse(url="/company/login", status_code=303)
+    company_id = principal.subject
     
     # スカウト履歴取得（空の場合）
     scout_list = []
@@ -977,12 +873,9 @@ async def scout_history(request: Request):
 @app.get("/candidate/{user_id}", response_class=HTMLResponse)
 async def candidate_detail(request: Request, user_id: int):
     """候補者詳細ページ"""
-    from services.auth_service import decode_access_token
-    
     # 認証確認
-    token = request.cookies.get("access_token")
-    if not token:
-        from fastapi.responses import RedirectResponse
+    principal = get_request_principal(request, "company")
+    if principal is None:
         return RedirectResponse(url="/company/login", status_code=303)
     
     conn = get_db_conn()
@@ -1020,52 +913,65 @@ async def candidate_detail(request: Request, user_id: int):
 @app.get("/job/list", response_class=HTMLResponse)
 async def job_list(request: Request):
     """求人一覧ページ"""
-    from services.auth_service import decode_access_token
-    
     # 認証確認
-    token = request.cookies.get("access_token")
-    if not token:
-        from fastapi.responses import RedirectResponse
+    principal = get_request_principal(request, "company")
+    if principal is None:
         return RedirectResponse(url="/company/login", status_code=303)
     
-    token = token.replace("Bearer ", "")
+    company_id = principal.subject
     
-    try:
-        payload = decode_access_token(token)
-        company_id = payload.get("sub")
-    except:
-        from fastapi.responses import RedirectResponse
-        return RedirectResponse(url="/company/login", status_code=303)
+    from utils.pagination import DEFAULT_PAGE_SIZE, decode_cursor, split_page
+    
+    # 求人一覧取得（created_at, id のキーセットで1ページ分のみ）
+    query = """
+        SELECT cp.id, cp.job_title, cp.location_prefecture, cp.employment_type,
+               cp.salary_min, cp.salary_max, cp.status, cp.created_at,
+               cd.company_name
+        FROM company_profile cp
+        LEFT JOIN company_date cd ON cp.company_id = cd.company_id
+        WHERE cp.company_id = %s
+    """
+    params = [company_id]
+    
+    cursor = request.query_params.get("cursor")
+    if cursor:
+        try:
+            params.extend(decode_cursor(cursor))
+            query += " AND (cp.created_at, cp.id) < (%s, %s)"
+        except ValueError:
+            params = [company_id]
+    
+    query += " ORDER BY cp.created_at DESC, cp.id DESC LIMIT %s"
+    params.append(DEFAULT_PAGE_SIZE + 1)
     
-    # 求人一覧取得
     conn = get_db_conn()
     cur = conn.cursor(cursor_factory=RealDictCursor)
     
-    cur.execute("""
-        SELECT * FROM company_profile 
-        WHERE company_id = %s 
-        ORDER BY created_at DESC
-    """, (company_id,))
+    cur.execute(query, tuple(params))
+    rows = cur.fetchall()
+    
+    cur.execute("SELECT COUNT(*) AS count FROM company_profile WHERE company_id = %s", (company_id,))
+    job_count = cur.fetchone()['count']
     
-    jobs = cur.fetchall()
     cur.close()
     conn.close()
     
+    jobs, next_cursor = split_page(rows, DEFAULT_PAGE_SIZE, key=lambda r: (r['created_at'], r['id']))
+    
     return templates.TemplateResponse("job_list.html", {
         "request": request,
-        "jobs": jobs
+        "jobs": jobs,
+        "job_count": job_count,
+        "next_cursor": next_cursor
     })
 
 
 @app.get("/job/new", response_class=HTMLResponse)
 async def job_new(request: Request):
     """求人登録ページ"""
-    from services.auth_service import decode_access_token
-    
     # 認証確認
-    token = request.cookies.get("access_token")
-    if not token:
-        from fastapi.responses import RedirectResponse
+    principal = get_request_principal(request, "company")
+    if principal is None:
         return RedirectResponse(url="/company/login", status_code=303)
     
     return templates.TemplateResponse("job_form.html", {"request": request})
@@ -1086,6 +992,14 @@ async def health_check():
     }
 
 
+# Prometheus メトリクス
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus のスクレイプ用エンドポイント"""
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+
 # 開発サーバー起動用
 if __name__ == "__main__":
     import uvicorn
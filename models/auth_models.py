@@ -0,0 +1,24 @@
+"""
+認証主体のデータモデル
+"""
+
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+
+
+class Principal(BaseModel):
+    """検証済みトークンの主体（ユーザーまたは企業）"""
+    subject: str  # user_id または company_id
+    type: str  # "user" / "company"
+    expires_at: datetime
+    name: Optional[str] = None  # personal_date.name / company_date.company_name
+    email: Optional[str] = None
+
+    @property
+    def is_company(self) -> bool:
+        return self.type == "company"
+
+    @property
+    def is_user(self) -> bool:
+        return self.type == "user"
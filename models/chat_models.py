@@ -18,6 +18,7 @@ class ChatSession(BaseModel):
     deep_dive_count: int = 0  # 連続深掘り回数
     conversation_history: List[Dict[str, str]] = []
     user_preferences: Dict[str, Any] = {}  # Step2の情報
+    shown_job_ids: List[str] = []  # 直近に表示した求人（不足情報の検知用）
     created_at: datetime = Field(default_factory=datetime.now)
     updated_at: datetime = Field(default_factory=datetime.now)
 
@@ -0,0 +1,91 @@
+"""
+ユーザー希望条件のデータモデル
+"""
+
+from pydantic import BaseModel
+from typing import List, Optional, Dict, Any
+from datetime import datetime
+
+
+class UserPreferenceSnapshot(BaseModel):
+    """user_preferences_profile 1行分のスナップショット"""
+    user_id: str
+    found: bool = False  # プロフィール行が存在したか
+    job_title: Optional[str] = None
+    location_prefecture: Optional[str] = None
+    location_city: Optional[str] = None
+    salary_min: Optional[int] = None
+    salary_max: Optional[int] = None
+    remote_work_preference: Optional[str] = None
+    employment_type: Optional[str] = None
+    industry_preferences: List[str] = []
+    work_hours_preference: Optional[str] = None
+    company_size_preference: Optional[str] = None
+    updated_at: Optional[datetime] = None
+
+    def to_session_preferences(self) -> Dict[str, Any]:
+        """
+        チャットセッション用の辞書に変換（Step2の情報）
+
+        Returns:
+            job_title / location / salary_min などを含む辞書（未設定項目は含まない）
+        """
+        if not self.found:
+            return {}
+
+        prefs = {
+            "job_title": self.job_title,
+            "location": self.location_prefecture,
+            "location_city": self.location_city,
+            "salary_min": self.salary_min,
+            "salary_max": self.salary_max,
+            "remote_work_preference": self.remote_work_preference,
+            "employment_type": self.employment_type,
+            "industry_preferences": self.industry_preferences or None,
+            "work_hours_preference": self.work_hours_preference,
+            "company_size_preference": self.company_size_preference,
+        }
+        return {k: v for k, v in prefs.items() if v is not None}
+
+    def required_remote_options(self) -> Optional[List[str]]:
+        """
+        リモート希望を求人の remote_option 値の許容リストに変換
+
+        Returns:
+            許容する remote_option 値のリスト（条件なしならNone）
+        """
+        pref = (self.remote_work_preference or "").strip().lower()
+        if not pref or any(x in pref for x in ["on_site", "不可", "なし", "出社"]):
+            return None
+        if pref == "full_remote" or "フル" in pref:
+            return ["full_remote"]
+        if pref == "hybrid" or any(x in pref for x in ["リモート", "在宅", "ハイブリッド"]):
+            return ["full_remote", "hybrid"]
+        return None
+
+    def to_intent(self) -> Dict[str, Any]:
+        """
+        ルールベーススコアリング用のユーザー意図形式に変換
+
+        Returns:
+            rule_based_scoring が受け取る extracted_info 形式の辞書
+        """
+        keywords = [k for k in [self.job_title, *self.industry_preferences] if k]
+        explicit = {
+            "location_prefecture": self.location_prefecture,
+            "location_city": self.location_city,
+            "remote_work": self.remote_work_preference,
+            "salary_min": self.salary_min,
+            "employment_type": self.employment_type,
+        }
+
+        return {
+            "keywords": keywords,
+            "pain_points": [],
+            "flexible_needs": [],
+            "explicit_preferences": {k: v for k, v in explicit.items() if v is not None},
+            "implicit_values": {},
+            "job_change_request": {
+                "new_job_titles": [self.job_title] if self.job_title else []
+            },
+        }
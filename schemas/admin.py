@@ -0,0 +1,52 @@
+"""
+管理者API関連のPydanticスキーマ
+"""
+
+from pydantic import BaseModel
+from typing import Any, Dict, Optional, List
+from datetime import date, datetime
+
+
+class LLMUsageEntry(BaseModel):
+    """利用者ごとのLLM使用量"""
+    owner_type: str
+    owner_id: str
+    session_id: Optional[str] = None
+    call_count: int
+    prompt_tokens: int
+    completion_tokens: int
+    estimated_cost_usd: float
+    last_used_at: Optional[datetime] = None
+
+
+class LLMUsageResponse(BaseModel):
+    """LLM使用量ランキング"""
+    days: int
+    group_by: str
+    consumers: List[LLMUsageEntry]
+
+
+class WeeklyTrendsResponse(BaseModel):
+    """週次トレンドのスナップショット"""
+    week_start: date
+    generated_at: datetime
+    trend_data: Dict[str, Any]
+
+
+class SystemStatsResponse(BaseModel):
+    """システム統計（統計ビューの値。refreshed_at 時点）"""
+    total_users: int
+    new_users_7d: int
+    total_companies: int
+    total_jobs: int
+    active_jobs: int
+    total_sessions: int
+    sessions_7d: int
+    avg_session_match_percentage: Optional[float] = None
+    scouts_sent: int
+    scouts_read: int
+    scouts_replied: int
+    scout_read_rate: float  # %
+    scout_reply_rate: float  # %
+    avg_scout_match_score: Optional[float] = None
+    refreshed_at: datetime
@@ -40,6 +40,7 @@ class ScoutSearchRequest(BaseModel):
     job_id: str
     limit: int = Field(20, ge=1, le=100)
     min_match_score: int = Field(70, ge=0, le=100)
+    cursor: Optional[str] = None  # 前ページの next_cursor
 
 
 class ScoutCandidate(BaseModel):
@@ -55,7 +56,7 @@ class ScoutSearchResponse(BaseModel):
     """スカウト検索レスポンス"""
     job_id: str
     candidates: List[ScoutCandidate]
-    total_count: int
+    next_cursor: Optional[str] = None  # 次の候補者ページ（なければNone）
 
 
 class ScoutMessageRequest(BaseModel):
@@ -78,6 +79,43 @@ class EnrichmentRequest(BaseModel):
     missing_fields: List[str]
 
 
+class CompanyEnrichmentRequestItem(BaseModel):
+    """企業への追加質問リクエスト"""
+    id: int
+    job_id: str
+    job_title: str
+    missing_field: str
+    question_text: str
+    question_type: Optional[str] = None
+    priority_score: int
+    detection_count: int
+    status: str
+    requested_at: datetime
+
+
+class CompanyEnrichmentRequestList(BaseModel):
+    """追加質問リクエスト一覧（優先度順）"""
+    requests: List[CompanyEnrichmentRequestItem]
+    limit: int
+    next_cursor: Optional[str] = None  # 次ページがなければNone
+
+
+class CompanyStatsResponse(BaseModel):
+    """企業の求人・スカウト統計（統計ビューの値。refreshed_at 時点）"""
+    total_jobs: int
+    active_jobs: int
+    job_views: int
+    job_applies: int
+    scouts_sent: int
+    scouts_sent_this_month: int
+    scouts_read: int
+    scouts_replied: int
+    scout_read_rate: float  # %
+    scout_reply_rate: float  # %
+    avg_scout_match_score: Optional[float] = None
+    refreshed_at: Optional[datetime] = None  # 統計ビューの更新前に登録した企業はNone
+
+
 class EnrichmentResponse(BaseModel):
     """エンリッチメントレスポンス"""
     request_id: str
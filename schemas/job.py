@@ -3,8 +3,9 @@
 """
 
 from pydantic import BaseModel, Field
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Literal
 from datetime import datetime
+from uuid import UUID
 
 
 class JobCreate(BaseModel):
@@ -27,6 +28,15 @@ class JobCreate(BaseModel):
     additional_questions: Optional[Dict[str, Any]] = None
 
 
+class JobImportRow(JobCreate):
+    """一括登録の1行（external_id が同じ求人は更新。文字数は company_profile の列に合わせて検証）"""
+    external_id: Optional[str] = Field(None, min_length=1, max_length=100)
+    employment_type: str = Field(..., max_length=50)
+    location_prefecture: str = Field(..., max_length=50)
+    location_city: Optional[str] = Field(None, max_length=100)
+    remote_option: Optional[str] = Field(None, max_length=50)
+
+
 class JobUpdate(BaseModel):
     """求人更新リクエスト"""
     job_title: Optional[str] = None
@@ -69,12 +79,51 @@ class JobSearchRequest(BaseModel):
     salary_min: Optional[int] = None
     remote_option: Optional[str] = None
     limit: int = Field(20, ge=1, le=100)
-    offset: int = Field(0, ge=0)
+    cursor: Optional[str] = None  # 前ページの next_cursor
 
 
 class JobSearchResponse(BaseModel):
     """求人検索レスポンス"""
-    total: int
     jobs: List[JobResponse]
-    page: int
     limit: int
+    next_cursor: Optional[str] = None  # 次ページがなければNone
+
+
+class JobListResponse(BaseModel):
+    """企業の求人一覧レスポンス"""
+    jobs: List[JobResponse]
+    limit: int
+    next_cursor: Optional[str] = None  # 次ページがなければNone
+
+
+class JobInteractionEvent(BaseModel):
+    """求人への行動イベント"""
+    job_id: UUID
+    interaction_type: Literal["view", "click", "favorite", "apply"]
+    session_id: Optional[str] = Field(None, max_length=100)
+    interaction_data: Optional[Dict[str, Any]] = None
+    occurred_at: Optional[datetime] = None  # 省略時は受信時刻
+
+
+class JobInteractionBatch(BaseModel):
+    """行動イベントの一括送信"""
+    events: List[JobInteractionEvent] = Field(..., min_length=1, max_length=100)
+
+
+class JobInteractionResponse(BaseModel):
+    """行動イベントの受付結果"""
+    accepted: int  # バッファに積めた件数（上限で捨てた分は含まない）
+
+
+class JobImportError(BaseModel):
+    """一括登録で取り込めなかった行"""
+    line: int
+    message: str
+
+
+class JobImportResponse(BaseModel):
+    """求人一括登録の結果"""
+    inserted: int
+    updated: int
+    skipped: int
+    errors: List[JobImportError]
@@ -2,17 +2,31 @@
 認証サービス
 """
 
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Any, Callable, Dict, Optional, Set
 from jose import JWTError, jwt
+import asyncio
 import bcrypt
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
+from psycopg2.extras import RealDictCursor
+import hashlib
+import hmac
+import logging
 import os
+import threading
+import time
 from dotenv import load_dotenv
 
+from config.database import get_db_conn
+from models.auth_models import Principal
+from utils.cache import TTLCache
+
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # セキュリティ設定
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-here")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
@@ -20,6 +34,43 @@ ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30")
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/user/login")
 
+# 管理者API用の共有トークン（未設定なら管理者APIは無効）
+ADMIN_API_TOKEN = os.getenv("ADMIN_API_TOKEN", "")
+
+# bcrypt設定（コストを変更すると既存ハッシュはログイン時に再ハッシュされる）
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
+# bcrypt専用スレッドプール（bcryptはGILを解放するのでスレッドで並列化できる）
+AUTH_WORKERS = int(os.getenv("AUTH_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+# 実行中＋待機中のbcrypt処理の上限（超えたら503を返して待たせない）
+AUTH_QUEUE_LIMIT = int(os.getenv("AUTH_QUEUE_LIMIT", str(AUTH_WORKERS * 8)))
+
+# パスワードを保持するテーブルと主キー列（再ハッシュ時の更新先）
+_PASSWORD_TABLES = {
+    "personal_date": "user_id",
+    "company_date": "company_id",
+}
+
+_auth_executor = ThreadPoolExecutor(max_workers=AUTH_WORKERS, thread_name_prefix="auth")
+_auth_slots = threading.BoundedSemaphore(AUTH_QUEUE_LIMIT)
+_background_tasks: Set[asyncio.Task] = set()
+
+# 検証済みトークン・主体レコードのキャッシュ
+AUTH_TOKEN_CACHE_SIZE = int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "10000"))
+AUTH_RECORD_CACHE_SIZE = int(os.getenv("AUTH_RECORD_CACHE_SIZE", "10000"))
+AUTH_RECORD_CACHE_TTL = float(os.getenv("AUTH_RECORD_CACHE_TTL_SECONDS", "60"))
+
+# 主体の種類ごとのレコード取得SQL
+_PRINCIPAL_QUERIES = {
+    "user": "SELECT name, email FROM personal_date WHERE user_id = %s",
+    "company": "SELECT company_name AS name, email FROM company_date WHERE company_id = %s",
+}
+
+_token_cache = TTLCache("auth_tokens", maxsize=AUTH_TOKEN_CACHE_SIZE, ttl=ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+_record_cache = TTLCache("auth_records", maxsize=AUTH_RECORD_CACHE_SIZE, ttl=AUTH_RECORD_CACHE_TTL)
+_UNRESOLVED = object()
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
@@ -38,7 +89,7 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
             hashed_password.encode('utf-8')
         )
     except Exception as e:
-        print(f"❌ パスワード検証エラー: {e}")
+        logger.warning("パスワード検証エラー: %s", e)
         return False
 
 
@@ -53,14 +104,143 @@ def get_password_hash(password: str) -> str:
         ハッシュ化パスワード
     """
     try:
-        salt = bcrypt.gensalt()
+        salt = bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
         hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
         return hashed.decode('utf-8')
     except Exception as e:
-        print(f"❌ パスワードハッシュ化エラー: {e}")
+        logger.error("パスワードハッシュ化エラー: %s", e)
         raise
 
 
+def needs_rehash(hashed_password: str) -> bool:
+    """
+    ハッシュのコストが現在の設定と異なるか判定
+
+    Args:
+        hashed_password: ハッシュ化パスワード（$2b$12$... 形式）
+
+    Returns:
+        再ハッシュが必要ならTrue
+    """
+    try:
+        return int(hashed_password.split("$")[2]) != BCRYPT_ROUNDS
+    except (AttributeError, IndexError, ValueError):
+        return False
+
+
+async def _run_in_auth_pool(func: Callable[..., Any], *args: Any) -> Any:
+    """
+    bcrypt処理を専用プールで実行（イベントループをブロックしない）
+
+    Raises:
+        HTTPException: プールが満杯の場合（503）
+    """
+    if not _auth_slots.acquire(blocking=False):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="ただいま混み合っています。しばらくしてから再度お試しください",
+            headers={"Retry-After": "1"},
+        )
+
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_auth_executor, func, *args)
+    finally:
+        _auth_slots.release()
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """
+    パスワード検証（非同期版）
+
+    Args:
+        plain_password: 平文パスワード
+        hashed_password: ハッシュ化パスワード
+
+    Returns:
+        一致すればTrue
+    """
+    return await _run_in_auth_pool(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """
+    パスワードをハッシュ化（非同期版）
+
+    Args:
+        password: 平文パスワード
+
+    Returns:
+        ハッシュ化パスワード
+    """
+    return await _run_in_auth_pool(get_password_hash, password)
+
+
+async def authenticate_password(
+    plain_password: str,
+    hashed_password: str,
+    table: str,
+    key_value: Any
+) -> bool:
+    """
+    ログイン時のパスワード検証（コストが古いハッシュはバックグラウンドで再ハッシュ）
+
+    Args:
+        plain_password: 平文パスワード
+        hashed_password: 保存されているハッシュ
+        table: personal_date または company_date
+        key_value: user_id / company_id
+
+    Returns:
+        一致すればTrue
+    """
+    if not await verify_password_async(plain_password, hashed_password):
+        return False
+
+    if needs_rehash(hashed_password):
+        task = asyncio.create_task(_rehash_password(plain_password, hashed_password, table, key_value))
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+
+    return True
+
+
+async def _rehash_password(plain_password: str, old_hash: str, table: str, key_value: Any) -> None:
+    """現在のコストで再ハッシュして保存（失敗してもログインには影響させない）"""
+    key_column = _PASSWORD_TABLES[table]
+    try:
+        new_hash = await get_password_hash_async(plain_password)
+    except HTTPException:
+        # 混雑時は次回ログインに回す
+        return
+
+    conn = None
+    try:
+        conn = get_db_conn()
+        cur = conn.cursor()
+        # 同時ログインで二重に更新しないよう旧ハッシュを条件にする
+        cur.execute(
+            f"UPDATE {table} SET password = %s, updated_at = CURRENT_TIMESTAMP "
+            f"WHERE {key_column} = %s AND password = %s",
+            (new_hash, key_value, old_hash)
+        )
+        conn.commit()
+        cur.close()
+        logger.info("パスワード再ハッシュ", extra={"table": table, "rounds": BCRYPT_ROUNDS})
+    except Exception as e:
+        if conn:
+            conn.rollback()
+        logger.warning("パスワード再ハッシュエラー: %s", e)
+    finally:
+        if conn:
+            conn.close()
+
+
+def shutdown_auth_executor() -> None:
+    """bcrypt用スレッドプールを停止"""
+    _auth_executor.shutdown(wait=True)
+
+
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """
@@ -103,6 +283,144 @@ def decode_access_token(token: str) -> Optional[dict]:
         return None
 
 
+def verify_token(token: str) -> Optional[dict]:
+    """
+    JWTトークンを検証（検証済みトークンはハッシュをキーに有効期限までキャッシュ）
+
+    Args:
+        token: JWTトークン（"Bearer " プレフィックスなし）
+
+    Returns:
+        デコードされたデータ（無効ならNone）
+    """
+    key = hashlib.sha256(token.encode("utf-8")).hexdigest()
+    payload = _token_cache.get(key)
+    if payload is not None:
+        return payload
+
+    payload = decode_access_token(token)
+    if payload is None:
+        return None
+
+    ttl = float(payload.get("exp", 0)) - time.time()
+    if ttl > 0:
+        _token_cache.set(key, payload, ttl=ttl)
+    return payload
+
+
+def _extract_token(request: Request) -> Optional[str]:
+    """Authorizationヘッダー、なければCookieからトークンを取り出す"""
+    authorization = request.headers.get("authorization", "")
+    if authorization.lower().startswith("bearer "):
+        return authorization[7:].strip() or None
+
+    token = request.cookies.get("access_token")
+    if token and token.startswith("Bearer "):
+        token = token[7:]
+    return token or None
+
+
+def _load_principal_record(principal_type: str, subject: str) -> Optional[Dict[str, Any]]:
+    """主体のレコード（名前・メール）を取得（LRUキャッシュ）"""
+    key = (principal_type, subject)
+    record = _record_cache.get(key)
+    if record is not None:
+        return record
+
+    conn = get_db_conn()
+    cur = conn.cursor(cursor_factory=RealDictCursor)
+    try:
+        cur.execute(_PRINCIPAL_QUERIES[principal_type], (subject,))
+        row = cur.fetchone()
+    finally:
+        cur.close()
+        conn.close()
+
+    if row is None:
+        return None
+
+    record = dict(row)
+    _record_cache.set(key, record)
+    return record
+
+
+def invalidate_principal(principal_type: str, subject: Any) -> None:
+    """
+    主体レコードのキャッシュを破棄（名前・メール変更時）
+
+    Args:
+        principal_type: "user" / "company"
+        subject: user_id / company_id
+    """
+    _record_cache.invalidate((principal_type, str(subject)))
+
+
+def resolve_principal(request: Request) -> Optional[Principal]:
+    """
+    リクエストの認証主体を解決（1リクエストにつき1回だけ解決し request.state に保持）
+
+    Args:
+        request: FastAPI Request
+
+    Returns:
+        Principal（未ログイン・トークン無効・レコードなしならNone）
+    """
+    principal = getattr(request.state, "principal", _UNRESOLVED)
+    if principal is not _UNRESOLVED:
+        return principal
+
+    principal = None
+    token = _extract_token(request)
+    payload = verify_token(token) if token else None
+
+    if payload:
+        subject = payload.get("sub")
+        principal_type = payload.get("type", "user")
+        if subject is not None and principal_type in _PRINCIPAL_QUERIES:
+            try:
+                record = _load_principal_record(principal_type, str(subject))
+            except Exception as e:
+                logger.warning("認証主体の取得エラー: %s", e)
+                record = None
+
+            if record is not None:
+                principal = Principal(
+                    subject=str(subject),
+                    type=principal_type,
+                    expires_at=datetime.utcfromtimestamp(payload.get("exp", 0)),
+                    name=record.get("name"),
+                    email=record.get("email"),
+                )
+
+    request.state.principal = principal
+    return principal
+
+
+def get_request_principal(request: Request, principal_type: str) -> Optional[Principal]:
+    """
+    指定した種類の認証主体を取得（HTMLページ用）
+
+    Args:
+        request: FastAPI Request
+        principal_type: "user" / "company"
+
+    Returns:
+        Principal（種類が異なる・未ログインならNone）
+    """
+    principal = resolve_principal(request)
+    if principal is None or principal.type != principal_type:
+        return None
+    return principal
+
+
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="認証に失敗しました",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
 async def get_current_user(token: str = Depends(oauth2_scheme)) -> str:
     """
     現在のユーザーIDを取得（依存性注入用）
@@ -116,28 +434,17 @@ async def get_current_user(token: str = Depends(oauth2_scheme)) -> str:
     Raises:
         HTTPException: 認証失敗時
     """
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="認証に失敗しました",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+    payload = verify_token(token)
     
-    payload = decode_access_token(token)
+    if payload is None or payload.get("sub") is None:
+        raise _credentials_exception()
     
-    if payload is None:
-        raise credentials_exception
-    
-    user_id: str = payload.get("sub")
-    
-    if user_id is None:
-        raise credentials_exception
-    
-    return user_id
+    return str(payload["sub"])
 
 
-async def get_current_user_from_cookie(request) -> str:
+async def get_current_user_from_cookie(request: Request) -> str:
     """
-    CookieからユーザーIDを取得（依存性注入用）
+    Cookie（またはAuthorizationヘッダー）からユーザーIDを取得（依存性注入用）
     
     Args:
         request: FastAPI Request object
@@ -148,41 +455,12 @@ async def get_current_user_from_cookie(request) -> str:
     Raises:
         HTTPException: 認証失敗時
     """
-    from fastapi import Request
-    
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="認証に失敗しました",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-    
-    # Cookieからトークンを取得
-    token = request.cookies.get("access_token")
+    principal = get_request_principal(request, "user")
     
-    if not token:
-        print("❌ /api/user/chat: Cookieにaccess_tokenがありません")
-        raise credentials_exception
-    
-    # "Bearer "プレフィックスを除去
-    if token.startswith("Bearer "):
-        token = token[7:]
-    
-    print(f"🍪 /api/user/chat: トークン取得成功: {token[:20]}...")
-    
-    payload = decode_access_token(token)
+    if principal is None:
+        raise _credentials_exception()
     
-    if payload is None:
-        print("❌ /api/user/chat: トークンのデコードに失敗")
-        raise credentials_exception
-    
-    user_id: str = payload.get("sub")
-    
-    if user_id is None:
-        print("❌ /api/user/chat: トークンにuser_idがありません")
-        raise credentials_exception
-    
-    print(f"✅ /api/user/chat: 認証成功 user_id={user_id}")
-    return user_id
+    return principal.subject
 
 
 async def get_current_company(token: str = Depends(oauth2_scheme)) -> str:
@@ -198,21 +476,33 @@ async def get_current_company(token: str = Depends(oauth2_scheme)) -> str:
     Raises:
         HTTPException: 認証失敗時
     """
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="認証に失敗しました",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+    payload = verify_token(token)
     
-    payload = decode_access_token(token)
-    
-    if payload is None:
-        raise credentials_exception
+    if payload is None or payload.get("sub") is None or payload.get("type") != "company":
+        raise _credentials_exception()
     
-    company_id: str = payload.get("sub")
-    entity_type: str = payload.get("type")
+    return str(payload["sub"])
+
+
+async def require_admin(request: Request) -> None:
+    """
+    管理者APIの認証（X-Admin-Token ヘッダーを ADMIN_API_TOKEN と照合、依存性注入用）
     
-    if company_id is None or entity_type != "company":
-        raise credentials_exception
+    Args:
+        request: FastAPI Request object
+        
+    Raises:
+        HTTPException: 管理者APIが無効、またはトークン不一致
+    """
+    if not ADMIN_API_TOKEN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="管理者APIは無効です（ADMIN_API_TOKEN が未設定）"
+        )
     
-    return company_id
\ No newline at end of file
+    token = request.headers.get("X-Admin-Token", "")
+    if not hmac.compare_digest(token.encode(), ADMIN_API_TOKEN.encode()):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="管理者権限がありません"
+        )
@@ -2,15 +2,21 @@
 チャット統合サービス - すべての機能を統合
 """
 
-from typing import Optional, List
+import logging
+from typing import Optional, List, Tuple
 from models.chat_models import (
-    ChatSession, QuestionContext, ScoringInput, 
+    ChatSession, QuestionContext, ScoringInput, ScoringResult,
     ChatTurnResult, JobRecommendation
 )
 from utils.session_manager import SessionManager
 from services.question_generator import QuestionGenerator
-from services.scoring_service import ScoringService
+from services.scoring_service import ScoringService, extract_keywords
 from services.job_recommender import JobRecommender
+from services.enrichment_service import EnrichmentService
+from services.turn_log_service import TurnLogService
+
+
+logger = logging.getLogger(__name__)
 
 
 class ChatService:
@@ -85,19 +91,18 @@ class ChatService:
         else:
             return self.start_chat(user_id)
         
-        print(f"\n{'='*60}")
-        print(f"💬 ターン {session.turn_count + 1} 開始")
-        print(f"   ユーザー: {user_message[:50]}...")
-        print(f"   現在スコア: {session.current_score}%")
-        
         # Step 1: スコアリング
         scoring_result = self._score_conversation(session, user_message)
-        print(f"📊 新しいスコア: {scoring_result.score}%")
-        print(f"   マッチキーワード: {', '.join(scoring_result.matched_keywords[:5])}")
         
         # スコア履歴を更新
         session.score_history.append(scoring_result.score)
         
+        # 表示済みの求人に登録されていない項目を尋ねていれば記録（企業への追加質問用）
+        try:
+            EnrichmentService.detect_from_message(user_id, user_message, session.shown_job_ids)
+        except Exception as e:
+            logger.warning("不足情報の検知エラー: %s", e)
+        
         # Step 2: 求人表示判定
         should_show, trigger_reason = JobRecommender.should_show_jobs(
             turn_count=session.turn_count + 1,
@@ -106,18 +111,25 @@ class ChatService:
             score_history=session.score_history  # スコア履歴を渡す
         )
         
-        print(f"🎯 求人表示判定: {should_show} (理由: {trigger_reason})")
+        logger.debug("チャットターン", extra={
+            "turn": session.turn_count + 1,
+            "score": scoring_result.score,
+            "should_show": should_show,
+            "trigger_reason": trigger_reason,
+        })
         
         # Step 3: 求人表示 or 次の質問
         if should_show:
-            # 求人を取得
+            # 求人を取得（スコアリングした全候補はターン記録に残す）
+            scored_jobs: List[Tuple[str, float]] = []
             jobs = JobRecommender.get_recommendations(
                 user_preferences=session.user_preferences,
                 conversation_keywords=scoring_result.matched_keywords,
-                limit=5
+                limit=5,
+                scored=scored_jobs
             )
             
-            print(f"✅ 求人推薦: {len(jobs)}件")
+            logger.debug("求人推薦", extra={"jobs": len(jobs)})
             
             # 求人が0件の場合の処理
             if not jobs:
@@ -141,6 +153,7 @@ class ChatService:
                     is_deep_dive=False,
                     new_score=scoring_result.score
                 )
+                self._record_turn(session, user_message, ai_message, scoring_result)
                 
                 return ChatTurnResult(
                     ai_message=ai_message,
@@ -151,6 +164,8 @@ class ChatService:
                     session_id=session.session_id
                 )
             
+            session.shown_job_ids = [job.job_id for job in jobs]
+            
             # 求人紹介メッセージ
             ai_message = self._generate_job_intro_message(
                 jobs=jobs,
@@ -166,6 +181,7 @@ class ChatService:
                 is_deep_dive=False,
                 new_score=scoring_result.score
             )
+            self._record_turn(session, user_message, ai_message, scoring_result, scored_jobs)
             
             return ChatTurnResult(
                 ai_message=ai_message,
@@ -196,9 +212,10 @@ class ChatService:
             
             generated_q = self.question_gen.generate_question(question_context)
             
-            print(f"❓ 次の質問: {generated_q.question[:50]}...")
-            print(f"   深掘り: {generated_q.is_deep_dive}")
-            print(f"   タイプ: {generated_q.question_type}")
+            logger.debug("次の質問", extra={
+                "is_deep_dive": generated_q.is_deep_dive,
+                "question_type": generated_q.question_type,
+            })
             
             # セッションに記録
             SessionManager.add_turn(
@@ -208,8 +225,7 @@ class ChatService:
                 is_deep_dive=generated_q.is_deep_dive,
                 new_score=scoring_result.score
             )
-            
-            print(f"={'='*60}\n")
+            self._record_turn(session, user_message, generated_q.question, scoring_result)
             
             return ChatTurnResult(
                 ai_message=generated_q.question,
@@ -220,6 +236,34 @@ class ChatService:
                 session_id=session.session_id
             )
     
+    def _record_turn(
+        self,
+        session: ChatSession,
+        user_message: str,
+        ai_message: str,
+        scoring_result: ScoringResult,
+        scored_jobs: Optional[List[Tuple[str, float]]] = None
+    ) -> None:
+        """ターンの要約と求人ごとのスコアを記録（書き込みは TurnLogService がまとめて行う）"""
+        shown = set(session.shown_job_ids) if scored_jobs else set()
+        try:
+            TurnLogService.record_turn(
+                user_id=session.user_id,
+                session_id=session.session_id,
+                turn_number=session.turn_count,
+                user_message=user_message,
+                bot_message=ai_message,
+                # matched_keywords は会話全体からの抽出のため、トレンド集計用にはこのターンの発言分だけを記録する
+                extracted_info={"keywords": extract_keywords(user_message)},
+                match_percentage=scoring_result.score,
+                job_scores=[
+                    (job_id, score, {"shown": job_id in shown})
+                    for job_id, score in scored_jobs or []
+                ]
+            )
+        except Exception as e:
+            logger.warning("ターン記録エラー: %s", e)
+    
     def _generate_initial_message(self, user_preferences: dict) -> str:
         """初回メッセージを生成"""
         
@@ -0,0 +1,313 @@
+"""
+不足情報の検知とエンリッチメント要求
+
+チャットでユーザーが表示済みの求人について尋ねた項目（リモート可否・チーム規模など）が
+求人に登録されていない場合に検知し、ワーカー内に溜めてまとめて書き込む。
+
+- missing_job_info_log: 検知1件ごとのログ
+- company_enrichment_requests: (job_id, missing_field) ごとに1件（対応待ちの間は detection_count を加算）。
+  priority_score も書き込み時に計算しておき、企業向けの一覧はインデックス順に読むだけにする
+"""
+
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, FrozenSet, List, Optional, Sequence, Set, Tuple
+import logging
+import os
+import threading
+import unicodedata
+
+from psycopg2.extras import RealDictCursor, execute_values
+
+from config.database import get_db_conn
+from utils.buffered_writer import BufferedWriter
+from utils.cache import TTLCache
+
+
+logger = logging.getLogger(__name__)
+
+
+# 書き込み間隔（秒）
+ENRICHMENT_FLUSH_SECONDS = float(os.getenv("ENRICHMENT_FLUSH_SECONDS", "30"))
+
+# 求人ごとの未登録項目をワーカー内に保持する時間（秒）
+ENRICHMENT_JOB_CACHE_TTL = float(os.getenv("ENRICHMENT_JOB_CACHE_TTL", "300"))
+
+# 検知対象の項目: 列名 -> (質問に含まれるキーワード, 企業への質問文, 質問の種類, 優先度の重み)
+MISSING_FIELDS: Dict[str, Tuple[Tuple[str, ...], str, str, int]] = {
+    "remote_option": (
+        ("リモート", "在宅", "テレワーク", "出社"),
+        "リモートワーク・在宅勤務の可否と頻度を教えてください。", "work_style", 5,
+    ),
+    "latest_start_time": (
+        ("始業", "出社時間", "勤務開始", "何時から"),
+        "始業時刻（最も遅い出社時刻）を教えてください。", "work_style", 3,
+    ),
+    "team_size": (
+        ("チーム", "人数", "メンバー", "組織規模"),
+        "配属予定チームの人数・構成を教えてください。", "team", 3,
+    ),
+    "development_method": (
+        ("開発手法", "アジャイル", "スクラム", "ウォーターフォール"),
+        "開発手法（アジャイル・スクラムなど）を教えてください。", "team", 2,
+    ),
+    "tech_stack": (
+        ("技術スタック", "使用技術", "言語", "フレームワーク", "インフラ"),
+        "使用している言語・フレームワーク・インフラを教えてください。", "tech", 4,
+    ),
+    "benefits": (
+        ("福利厚生", "手当", "休暇", "有給"),
+        "福利厚生・各種手当・休暇制度を教えてください。", "benefits", 3,
+    ),
+    "team_culture_details": (
+        ("社風", "雰囲気", "カルチャー", "文化"),
+        "チームの雰囲気・社風を教えてください。", "culture", 2,
+    ),
+    "growth_opportunities_details": (
+        ("研修", "成長", "キャリアパス", "教育", "評価制度"),
+        "研修制度・キャリアパス・評価制度を教えてください。", "growth", 2,
+    ),
+    "office_environment_details": (
+        ("オフィス", "職場環境", "設備"),
+        "オフィス環境・設備を教えてください。", "environment", 1,
+    ),
+}
+
+# (job_id, user_id, missing_field, detected_from, detected_at)
+_Detection = Tuple[str, Optional[int], str, str, datetime]
+
+
+def detect_topics(message: str) -> List[str]:
+    """
+    メッセージが尋ねている求人項目を判定
+
+    Args:
+        message: ユーザーのメッセージ
+
+    Returns:
+        MISSING_FIELDS の列名のリスト
+    """
+    text = unicodedata.normalize("NFKC", message or "").lower()
+    if not text:
+        return []
+    return [field for field, (keywords, _, _, _) in MISSING_FIELDS.items() if any(k in text for k in keywords)]
+
+
+def _is_missing(value: Any) -> bool:
+    """未登録（NULL・空文字・空配列）か"""
+    if value is None:
+        return True
+    if isinstance(value, str):
+        return not value.strip()
+    if isinstance(value, (list, tuple, dict)):
+        return not value
+    return False
+
+
+class EnrichmentService:
+    """不足情報の検知・一括書き込み・企業向け一覧"""
+
+    _writer: BufferedWriter[_Detection] = BufferedWriter(
+        "不足情報の検知",
+        write=lambda conn, pending: EnrichmentService._write(conn, pending),
+        flush_seconds=ENRICHMENT_FLUSH_SECONDS,
+    )
+    # 書き込みまでの間に記録済みの (job_id, user_id, missing_field)
+    _seen: Set[Tuple[str, Optional[int], str]] = set()
+    _lock = threading.Lock()
+    _job_cache = TTLCache("job_missing_fields", maxsize=4096, ttl=ENRICHMENT_JOB_CACHE_TTL)
+
+    @staticmethod
+    def detect_from_message(
+        user_id: Any,
+        message: str,
+        job_ids: Sequence[str],
+        detected_from: str = "chat"
+    ) -> List[Tuple[str, str]]:
+        """
+        ユーザーの質問のうち、対象の求人に登録されていない項目を検知して記録
+
+        Args:
+            user_id: ユーザーID
+            message: ユーザーのメッセージ
+            job_ids: 質問の対象になりうる求人（表示済みの求人）
+            detected_from: 検知元
+
+        Returns:
+            検知した (job_id, missing_field) のリスト
+        """
+        if not job_ids:
+            return []
+        topics = detect_topics(message)
+        if not topics:
+            return []
+
+        missing_by_job = EnrichmentService._missing_fields(job_ids)
+        detections = [
+            (job_id, field)
+            for job_id in job_ids
+            for field in topics
+            if field in missing_by_job.get(job_id, frozenset())
+        ]
+
+        if detections:
+            user = int(user_id) if user_id is not None else None
+            now = datetime.now()
+            with EnrichmentService._lock:
+                for job_id, field in detections:
+                    # 同じユーザーの同じ質問は書き込みまでの間1回として数える
+                    if (job_id, user, field) in EnrichmentService._seen:
+                        continue
+                    EnrichmentService._seen.add((job_id, user, field))
+                    EnrichmentService._writer.add((job_id, user, field, detected_from, now))
+
+        return detections
+
+    @staticmethod
+    def _missing_fields(job_ids: Sequence[str]) -> Dict[str, FrozenSet[str]]:
+        """求人ごとの未登録項目（ワーカー内キャッシュ経由）"""
+        result: Dict[str, FrozenSet[str]] = {}
+        uncached = []
+        for job_id in job_ids:
+            missing = EnrichmentService._job_cache.get(job_id)
+            if missing is None:
+                uncached.append(job_id)
+            else:
+                result[job_id] = missing
+
+        if uncached:
+            conn = get_db_conn()
+            cur = conn.cursor(cursor_factory=RealDictCursor)
+            try:
+                cur.execute(f"""
+                    SELECT id::text AS job_id, {", ".join(MISSING_FIELDS)}
+                    FROM company_profile
+                    WHERE id = ANY(%s::uuid[])
+                """, (list(uncached),))
+                rows = cur.fetchall()
+            finally:
+                cur.close()
+                conn.close()
+
+            for row in rows:
+                missing = frozenset(field for field in MISSING_FIELDS if _is_missing(row[field]))
+                EnrichmentService._job_cache.set(row["job_id"], missing)
+                result[row["job_id"]] = missing
+
+        return result
+
+    @staticmethod
+    def invalidate_job(job_id: str) -> None:
+        """求人の更新時に未登録項目のキャッシュを破棄（同一ワーカー内のみ）"""
+        EnrichmentService._job_cache.invalidate(str(job_id))
+
+    @staticmethod
+    def flush() -> int:
+        """
+        溜まった検知をログと要求テーブルに書き込む
+
+        Returns:
+            書き込んだ検知の件数
+        """
+        return EnrichmentService._writer.flush()
+
+    @staticmethod
+    def _write(conn, pending: List[_Detection]) -> int:
+        """検知をログと要求テーブルに書き込む（コミットは呼び出し元）"""
+        with EnrichmentService._lock:
+            EnrichmentService._seen = set()
+
+        # 同じユーザーの同じ質問は1回として数える（書き込み直しで戻った分との重複も除く）
+        unique: Dict[Tuple[str, Optional[int], str], _Detection] = {}
+        for detection in pending:
+            unique.setdefault(detection[:3], detection)
+        pending = list(unique.values())
+
+        counts = Counter((job_id, field) for job_id, _, field, _, _ in pending)
+        requests = [
+            (job_id, field, MISSING_FIELDS[field][1], MISSING_FIELDS[field][2], MISSING_FIELDS[field][3], count)
+            for (job_id, field), count in sorted(counts.items())
+        ]
+
+        cur = conn.cursor()
+        try:
+            # 削除済みの求人・ユーザーへの検知は結合で落とす
+            execute_values(cur, """
+                INSERT INTO missing_job_info_log (job_id, user_id, missing_field, detected_from, detected_at)
+                SELECT v.job_id, pd.user_id, v.missing_field, v.detected_from, v.detected_at
+                FROM (VALUES %s) AS v (job_id, user_id, missing_field, detected_from, detected_at)
+                JOIN company_profile cp ON cp.id = v.job_id
+                LEFT JOIN personal_date pd ON pd.user_id = v.user_id
+            """, pending, template="(%s::uuid, %s::int, %s, %s, %s::timestamp)", page_size=len(pending))
+
+            # 対応待ちの要求は (job_id, missing_field) ごとに1件に集約し、優先度を積み上げる
+            execute_values(cur, """
+                INSERT INTO company_enrichment_requests AS r (
+                    job_id, company_id, missing_field, question_text, question_type,
+                    priority_score, detection_count
+                )
+                SELECT v.job_id, cp.company_id, v.missing_field, v.question_text, v.question_type,
+                       v.weight * v.detections, v.detections
+                FROM (VALUES %s) AS v (job_id, missing_field, question_text, question_type, weight, detections)
+                JOIN company_profile cp ON cp.id = v.job_id
+                ORDER BY v.job_id, v.missing_field
+                ON CONFLICT (job_id, missing_field) WHERE status = 'pending' DO UPDATE SET
+                    detection_count = r.detection_count + EXCLUDED.detection_count,
+                    priority_score = COALESCE(r.priority_score, 0) + EXCLUDED.priority_score
+            """, requests, template="(%s::uuid, %s, %s, %s, %s, %s)", page_size=len(requests))
+        finally:
+            cur.close()
+
+        return len(pending)
+
+    @staticmethod
+    def start_flusher() -> None:
+        """定期書き込みタスクを開始（アプリ起動時に呼ぶ）"""
+        EnrichmentService._writer.start()
+
+    @staticmethod
+    async def stop_flusher() -> None:
+        """定期書き込みタスクを止めて残りを書き込む（アプリ終了時に呼ぶ）"""
+        await EnrichmentService._writer.stop()
+
+    @staticmethod
+    def list_requests(
+        company_id: str,
+        status: str = "pending",
+        limit: int = 50,
+        cursor_values: Optional[List[Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        企業の追加質問リクエストを優先度順に取得
+
+        Args:
+            company_id: 企業ID
+            status: pending / answered など
+            limit: 取得件数（次ページ判定用に呼び出し側で+1して渡す）
+            cursor_values: 前ページ最後の (priority_score, id)
+
+        Returns:
+            リクエストのリスト（求人名付き）
+        """
+        query = """
+            SELECT r.id, r.job_id, cp.job_title, r.missing_field, r.question_text, r.question_type,
+                   r.priority_score, r.detection_count, r.status, r.requested_at
+            FROM company_enrichment_requests r
+            JOIN company_profile cp ON cp.id = r.job_id
+            WHERE r.company_id = %s AND r.status = %s
+        """
+        params: List[Any] = [company_id, status]
+        if cursor_values:
+            query += " AND (r.priority_score, r.id) < (%s, %s)"
+            params.extend(cursor_values)
+        query += " ORDER BY r.priority_score DESC, r.id DESC LIMIT %s"
+        params.append(limit)
+
+        conn = get_db_conn()
+        cur = conn.cursor(cursor_factory=RealDictCursor)
+        try:
+            cur.execute(query, tuple(params))
+            return [dict(row) for row in cur.fetchall()]
+        finally:
+            cur.close()
+            conn.close()
@@ -0,0 +1,273 @@
+"""
+ユーザー行動イベント（閲覧・クリック・お気に入り・応募）の取り込み
+
+イベントはワーカー内のバッファに積むだけにして、件数（INTERACTION_FLUSH_BATCH）か
+経過時間（INTERACTION_FLUSH_SECONDS）のどちらかに達したらまとめて書き込む。
+
+- user_interactions には COPY で一括投入
+- company_profile の view/click/favorite/apply カウンタは、求人ごとに集計した差分を
+  UPDATE ... FROM (VALUES ...) の1文で加算（人気求人の行を1イベントごとに更新しない）
+- user_interaction_summary（ユーザー×求人ごとの回数）も同じトランザクションで差分を加算し、
+  参照時に user_interactions 全体を集計しなくて済むようにする
+"""
+
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+import os
+
+from psycopg2 import errors
+from psycopg2.extras import execute_values
+
+from utils.buffered_writer import BufferedWriter
+from utils.pg_copy import copy_rows
+
+
+logger = logging.getLogger(__name__)
+
+
+# この件数たまったら書き込む
+INTERACTION_FLUSH_BATCH = int(os.getenv("INTERACTION_FLUSH_BATCH", "1000"))
+
+# 件数に達しなくてもこの間隔（秒）で書き込む
+INTERACTION_FLUSH_SECONDS = float(os.getenv("INTERACTION_FLUSH_SECONDS", "5"))
+
+# DB障害時などに溜めておく上限（超えた分は捨てる）
+INTERACTION_BUFFER_MAX = int(os.getenv("INTERACTION_BUFFER_MAX", "100000"))
+
+# クライアントが送る発生日時として受け付ける範囲（過去は時間、未来は時計のずれとして秒）
+INTERACTION_MAX_AGE_HOURS = float(os.getenv("INTERACTION_MAX_AGE_HOURS", "24"))
+INTERACTION_MAX_SKEW_SECONDS = float(os.getenv("INTERACTION_MAX_SKEW_SECONDS", "300"))
+
+# company_profile にカウンタ列がある種別（VALUES の列順）
+COUNTER_TYPES = ("view", "click", "favorite", "apply")
+
+INTERACTION_COLUMNS = ("user_id", "job_id", "interaction_type", "session_id", "interaction_data", "created_at")
+
+# (user_id, job_id, interaction_type, session_id, interaction_data, created_at)
+_Event = Tuple[Optional[int], str, str, Optional[str], Optional[Dict[str, Any]], datetime]
+
+
+def _local_naive(value: datetime) -> datetime:
+    """タイムゾーン付きの日時をサーバーのローカル時刻（タイムゾーンなし）に揃える"""
+    if value.tzinfo is None:
+        return value
+    return value.astimezone().replace(tzinfo=None)
+
+
+class InteractionService:
+    """行動イベントのバッファリングと一括書き込み"""
+
+    _writer: BufferedWriter[_Event] = BufferedWriter(
+        "行動イベント",
+        write=lambda conn, events: InteractionService._write_batch(conn, events),
+        flush_seconds=INTERACTION_FLUSH_SECONDS,
+        flush_size=INTERACTION_FLUSH_BATCH,
+        max_size=INTERACTION_BUFFER_MAX,
+    )
+
+    @staticmethod
+    def is_acceptable_time(occurred_at: datetime) -> bool:
+        """
+        クライアントが送った発生日時が受け付ける範囲内か
+
+        Args:
+            occurred_at: 発生日時（タイムゾーン付きも可）
+
+        Returns:
+            INTERACTION_MAX_AGE_HOURS 時間前から INTERACTION_MAX_SKEW_SECONDS 秒後までならTrue
+        """
+        now = datetime.now()
+        occurred_at = _local_naive(occurred_at)
+        return (
+            now - timedelta(hours=INTERACTION_MAX_AGE_HOURS)
+            <= occurred_at
+            <= now + timedelta(seconds=INTERACTION_MAX_SKEW_SECONDS)
+        )
+
+    @staticmethod
+    def record(
+        user_id: Optional[Any],
+        job_id: Any,
+        interaction_type: str,
+        session_id: Optional[str] = None,
+        interaction_data: Optional[Dict[str, Any]] = None,
+        created_at: Optional[datetime] = None
+    ) -> bool:
+        """
+        イベントをバッファに追加（書き込みは後でまとめて行う）
+
+        Args:
+            user_id: ユーザーID
+            job_id: 求人ID
+            interaction_type: view / click / favorite / apply など
+            session_id: チャットのセッションID
+            interaction_data: 付加情報（表示位置など）
+            created_at: 発生日時（省略時は現在時刻。タイムゾーン付きはローカル時刻に変換）
+
+        Returns:
+            追加した場合True（バッファが INTERACTION_BUFFER_MAX に達していて捨てた場合False）
+        """
+        # created_at は timestamp 列で、同じバッチ内で比較もするため、タイムゾーンなしに揃える
+        event = (
+            int(user_id) if user_id is not None else None, str(job_id).lower(), interaction_type,
+            session_id, interaction_data, _local_naive(created_at) if created_at else datetime.now(),
+        )
+
+        return InteractionService._writer.add(event)
+
+    @staticmethod
+    def flush() -> int:
+        """
+        バッファのイベントを書き込む
+
+        Returns:
+            user_interactions に書き込んだ件数
+        """
+        return InteractionService._writer.flush()
+
+    @staticmethod
+    def _write_batch(conn, events: List[_Event]) -> int:
+        """削除済みの求人・ユーザーへのイベントが混ざっている場合は除いて書き込み直す"""
+        try:
+            return InteractionService._write(conn, events)
+        except errors.ForeignKeyViolation:
+            conn.rollback()
+            return InteractionService._write(conn, InteractionService._drop_orphans(conn, events))
+
+    @staticmethod
+    def _write(conn, events: List[_Event]) -> int:
+        """
+        イベントの投入とカウンタの加算（コミットは呼び出し元）
+
+        お気に入り・応募は、ユーザー×求人ごとに初回のイベントだけを求人のカウンタに加算する
+        （user_interaction_summary の更新後の回数が今回の回数と同じなら初回）。
+        """
+        # ログインユーザーのお気に入り・応募は初回かどうかを確認してから数える
+        deduped = {"favorite", "apply"}
+        deltas: Dict[str, List[int]] = defaultdict(lambda: [0] * len(COUNTER_TYPES))
+        # (user_id, job_id) -> [view, click, favorite, apply, 最終日時]
+        summary: Dict[Tuple[int, str], List[Any]] = {}
+        for user_id, job_id, interaction_type, _, _, created_at in events:
+            if interaction_type in COUNTER_TYPES and (user_id is None or interaction_type not in deduped):
+                deltas[job_id][COUNTER_TYPES.index(interaction_type)] += 1
+            if user_id is None:
+                continue
+            entry = summary.get((user_id, job_id))
+            if entry is None:
+                entry = summary[(user_id, job_id)] = [0] * len(COUNTER_TYPES) + [created_at]
+            elif created_at > entry[-1]:
+                entry[-1] = created_at
+            if interaction_type in COUNTER_TYPES:
+                entry[COUNTER_TYPES.index(interaction_type)] += 1
+
+        cur = conn.cursor()
+        try:
+            written = copy_rows(cur, "user_interactions", INTERACTION_COLUMNS, events)
+            if summary:
+                # ワーカー間でのデッドロックを避けるため、(ユーザー, 求人) の順に行ロックを取る
+                values = [(*key, *counts) for key, counts in sorted(summary.items())]
+                totals = execute_values(cur, """
+                    INSERT INTO user_interaction_summary AS s (
+                        user_id, job_id, view_count, click_count, favorite_count, apply_count, last_interaction
+                    ) VALUES %s
+                    ON CONFLICT (user_id, job_id) DO UPDATE SET
+                        view_count = s.view_count + EXCLUDED.view_count,
+                        click_count = s.click_count + EXCLUDED.click_count,
+                        favorite_count = s.favorite_count + EXCLUDED.favorite_count,
+                        apply_count = s.apply_count + EXCLUDED.apply_count,
+                        last_interaction = GREATEST(s.last_interaction, EXCLUDED.last_interaction)
+                    RETURNING s.user_id, s.job_id::text, s.favorite_count, s.apply_count
+                """, values, template="(%s, %s::uuid, %s, %s, %s, %s, %s)", page_size=len(values), fetch=True)
+
+                # 更新後の回数が今回の回数と同じなら、このユーザーの初回のお気に入り・応募
+                for user_id, job_id, favorite_total, apply_total in totals:
+                    entry = summary.get((user_id, job_id))
+                    if entry is None:
+                        continue
+                    if entry[2] and favorite_total == entry[2]:
+                        deltas[job_id][2] += 1
+                    if entry[3] and apply_total == entry[3]:
+                        deltas[job_id][3] += 1
+
+            deltas = {job_id: counts for job_id, counts in deltas.items() if any(counts)}
+            if deltas:
+                # 求人IDの順に行ロックを取る
+                values = [(job_id, *counts) for job_id, counts in sorted(deltas.items())]
+                execute_values(cur, """
+                    UPDATE company_profile cp
+                    SET view_count = COALESCE(cp.view_count, 0) + d.views,
+                        click_count = COALESCE(cp.click_count, 0) + d.clicks,
+                        favorite_count = COALESCE(cp.favorite_count, 0) + d.favorites,
+                        apply_count = COALESCE(cp.apply_count, 0) + d.applies
+                    FROM (VALUES %s) AS d (job_id, views, clicks, favorites, applies)
+                    WHERE cp.id = d.job_id
+                """, values, template="(%s::uuid, %s, %s, %s, %s)", page_size=len(values))
+        finally:
+            cur.close()
+        return written
+
+    @staticmethod
+    def rebuild_summary(conn) -> int:
+        """
+        user_interaction_summary を user_interactions から作り直す（一括投入後用、コミットは呼び出し元）
+
+        Args:
+            conn: DB接続
+
+        Returns:
+            作成した行数
+        """
+        cur = conn.cursor()
+        try:
+            cur.execute("TRUNCATE user_interaction_summary")
+            cur.execute("""
+                INSERT INTO user_interaction_summary (
+                    user_id, job_id, view_count, click_count, favorite_count, apply_count, last_interaction
+                )
+                SELECT user_id, job_id,
+                       COUNT(*) FILTER (WHERE interaction_type = 'view'),
+                       COUNT(*) FILTER (WHERE interaction_type = 'click'),
+                       COUNT(*) FILTER (WHERE interaction_type = 'favorite'),
+                       COUNT(*) FILTER (WHERE interaction_type = 'apply'),
+                       MAX(created_at)
+                FROM user_interactions
+                WHERE user_id IS NOT NULL AND job_id IS NOT NULL
+                GROUP BY user_id, job_id
+            """)
+            return cur.rowcount
+        finally:
+            cur.close()
+
+    @staticmethod
+    def _drop_orphans(conn, events: List[_Event]) -> List[_Event]:
+        """存在しない求人・ユーザーへのイベントを除く"""
+        job_ids = list({event[1] for event in events})
+        user_ids = list({event[0] for event in events if event[0] is not None})
+
+        cur = conn.cursor()
+        try:
+            cur.execute("SELECT id::text FROM company_profile WHERE id = ANY(%s::uuid[])", (job_ids,))
+            existing_jobs = {row[0] for row in cur.fetchall()}
+            cur.execute("SELECT user_id FROM personal_date WHERE user_id = ANY(%s)", (user_ids,))
+            existing_users = {row[0] for row in cur.fetchall()}
+        finally:
+            cur.close()
+
+        kept = [
+            event for event in events
+            if event[1] in existing_jobs and (event[0] is None or event[0] in existing_users)
+        ]
+        logger.warning("存在しない求人・ユーザーへの行動イベントを破棄", extra={"dropped": len(events) - len(kept)})
+        return kept
+
+    @staticmethod
+    def start_flusher() -> None:
+        """定期書き込みタスクを開始（アプリ起動時に呼ぶ）"""
+        InteractionService._writer.start()
+
+    @staticmethod
+    async def stop_flusher() -> None:
+        """定期書き込みタスクを止めて残りを書き込む（アプリ終了時に呼ぶ）"""
+        await InteractionService._writer.stop()
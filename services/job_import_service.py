@@ -0,0 +1,349 @@
+"""
+求人の一括登録（CSV / JSONL）
+
+アップロードされたファイルを1行ずつ読みながら JobImportRow で検証し、そのまま
+一時テーブルへ COPY で流し込む（全行をメモリに載せない）。最後に1文の
+INSERT ... ON CONFLICT で company_profile にまとめて反映する。
+
+- external_id を指定した行は、同じ企業の同じ external_id の求人を更新する（ファイル内で重複した場合は後の行）
+- 反映後、更新した求人の不足項目キャッシュを破棄し、embedding は JOB_IMPORT_EMBEDDING_BATCH 件ずつ
+  まとめてAPIに問い合わせて書き込む（レスポンス後のバックグラウンド処理）
+"""
+
+from typing import Any, Dict, IO, Iterator, List, Optional, Tuple
+import csv
+import io
+import json
+import logging
+import os
+import re
+
+from psycopg2.extras import execute_values
+from pydantic import ValidationError
+
+from config.database import get_db_conn
+from schemas.job import JobImportRow
+from services.enrichment_service import EnrichmentService
+from utils.pg_copy import copy_rows
+
+
+logger = logging.getLogger(__name__)
+
+
+# 1回のアップロードで受け付ける最大行数・最大サイズ（バイト）
+JOB_IMPORT_MAX_ROWS = int(os.getenv("JOB_IMPORT_MAX_ROWS", "10000"))
+JOB_IMPORT_MAX_BYTES = int(os.getenv("JOB_IMPORT_MAX_BYTES", str(50 * 1024 * 1024)))
+
+# レスポンスに含めるエラー行の上限
+JOB_IMPORT_MAX_ERRORS = int(os.getenv("JOB_IMPORT_MAX_ERRORS", "100"))
+
+# embedding を1回のAPI呼び出しで取得する件数（0で取得しない）
+JOB_IMPORT_EMBEDDING_BATCH = int(os.getenv("JOB_IMPORT_EMBEDDING_BATCH", "100"))
+
+IMPORT_FORMATS = ("csv", "jsonl")
+
+# 一時テーブルの列（COPY の列順）
+STAGING_COLUMNS = (
+    "line_no", "external_id", "job_title", "job_description", "employment_type",
+    "location_prefecture", "location_city", "salary_min", "salary_max", "required_skills",
+    "benefits", "remote_option", "flex_time", "side_job_allowed", "work_style_details",
+    "team_culture_details", "growth_opportunities_details", "additional_questions",
+)
+
+# 更新時に上書きする列（status・カウンタ・作成日時は残す）
+_UPDATE_COLUMNS = STAGING_COLUMNS[2:]
+
+# カンマ・読点・改行区切りの文字列を配列列に入れる
+_LIST_COLUMNS = ("required_skills", "benefits")
+_LIST_SEPARATOR = re.compile(r"\s*[,、\n]\s*")
+
+_FIELDS = frozenset(JobImportRow.model_fields)
+
+_CREATE_STAGING_SQL = """
+    CREATE TEMP TABLE job_import_staging (
+        line_no INTEGER NOT NULL,
+        external_id VARCHAR(100),
+        job_title VARCHAR(200) NOT NULL,
+        job_description TEXT NOT NULL,
+        employment_type VARCHAR(50),
+        location_prefecture VARCHAR(50) NOT NULL,
+        location_city VARCHAR(100),
+        salary_min INTEGER NOT NULL,
+        salary_max INTEGER NOT NULL,
+        required_skills TEXT[],
+        benefits TEXT[],
+        remote_option VARCHAR(50),
+        flex_time BOOLEAN,
+        side_job_allowed BOOLEAN,
+        work_style_details TEXT,
+        team_culture_details TEXT,
+        growth_opportunities_details TEXT,
+        additional_questions JSONB
+    ) ON COMMIT DROP
+"""
+
+_MERGE_SQL = f"""
+    INSERT INTO company_profile AS cp (
+        company_id, {", ".join(STAGING_COLUMNS[1:])}, status, created_at, updated_at
+    )
+    SELECT %(company_id)s, {", ".join(f"s.{c}" for c in STAGING_COLUMNS[1:])},
+           'active', CURRENT_TIMESTAMP, CURRENT_TIMESTAMP
+    FROM (
+        SELECT *, ROW_NUMBER() OVER (PARTITION BY external_id ORDER BY line_no DESC) AS rn
+        FROM job_import_staging
+    ) s
+    WHERE s.external_id IS NULL OR s.rn = 1
+    ORDER BY s.line_no
+    ON CONFLICT (company_id, external_id) WHERE external_id IS NOT NULL DO UPDATE SET
+        {", ".join(f"{c} = EXCLUDED.{c}" for c in _UPDATE_COLUMNS)},
+        updated_at = EXCLUDED.updated_at
+    RETURNING cp.id::text, (cp.xmax = 0) AS inserted
+"""
+
+
+class JobImportRejected(ValueError):
+    """一括登録を中止した（不正な行がある・行数の上限を超えた）"""
+
+    def __init__(self, message: str, errors: List[Tuple[int, str]]):
+        super().__init__(message)
+        self.errors = errors
+
+
+# (行番号, 値, エラー内容)
+_Record = Tuple[int, Optional[Dict[str, Any]], Optional[str]]
+
+
+def _split_list(value: Any) -> Any:
+    """配列で渡された値を JobCreate の文字列形式に揃える"""
+    if isinstance(value, list):
+        return ", ".join(str(item) for item in value)
+    return value
+
+
+def _csv_records(stream: IO[bytes]) -> Iterator[_Record]:
+    """CSV（1行目がヘッダー）を1行ずつ読む（CSVとして壊れていればそこで終える）"""
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    reader = csv.DictReader(text)
+    line_no = 1
+    try:
+        reader.fieldnames  # ヘッダーを先に読み、行番号を各行の開始行で数える
+        while True:
+            line_no = reader.line_num + 1
+            record = next(reader, None)
+            if record is None:
+                return
+
+            # 空欄は未指定として扱う（スキーマの既定値を使う）
+            values: Dict[str, Any] = {}
+            for key, value in record.items():
+                if key is None or key.strip() not in _FIELDS:
+                    continue
+                value = value.strip() if isinstance(value, str) else value
+                if value:
+                    values[key.strip()] = value
+
+            questions = values.get("additional_questions")
+            if isinstance(questions, str):
+                try:
+                    values["additional_questions"] = json.loads(questions)
+                except ValueError as e:
+                    yield line_no, None, f"additional_questions: JSONとして読めません（{e}）"
+                    continue
+            yield line_no, values, None
+    except (csv.Error, UnicodeDecodeError) as e:
+        yield line_no, None, f"CSVとして読めません（{e}）"
+
+
+def _jsonl_records(stream: IO[bytes]) -> Iterator[_Record]:
+    """JSONL（1行1オブジェクト、空行は無視）を1行ずつ読む"""
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig")
+    line_no = 0
+    try:
+        for line_no, line in enumerate(text, 1):
+            if not line.strip():
+                continue
+            try:
+                values = json.loads(line)
+            except ValueError as e:
+                yield line_no, None, f"JSONとして読めません（{e}）"
+                continue
+            if not isinstance(values, dict):
+                yield line_no, None, "JSONオブジェクトではありません"
+                continue
+            yield line_no, {key: _split_list(value) for key, value in values.items() if key in _FIELDS}, None
+    except UnicodeDecodeError as e:
+        yield line_no + 1, None, f"UTF-8として読めません（{e}）"
+
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(loc) for loc in item['loc']) or '行'}: {item['msg']}" for item in error.errors()
+    )
+
+
+class JobImportService:
+    """求人の一括登録"""
+
+    @staticmethod
+    def _staging_rows(
+        stream: IO[bytes],
+        file_format: str,
+        errors: List[Tuple[int, str]],
+        counts: Dict[str, int]
+    ) -> Iterator[Tuple[Any, ...]]:
+        """
+        ファイルを1行ずつ検証して一時テーブル用の行を返す
+
+        不正な行は errors に記録して飛ばす。行数が JOB_IMPORT_MAX_ROWS を超えたら
+        counts["over_limit"] を立ててそこで終える（COPY の途中で例外を投げない）。
+        """
+        reader = _csv_records if file_format == "csv" else _jsonl_records
+        for line_no, values, error in reader(stream):
+            counts["rows"] += 1
+            if counts["rows"] > JOB_IMPORT_MAX_ROWS:
+                counts["over_limit"] = 1
+                return
+
+            if values is not None:
+                try:
+                    job = JobImportRow(**values)
+                except ValidationError as e:
+                    error = _validation_message(e)
+
+            if error is not None:
+                counts["skipped"] += 1
+                if len(errors) < JOB_IMPORT_MAX_ERRORS:
+                    errors.append((line_no, error))
+                continue
+
+            row = job.model_dump()
+            for column in _LIST_COLUMNS:
+                if row[column] is not None:
+                    row[column] = [item for item in _LIST_SEPARATOR.split(row[column]) if item]
+            row["line_no"] = line_no
+            yield tuple(row[column] for column in STAGING_COLUMNS)
+
+    @staticmethod
+    def import_jobs(
+        company_id: str,
+        stream: IO[bytes],
+        file_format: str,
+        skip_invalid: bool = False
+    ) -> Dict[str, Any]:
+        """
+        ファイルの求人を検証して company_profile に一括反映（1トランザクション）
+
+        Args:
+            company_id: 企業ID
+            stream: アップロードされたファイル（バイナリ）
+            file_format: csv / jsonl
+            skip_invalid: True の場合は不正な行を飛ばして残りを反映する
+
+        Returns:
+            inserted / updated / skipped / errors（(行番号, 内容) のリスト）/ job_ids（反映した求人ID）
+
+        Raises:
+            JobImportRejected: 不正な行があった（skip_invalid=False のとき）・行数の上限を超えた
+        """
+        if file_format not in IMPORT_FORMATS:
+            raise ValueError(f"未対応の形式です: {file_format}")
+
+        errors: List[Tuple[int, str]] = []
+        counts = {"rows": 0, "skipped": 0, "over_limit": 0}
+
+        conn = get_db_conn()
+        cur = conn.cursor()
+        try:
+            cur.execute(_CREATE_STAGING_SQL)
+            copy_rows(
+                cur, "job_import_staging", STAGING_COLUMNS,
+                JobImportService._staging_rows(stream, file_format, errors, counts),
+            )
+            if counts["over_limit"]:
+                raise JobImportRejected(f"1回に登録できるのは{JOB_IMPORT_MAX_ROWS}件までです", errors)
+            if counts["skipped"] and not skip_invalid:
+                raise JobImportRejected(f"{counts['skipped']}行に誤りがあるため登録しませんでした", errors)
+
+            cur.execute(_MERGE_SQL, {"company_id": company_id})
+            merged = cur.fetchall()
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cur.close()
+            conn.close()
+
+        updated_ids = [job_id for job_id, inserted in merged if not inserted]
+        for job_id in updated_ids:
+            EnrichmentService.invalidate_job(job_id)
+
+        logger.info("求人一括登録", extra={
+            "company_id": company_id, "merged": len(merged), "skipped": counts["skipped"],
+        })
+
+        return {
+            "inserted": len(merged) - len(updated_ids),
+            "updated": len(updated_ids),
+            "skipped": counts["skipped"],
+            "errors": errors,
+            "job_ids": [job_id for job_id, _ in merged],
+        }
+
+    @staticmethod
+    def update_embeddings(job_ids: List[str]) -> int:
+        """
+        求人の embedding を JOB_IMPORT_EMBEDDING_BATCH 件ずつまとめて取得して書き込む
+
+        Args:
+            job_ids: 求人IDのリスト
+
+        Returns:
+            書き込んだ件数
+        """
+        from utils.ai_utils import get_embeddings
+
+        if JOB_IMPORT_EMBEDDING_BATCH <= 0:
+            return 0
+
+        written = 0
+        for start in range(0, len(job_ids), JOB_IMPORT_EMBEDDING_BATCH):
+            batch = job_ids[start:start + JOB_IMPORT_EMBEDDING_BATCH]
+
+            conn = get_db_conn()
+            cur = conn.cursor()
+            try:
+                cur.execute("""
+                    SELECT id::text, concat_ws(' ', job_title, array_to_string(required_skills, ' '), job_description)
+                    FROM company_profile
+                    WHERE id = ANY(%s::uuid[])
+                """, (batch,))
+                jobs = cur.fetchall()
+                if not jobs:
+                    continue
+
+                embeddings = get_embeddings([text for _, text in jobs])
+                if len(embeddings) != len(jobs):
+                    # 取得エラーは記録済み。残りは次回の登録・更新に任せる
+                    return written
+
+                values = [
+                    (job_id, "[" + ",".join(str(x) for x in embedding) + "]")
+                    for (job_id, _), embedding in zip(jobs, embeddings)
+                ]
+                execute_values(cur, """
+                    UPDATE company_profile cp SET embedding = d.embedding::vector
+                    FROM (VALUES %s) AS d (id, embedding)
+                    WHERE cp.id = d.id::uuid
+                """, values, page_size=len(values))
+                conn.commit()
+                written += len(values)
+            except Exception as e:
+                conn.rollback()
+                logger.error("求人embeddingの書き込みエラー: %s", e)
+                return written
+            finally:
+                cur.close()
+                conn.close()
+
+        return written
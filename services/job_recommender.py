@@ -2,9 +2,16 @@
 求人推薦サービス
 """
 
-from typing import List, Dict, Any
+import logging
+from typing import List, Dict, Any, Optional, Tuple
 from config.database import get_db_conn
 from models.chat_models import JobRecommendation
+from services.search_service import JobSearchService
+from utils.metrics import record_job_display_decision
+from utils.tracing import span
+
+
+logger = logging.getLogger(__name__)
 
 
 class JobRecommender:
@@ -29,6 +36,20 @@ class JobRecommender:
         Returns:
             (bool, str): (表示すべきか, 理由)
         """
+        should_show, reason = JobRecommender._evaluate_show_jobs(
+            turn_count, current_score, user_message, score_history
+        )
+        record_job_display_decision(turn_count, should_show, reason)
+        return should_show, reason
+    
+    @staticmethod
+    def _evaluate_show_jobs(
+        turn_count: int,
+        current_score: float,
+        user_message: str,
+        score_history: List[float] = None
+    ) -> tuple[bool, str]:
+        """求人表示のトリガー条件を評価（should_show_jobs の本体）"""
         
         # トリガー1: スコアが80%以上
         if current_score >= 80.0:
@@ -64,7 +85,8 @@ class JobRecommender:
     def get_recommendations(
         user_preferences: Dict[str, Any],
         conversation_keywords: List[str],
-        limit: int = 5
+        limit: int = 5,
+        scored: Optional[List[Tuple[str, float]]] = None
     ) -> List[JobRecommendation]:
         """
         求人を推薦
@@ -73,6 +95,7 @@ class JobRecommender:
             user_preferences: ユーザーの希望（Step2の情報）
             conversation_keywords: 会話から抽出されたキーワード
             limit: 取得件数
+            scored: 指定時はスコアリングした全候補の (job_id, スコア) をスコア順に追加する
             
         Returns:
             List[JobRecommendation]: 推薦求人リスト
@@ -88,8 +111,12 @@ class JobRecommender:
             location = user_preferences.get('location', '')
             salary_min = user_preferences.get('salary_min', 0)
             
+            # 職種は職種名の全文検索で絞り込み、関連度順に並べる
+            title_match = JobSearchService.match(job_title, title_only=True) if job_title else None
+            rank_sql = title_match.rank if title_match else "0::float8"
+            
             # SQLクエリ構築（company_profileに全データがある）
-            query = """
+            query = f"""
                 SELECT 
                     id as job_id,
                     job_title,
@@ -100,60 +127,61 @@ class JobRecommender:
                     location_city,
                     remote_option,
                     employment_type,
-                    '' as required_skills
+                    '' as required_skills,
+                    {rank_sql} as search_rank
                 FROM company_profile cp
                 LEFT JOIN company_date cd ON cp.company_id = cd.company_id
                 WHERE cp.status = 'active'
             """
             
-            params = []
+            params = list(title_match.rank_params) if title_match else []
             
-            print(f"📝 SQLクエリ: {query[:100]}...")
+            # 職種フィルタ
+            if title_match:
+                query += f" AND {title_match.where}"
+                params.extend(title_match.params)
             
-            # 職種フィルタ（job_titleを使用）
-            if job_title:
-                query += " AND job_title ILIKE %s"
-                params.append(f"%{job_title}%")
-            
-            # 勤務地フィルタ
-            if location:
-                query += " AND (location_prefecture ILIKE %s OR location_city ILIKE %s)"
-                params.extend([f"%{location}%", f"%{location}%"])
+            # 勤務地フィルタ（都道府県・市区町村の等価比較）
+            location_match = JobSearchService.location_match(location) if location else None
+            if location_match:
+                query += f" AND {location_match.where}"
+                params.extend(location_match.params)
             
             # 年収フィルタ
             if salary_min and salary_min > 0:
                 query += " AND salary_max >= %s"
                 params.append(salary_min)
             
-            query += f" ORDER BY id DESC LIMIT {limit * 2}"
-            
-            print(f"🔍 最終クエリ: {query}")
-            print(f"🔍 パラメータ: {params}")
+            order_by = "search_rank DESC, cp.id DESC" if title_match else "cp.id DESC"
+            query += f" ORDER BY {order_by} LIMIT %s"
+            params.append(limit * 2)
             
             cur.execute(query, params)
             jobs = cur.fetchall()
             
-            print(f"📊 取得した求人数: {len(jobs)}")
-            if jobs:
-                print(f"📊 最初の求人: {dict(jobs[0])}")
+            logger.debug("求人候補取得", extra={"candidates": len(jobs)})
             
             # スコアリング
-            scored_jobs = []
-            for job in jobs:
-                score = JobRecommender._calculate_job_score(
-                    job,
-                    user_preferences,
-                    conversation_keywords
-                )
-                
-                scored_jobs.append({
-                    'job': job,
-                    'score': score
-                })
+            with span("scoring"):
+                scored_jobs = []
+                for job in jobs:
+                    score = JobRecommender._calculate_job_score(
+                        job,
+                        user_preferences,
+                        conversation_keywords
+                    )
+
+                    scored_jobs.append({
+                        'job': job,
+                        'score': score
+                    })
             
             # スコア順にソート
             scored_jobs.sort(key=lambda x: x['score'], reverse=True)
             
+            if scored is not None:
+                scored.extend((str(item['job']['job_id']), item['score']) for item in scored_jobs)
+            
             # 上位N件を取得
             recommendations = []
             for item in scored_jobs[:limit]:
@@ -174,8 +202,8 @@ class JobRecommender:
             
             return recommendations
             
-        except Exception as e:
-            print(f"❌ 求人推薦エラー: {e}")
+        except Exception:
+            logger.exception("求人推薦エラー")
             return []
         finally:
             cur.close()
@@ -0,0 +1,293 @@
+"""
+職種関連グラフ
+
+user_interactions の共起・求人embeddingの類似度・required_skills の重なりから
+職種名同士の関連度を事前計算して job_title_relations に保存し、
+各ワーカーはそれをメモリに読み込んで近傍探索する。
+
+再構築:
+    python -m services.job_title_graph
+"""
+
+from typing import Dict, List, Tuple
+from datetime import datetime
+import logging
+import os
+import threading
+import time
+import unicodedata
+
+from config.database import get_db_conn
+
+
+logger = logging.getLogger(__name__)
+
+
+# 関連度の重み（共起・embedding・スキル）
+COOCCURRENCE_WEIGHT = float(os.getenv("JOB_TITLE_GRAPH_COOCCURRENCE_WEIGHT", "0.5"))
+EMBEDDING_WEIGHT = float(os.getenv("JOB_TITLE_GRAPH_EMBEDDING_WEIGHT", "0.3"))
+SKILL_WEIGHT = float(os.getenv("JOB_TITLE_GRAPH_SKILL_WEIGHT", "0.2"))
+
+# 1職種あたり保持する近傍数
+MAX_NEIGHBORS = int(os.getenv("JOB_TITLE_GRAPH_MAX_NEIGHBORS", "20"))
+
+# 共起を数える対象期間（日）
+COOCCURRENCE_DAYS = int(os.getenv("JOB_TITLE_GRAPH_COOCCURRENCE_DAYS", "90"))
+
+# これより多くの職種に出現するスキルは識別力がないため無視
+MAX_SKILL_TITLES = int(os.getenv("JOB_TITLE_GRAPH_MAX_SKILL_TITLES", "200"))
+
+# メモリ上のグラフを再読み込みする間隔（秒）
+RELOAD_INTERVAL = float(os.getenv("JOB_TITLE_GRAPH_RELOAD_SECONDS", "600"))
+
+# 2ホップ目の関連度の減衰率
+SECOND_HOP_DECAY = 0.5
+
+
+_REBUILD_SQL = """
+WITH interactions AS (
+    SELECT DISTINCT ui.user_id, cp.job_title
+    FROM user_interactions ui
+    JOIN company_profile cp ON cp.id = ui.job_id
+    WHERE ui.created_at >= NOW() - (%(days)s * INTERVAL '1 day')
+),
+title_users AS (
+    SELECT job_title, COUNT(*)::float AS users
+    FROM interactions
+    GROUP BY job_title
+),
+cooccurrence AS (
+    SELECT a.job_title AS source_title, b.job_title AS related_title,
+           COUNT(*) / SQRT(MAX(ta.users) * MAX(tb.users)) AS score
+    FROM interactions a
+    JOIN interactions b ON a.user_id = b.user_id AND a.job_title <> b.job_title
+    JOIN title_users ta ON ta.job_title = a.job_title
+    JOIN title_users tb ON tb.job_title = b.job_title
+    GROUP BY a.job_title, b.job_title
+),
+centroids AS (
+    SELECT job_title, AVG(embedding) AS centroid
+    FROM company_profile
+    WHERE status = 'active' AND embedding IS NOT NULL
+    GROUP BY job_title
+),
+embedding_similarity AS (
+    SELECT c.job_title AS source_title, n.job_title AS related_title, n.score
+    FROM centroids c
+    CROSS JOIN LATERAL (
+        SELECT o.job_title, 1 - (c.centroid <=> o.centroid) AS score
+        FROM centroids o
+        WHERE o.job_title <> c.job_title
+        ORDER BY c.centroid <=> o.centroid
+        LIMIT %(neighbors)s
+    ) n
+),
+title_skills AS (
+    SELECT DISTINCT job_title, lower(skill) AS skill
+    FROM company_profile, unnest(required_skills) AS skill
+    WHERE status = 'active'
+),
+skill_counts AS (
+    SELECT job_title, COUNT(*)::float AS skills
+    FROM title_skills
+    GROUP BY job_title
+),
+common_skills AS (
+    SELECT skill
+    FROM title_skills
+    GROUP BY skill
+    HAVING COUNT(*) <= %(max_skill_titles)s
+),
+skill_overlap AS (
+    SELECT a.job_title AS source_title, b.job_title AS related_title,
+           COUNT(*) / (MAX(sa.skills) + MAX(sb.skills) - COUNT(*)) AS score
+    FROM title_skills a
+    JOIN common_skills cs ON cs.skill = a.skill
+    JOIN title_skills b ON a.skill = b.skill AND a.job_title <> b.job_title
+    JOIN skill_counts sa ON sa.job_title = a.job_title
+    JOIN skill_counts sb ON sb.job_title = b.job_title
+    GROUP BY a.job_title, b.job_title
+),
+combined AS (
+    SELECT source_title, related_title,
+           SUM(cooccurrence) AS cooccurrence_score,
+           SUM(embedding) AS embedding_score,
+           SUM(skill) AS skill_score
+    FROM (
+        SELECT source_title, related_title, score AS cooccurrence, 0 AS embedding, 0 AS skill FROM cooccurrence
+        UNION ALL
+        SELECT source_title, related_title, 0, score, 0 FROM embedding_similarity
+        UNION ALL
+        SELECT source_title, related_title, 0, 0, score FROM skill_overlap
+    ) s
+    GROUP BY source_title, related_title
+),
+ranked AS (
+    SELECT *,
+           %(w_cooc)s * cooccurrence_score + %(w_emb)s * embedding_score + %(w_skill)s * skill_score AS weight,
+           ROW_NUMBER() OVER (
+               PARTITION BY source_title
+               ORDER BY %(w_cooc)s * cooccurrence_score + %(w_emb)s * embedding_score + %(w_skill)s * skill_score DESC
+           ) AS rn
+    FROM combined
+)
+INSERT INTO job_title_relations
+    (source_title, related_title, weight, cooccurrence_score, embedding_score, skill_score, updated_at)
+SELECT source_title, related_title, weight, cooccurrence_score, embedding_score, skill_score, NOW()
+FROM ranked
+WHERE rn <= %(neighbors)s AND weight > 0
+"""
+
+
+def _normalize_title(title: str) -> str:
+    """職種名の比較用正規化"""
+    return unicodedata.normalize("NFKC", title or "").lower().replace(" ", "").strip()
+
+
+class JobTitleGraph:
+    """職種関連グラフ（ワーカー内メモリに保持）"""
+
+    _lock = threading.Lock()
+    _graph: Dict[str, List[Tuple[str, float]]] = {}
+    _nodes: Dict[str, List[str]] = {}  # 正規化した職種名 -> 実際の職種名
+    _loaded_at: float = 0.0
+
+    @staticmethod
+    def rebuild() -> int:
+        """
+        job_title_relations を再計算（1トランザクションで差し替え）
+
+        Returns:
+            保存した関連の件数
+        """
+        conn = get_db_conn()
+        cur = conn.cursor()
+
+        try:
+            cur.execute("DELETE FROM job_title_relations")
+            cur.execute(_REBUILD_SQL, {
+                "days": COOCCURRENCE_DAYS,
+                "neighbors": MAX_NEIGHBORS,
+                "max_skill_titles": MAX_SKILL_TITLES,
+                "w_cooc": COOCCURRENCE_WEIGHT,
+                "w_emb": EMBEDDING_WEIGHT,
+                "w_skill": SKILL_WEIGHT,
+            })
+            count = cur.rowcount
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            logger.error("職種関連グラフ再構築エラー: %s", e)
+            raise
+        finally:
+            cur.close()
+            conn.close()
+
+        JobTitleGraph.reload()
+        return count
+
+    @staticmethod
+    def reload() -> None:
+        """job_title_relations をメモリに読み込む"""
+        conn = get_db_conn()
+        cur = conn.cursor()
+
+        try:
+            cur.execute("""
+                SELECT source_title, related_title, weight
+                FROM job_title_relations
+                ORDER BY source_title, weight DESC
+            """)
+            rows = cur.fetchall()
+        finally:
+            cur.close()
+            conn.close()
+
+        graph: Dict[str, List[Tuple[str, float]]] = {}
+        nodes: Dict[str, List[str]] = {}
+        for source_title, related_title, weight in rows:
+            graph.setdefault(source_title, []).append((related_title, float(weight)))
+            for title in (source_title, related_title):
+                variants = nodes.setdefault(_normalize_title(title), [])
+                if title not in variants:
+                    variants.append(title)
+
+        with JobTitleGraph._lock:
+            JobTitleGraph._graph = graph
+            JobTitleGraph._nodes = nodes
+            JobTitleGraph._loaded_at = time.monotonic()
+
+    @staticmethod
+    def _ensure_loaded() -> None:
+        """読み込み前・期限切れなら再読み込み"""
+        if time.monotonic() - JobTitleGraph._loaded_at < RELOAD_INTERVAL and JobTitleGraph._loaded_at:
+            return
+        try:
+            JobTitleGraph.reload()
+        except Exception as e:
+            logger.warning("職種関連グラフ読み込みエラー: %s", e)
+            JobTitleGraph._loaded_at = time.monotonic()
+
+    @staticmethod
+    def resolve(title: str) -> List[str]:
+        """
+        入力された職種名をグラフ上の職種名に対応付け
+
+        Args:
+            title: 職種名（ユーザー入力など表記ゆれを含む）
+
+        Returns:
+            対応する職種名のリスト（完全一致を優先、なければ部分一致）
+        """
+        JobTitleGraph._ensure_loaded()
+        key = _normalize_title(title)
+        if not key:
+            return []
+
+        nodes = JobTitleGraph._nodes
+        if key in nodes:
+            return list(nodes[key])
+
+        return [t for k, variants in nodes.items() if key in k or k in key for t in variants]
+
+    @staticmethod
+    def related_titles(title: str, limit: int = MAX_NEIGHBORS) -> List[Tuple[str, float]]:
+        """
+        関連職種を関連度順に取得（2ホップまで探索）
+
+        Args:
+            title: 元の職種名
+            limit: 取得件数
+
+        Returns:
+            [(職種名, 関連度)]（元の職種自体は含まない）
+        """
+        sources = JobTitleGraph.resolve(title)
+        if not sources:
+            return []
+
+        graph = JobTitleGraph._graph
+        scores: Dict[str, float] = {}
+
+        for source in sources:
+            for related, weight in graph.get(source, []):
+                scores[related] = max(scores.get(related, 0.0), weight)
+
+        # 1ホップで足りなければ近傍の近傍も減衰させて加える
+        if len(scores) < limit:
+            for first, first_weight in list(scores.items()):
+                for related, weight in graph.get(first, []):
+                    hop_score = first_weight * weight * SECOND_HOP_DECAY
+                    if hop_score > scores.get(related, 0.0):
+                        scores[related] = hop_score
+
+        for source in sources:
+            scores.pop(source, None)
+
+        return sorted(scores.items(), key=lambda x: x[1], reverse=True)[:limit]
+
+
+if __name__ == "__main__":
+    started = datetime.now()
+    count = JobTitleGraph.rebuild()
+    print(f"✅ 職種関連グラフ再構築完了: {count}件 ({(datetime.now() - started).total_seconds():.1f}秒)")
@@ -0,0 +1,219 @@
+"""
+LLMトークン使用量・コストの集計
+
+chat.completions / embeddings のレスポンスの usage を、呼び出し時点の
+利用者（ユーザーのチャットセッション・企業のスカウトセッション）に紐づけて
+ワーカー内に溜め、一定間隔で集計キーごとに合算して llm_usage テーブルに書き込む。
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import date
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import json
+import logging
+import os
+
+from psycopg2.extras import RealDictCursor, execute_values
+
+from config.database import get_db_conn
+from utils.buffered_writer import BufferedWriter
+
+
+logger = logging.getLogger(__name__)
+
+
+# 書き込み間隔（秒）
+LLM_USAGE_FLUSH_SECONDS = float(os.getenv("LLM_USAGE_FLUSH_SECONDS", "30"))
+
+# 1回のINSERTでまとめて送る行数
+LLM_USAGE_FLUSH_BATCH = int(os.getenv("LLM_USAGE_FLUSH_BATCH", "500"))
+
+# モデルごとの単価（USD / 100万トークン: 入力, 出力）
+_DEFAULT_PRICING = {
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+    "text-embedding-ada-002": (0.10, 0.0),
+}
+LLM_PRICING: Dict[str, Tuple[float, float]] = {
+    **_DEFAULT_PRICING,
+    **{model: tuple(price) for model, price in json.loads(os.getenv("LLM_PRICING_JSON", "{}")).items()},
+}
+
+# 呼び出し元の利用者（owner_type, owner_id, session_id）
+_usage_scope: ContextVar[Tuple[str, str, str]] = ContextVar("llm_usage_scope", default=("system", "", ""))
+
+# 集計キー: (日付, owner_type, owner_id, session_id, operation, model)
+_UsageKey = Tuple[date, str, str, str, str, str]
+
+# 1回の呼び出し: (集計キー, [呼び出し回数, 入力トークン, 出力トークン, 推定コスト])
+_Usage = Tuple[_UsageKey, List[float]]
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    """
+    トークン数から推定コスト（USD）を計算
+
+    Args:
+        model: モデル名
+        prompt_tokens: 入力トークン数
+        completion_tokens: 出力トークン数
+
+    Returns:
+        推定コスト（単価未登録のモデルは0）
+    """
+    input_price, output_price = LLM_PRICING.get(model, (0.0, 0.0))
+    return (prompt_tokens * input_price + completion_tokens * output_price) / 1_000_000
+
+
+def set_usage_scope(owner_type: str, owner_id: Any, session_id: Optional[str] = None) -> None:
+    """
+    以降のLLM呼び出しの使用量を指定の利用者に紐づける（現在のリクエスト内のみ有効）
+
+    Args:
+        owner_type: user / company
+        owner_id: ユーザーID・企業ID
+        session_id: チャット・スカウトのセッションID
+    """
+    _usage_scope.set((owner_type, str(owner_id), session_id or ""))
+
+
+@contextmanager
+def usage_scope(owner_type: str, owner_id: Any, session_id: Optional[str] = None) -> Iterator[None]:
+    """with ブロック内のLLM呼び出しを指定の利用者に紐づける"""
+    token = _usage_scope.set((owner_type, str(owner_id), session_id or ""))
+    try:
+        yield
+    finally:
+        _usage_scope.reset(token)
+
+
+def _write(conn, usages: List[_Usage]) -> int:
+    """集計キーごとに合算して llm_usage に加算する（コミットは呼び出し元）"""
+    pending: Dict[_UsageKey, List[float]] = {}
+    for key, values in usages:
+        entry = pending.get(key)
+        if entry is None:
+            pending[key] = list(values)
+        else:
+            for i, value in enumerate(values):
+                entry[i] += value
+
+    rows = [(*key, *values) for key, values in pending.items()]
+    cur = conn.cursor()
+    try:
+        execute_values(cur, """
+            INSERT INTO llm_usage (
+                usage_date, owner_type, owner_id, session_id, operation, model,
+                call_count, prompt_tokens, completion_tokens, estimated_cost_usd
+            ) VALUES %s
+            ON CONFLICT (usage_date, owner_type, owner_id, session_id, operation, model)
+            DO UPDATE SET
+                call_count = llm_usage.call_count + EXCLUDED.call_count,
+                prompt_tokens = llm_usage.prompt_tokens + EXCLUDED.prompt_tokens,
+                completion_tokens = llm_usage.completion_tokens + EXCLUDED.completion_tokens,
+                estimated_cost_usd = llm_usage.estimated_cost_usd + EXCLUDED.estimated_cost_usd,
+                updated_at = CURRENT_TIMESTAMP
+        """, rows, page_size=LLM_USAGE_FLUSH_BATCH)
+    finally:
+        cur.close()
+    return len(rows)
+
+
+class LLMUsageService:
+    """LLM使用量のワーカー内集計と一括書き込み"""
+
+    _writer: BufferedWriter[_Usage] = BufferedWriter(
+        "LLM使用量", write=_write, flush_seconds=LLM_USAGE_FLUSH_SECONDS
+    )
+
+    @staticmethod
+    def record(operation: str, model: Optional[str], usage: Any) -> None:
+        """
+        1回のAPI呼び出しの使用量を記録（書き込み時に集計キーごとに合算する）
+
+        Args:
+            operation: 呼び出し元の処理名
+            model: モデル名
+            usage: レスポンスの usage（prompt_tokens / completion_tokens）
+        """
+        if usage is None:
+            return
+
+        model = model or "unknown"
+        prompt_tokens = getattr(usage, "prompt_tokens", None) or 0
+        completion_tokens = getattr(usage, "completion_tokens", None) or 0
+        cost = estimate_cost(model, prompt_tokens, completion_tokens)
+        owner_type, owner_id, session_id = _usage_scope.get()
+        key = (date.today(), owner_type, owner_id, session_id, operation, model)
+        LLMUsageService._writer.add((key, [1, prompt_tokens, completion_tokens, cost]))
+
+    @staticmethod
+    def flush() -> int:
+        """
+        溜まった使用量を llm_usage に加算して書き込む
+
+        Returns:
+            書き込んだ行数
+        """
+        return LLMUsageService._writer.flush()
+
+    @staticmethod
+    def start_flusher() -> None:
+        """定期書き込みタスクを開始（アプリ起動時に呼ぶ）"""
+        LLMUsageService._writer.start()
+
+    @staticmethod
+    async def stop_flusher() -> None:
+        """定期書き込みタスクを止めて残りを書き込む（アプリ終了時に呼ぶ）"""
+        await LLMUsageService._writer.stop()
+
+    @staticmethod
+    def top_consumers(
+        days: int = 7,
+        group_by: str = "session",
+        owner_type: Optional[str] = None,
+        limit: int = 20
+    ) -> List[Dict[str, Any]]:
+        """
+        推定コストの大きい利用者を取得
+
+        Args:
+            days: 集計対象の日数（今日を含む）
+            group_by: session（セッション単位）/ owner（ユーザー・企業単位）
+            owner_type: user / company で絞り込み
+            limit: 取得件数
+
+        Returns:
+            利用者ごとの呼び出し回数・トークン数・推定コスト
+        """
+        # 自ワーカーの未書き込み分を反映してから集計する
+        LLMUsageService.flush()
+
+        group_columns = "owner_type, owner_id, session_id" if group_by == "session" else "owner_type, owner_id"
+        conditions = ["usage_date > CURRENT_DATE - %s::int"]
+        params: List[Any] = [days]
+        if owner_type:
+            conditions.append("owner_type = %s")
+            params.append(owner_type)
+
+        conn = get_db_conn()
+        cur = conn.cursor(cursor_factory=RealDictCursor)
+        try:
+            cur.execute(f"""
+                SELECT {group_columns},
+                       SUM(call_count) AS call_count,
+                       SUM(prompt_tokens) AS prompt_tokens,
+                       SUM(completion_tokens) AS completion_tokens,
+                       SUM(estimated_cost_usd)::float AS estimated_cost_usd,
+                       MAX(updated_at) AS last_used_at
+                FROM llm_usage
+                WHERE {" AND ".join(conditions)}
+                GROUP BY {group_columns}
+                ORDER BY estimated_cost_usd DESC
+                LIMIT %s
+            """, (*params, limit))
+            return [dict(row) for row in cur.fetchall()]
+        finally:
+            cur.close()
+            conn.close()
@@ -2,15 +2,45 @@
 マッチングサービス
 """
 
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from psycopg2.extras import RealDictCursor
+import os
 from config.database import get_db_conn
+from models.preference_models import UserPreferenceSnapshot
 from utils.scoring_utils import hybrid_scoring
-from utils.helpers import clean_dict_for_json, merge_accumulated_insights
+from utils.helpers import merge_accumulated_insights, serialize_rows
+from utils.pagination import clamp_page_size, decode_cursor, split_page
 from utils.ai_utils import extract_user_intent
+from services.preference_service import PreferenceService
+from services.search_service import JobSearchService
+from services.job_title_graph import JobTitleGraph
+from utils.tracing import span
 import json
 
 
+# おすすめ計算時にSQLで絞り込んだ後、スコアリング対象とする最大件数
+RECOMMENDATION_CANDIDATE_LIMIT = int(os.getenv("RECOMMENDATION_CANDIDATE_LIMIT", "1000"))
+
+# 代替求人検索で辿る関連職種の最大数
+ALTERNATIVE_TITLE_LIMIT = int(os.getenv("ALTERNATIVE_TITLE_LIMIT", "10"))
+
+# スコアリング・表示に必要な列のみ取得（cp.* は長文列も含むため使わない）
+SCORING_COLUMNS = """
+    cp.id, cp.company_id, cd.company_name, cp.job_title, cp.job_description,
+    cp.employment_type, cp.location_prefecture, cp.location_city,
+    cp.salary_min, cp.salary_max, cp.remote_option, cp.required_skills,
+    cp.created_at
+"""
+
+# 一覧表示用の列（JobResponse に必要な列のみ。Layer 3 の自由記述列は含めない）
+JOB_LIST_COLUMNS = """
+    cp.id, cp.company_id, cp.job_title, cp.job_description, cp.employment_type,
+    cp.location_prefecture, cp.location_city, cp.salary_min, cp.salary_max,
+    cp.required_skills, cp.benefits, cp.remote_option, cp.status,
+    cp.created_at, cp.updated_at
+"""
+
+
 class MatchingService:
     """マッチングサービスクラス"""
     
@@ -18,34 +48,39 @@ class MatchingService:
     def search_jobs(
         criteria: Dict[str, Any],
         limit: int = 20,
-        offset: int = 0
-    ) -> List[Dict[str, Any]]:
+        cursor: Optional[str] = None
+    ) -> Dict[str, Any]:
         """
-        求人検索
+        求人検索（created_at, id のキーセットページネーション）
         
         Args:
             criteria: 検索条件
             limit: 取得件数
-            offset: オフセット
+            cursor: 前ページの next_cursor（先頭ページはNone）
             
         Returns:
-            求人リスト
+            求人リストと次ページのカーソル
+            
+        Raises:
+            ValueError: カーソルが不正な場合
         """
-        conn = get_db_conn()
-        cur = conn.cursor(cursor_factory=RealDictCursor)
+        limit = clamp_page_size(limit)
+        
+        # 職種・キーワード（全文検索。指定時は関連度順）
+        text_match = JobSearchService.match(criteria.get("job_title") or "")
+        rank_sql = text_match.rank if text_match else "0::float8"
         
-        query = """
-            SELECT cp.*
+        query = f"""
+            SELECT {JOB_LIST_COLUMNS}, {rank_sql} AS search_rank
             FROM company_profile cp
             WHERE cp.status = 'active'
         """
         
-        params = []
+        params = list(text_match.rank_params) if text_match else []
         
-        # 職種
-        if criteria.get("job_title"):
-            query += " AND cp.job_title ILIKE %s"
-            params.append(f"%{criteria['job_title']}%")
+        if text_match:
+            query += f" AND {text_match.where}"
+            params.extend(text_match.params)
         
         # 勤務地
         if criteria.get("location_prefecture"):
@@ -62,15 +97,41 @@ class MatchingService:
             query += " AND cp.remote_option = %s"
             params.append(criteria["remote_option"])
         
-        query += f" ORDER BY cp.created_at DESC LIMIT {limit} OFFSET {offset}"
+        # 並び順（キーワード指定時は関連度、それ以外は新着）とカーソル以降
+        if text_match:
+            sort_sql = "search_rank"
+            sort_key = lambda r: (r['search_rank'], r['id'])
+            if cursor:
+                query += f" AND ({rank_sql}, cp.id) < (%s, %s)"
+                params.extend(text_match.rank_params)
+                params.extend(decode_cursor(cursor))
+        else:
+            sort_sql = "cp.created_at"
+            sort_key = lambda r: (r['created_at'], r['id'])
+            if cursor:
+                query += " AND (cp.created_at, cp.id) < (%s, %s)"
+                params.extend(decode_cursor(cursor))
         
-        cur.execute(query, tuple(params))
-        jobs = cur.fetchall()
+        query += f" ORDER BY {sort_sql} DESC, cp.id DESC LIMIT %s"
+        params.append(limit + 1)
         
-        cur.close()
-        conn.close()
+        conn = get_db_conn()
+        cur = conn.cursor(cursor_factory=RealDictCursor)
+        
+        try:
+            cur.execute(query, tuple(params))
+            rows = cur.fetchall()
+        finally:
+            cur.close()
+            conn.close()
         
-        return [clean_dict_for_json(dict(job)) for job in jobs]
+        page, next_cursor = split_page(rows, limit, key=sort_key)
+        
+        return {
+            "jobs": serialize_rows(page),
+            "next_cursor": next_cursor,
+            "limit": limit
+        }
     
     @staticmethod
     def get_recommendations(
@@ -89,51 +150,48 @@ class MatchingService:
         Returns:
             おすすめ求人と情報
         """
+        # ユーザープロフィール取得（スナップショットキャッシュ経由）
+        snapshot = PreferenceService.get_snapshot(user_id)
+        user_intent = snapshot.to_intent()
+        
         conn = get_db_conn()
         cur = conn.cursor(cursor_factory=RealDictCursor)
         
-        # ユーザープロフィール取得
-        cur.execute("""
-            SELECT preferences
-            FROM user_preferences_profile
-            WHERE user_id = %s
-        """, (user_id,))
-        
-        profile_row = cur.fetchone()
-        user_preferences = profile_row['preferences'] if profile_row else {}
+        # 求人取得（必須条件はSQL側で絞り込む）
+        constraint_sql, params = MatchingService._build_constraint_filter(snapshot)
         
-        # 求人取得
-        cur.execute("""
-            SELECT cp.*
+        cur.execute(f"""
+            SELECT {SCORING_COLUMNS}
             FROM company_profile cp
+            LEFT JOIN company_date cd ON cp.company_id = cd.company_id
             WHERE cp.status = 'active'
+            {constraint_sql}
             ORDER BY cp.created_at DESC
-            LIMIT 100
-        """)
+            LIMIT %s
+        """, (*params, RECOMMENDATION_CANDIDATE_LIMIT))
         
         jobs = cur.fetchall()
         cur.close()
         conn.close()
         
-        # スコアリング
-        scored_jobs = []
-        for job in jobs:
-            job_dict = clean_dict_for_json(dict(job))
-            
-            # 簡易スコアリング（実際はより詳細に）
-            score_result = hybrid_scoring(
-                user_intent=user_preferences,
-                job=job_dict,
-                use_ai=False  # 高速化のためルールベースのみ
-            )
-            
-            if score_result['score'] >= min_score:
-                scored_jobs.append({
-                    **job_dict,
-                    "match_score": score_result['score'],
-                    "matched_features": score_result.get('matched_features', []),
-                    "concerns": score_result.get('concerns', [])
-                })
+        # スコアリング（絞り込み済みの候補のみ）
+        with span("scoring"):
+            scored_jobs = []
+            for job_dict in serialize_rows(jobs):
+                # 簡易スコアリング（実際はより詳細に）
+                score_result = hybrid_scoring(
+                    user_intent=user_intent,
+                    job=job_dict,
+                    use_ai=False  # 高速化のためルールベースのみ
+                )
+
+                if score_result['score'] >= min_score:
+                    scored_jobs.append({
+                        **job_dict,
+                        "match_score": score_result['score'],
+                        "matched_features": score_result.get('matched_features', []),
+                        "concerns": score_result.get('concerns', [])
+                    })
         
         # スコア順にソート
         scored_jobs.sort(key=lambda x: x['match_score'], reverse=True)
@@ -141,9 +199,47 @@ class MatchingService:
         return {
             "recommendations": scored_jobs[:limit],
             "total_count": len(scored_jobs),
-            "user_preferences": user_preferences
+            "user_preferences": snapshot.to_session_preferences()
         }
     
+    @staticmethod
+    def _build_constraint_filter(snapshot: UserPreferenceSnapshot) -> Tuple[str, List[Any]]:
+        """
+        希望条件のうち必須条件（年収・勤務地・リモート・雇用形態）をWHERE句に変換
+        
+        Args:
+            snapshot: ユーザー希望条件
+            
+        Returns:
+            (追加するWHERE句, パラメータ)
+        """
+        clauses = []
+        params: List[Any] = []
+        
+        # 年収: 求人の上限が希望の下限以上
+        if snapshot.salary_min:
+            clauses.append("cp.salary_max >= %s")
+            params.append(snapshot.salary_min)
+        
+        # 勤務地: 希望都道府県、またはフルリモート求人
+        if snapshot.location_prefecture:
+            clauses.append("(cp.location_prefecture = %s OR cp.remote_option = 'full_remote')")
+            params.append(snapshot.location_prefecture)
+        
+        # リモート
+        remote_options = snapshot.required_remote_options()
+        if remote_options:
+            clauses.append("cp.remote_option = ANY(%s)")
+            params.append(remote_options)
+        
+        # 雇用形態
+        if snapshot.employment_type:
+            clauses.append("cp.employment_type = %s")
+            params.append(snapshot.employment_type)
+        
+        sql = "".join(f" AND {clause}" for clause in clauses)
+        return sql, params
+    
     @staticmethod
     def score_jobs_for_user(
         user_id: str,
@@ -194,24 +290,23 @@ class MatchingService:
         conn.close()
         
         # スコアリング
-        scored_jobs = []
-        for job in jobs:
-            job_dict = clean_dict_for_json(dict(job))
-            
-            score_result = hybrid_scoring(
-                user_intent=user_intent,
-                job=job_dict,
-                accumulated_insights=accumulated_insights,
-                use_ai=use_ai
-            )
-            
-            scored_jobs.append({
-                **job_dict,
-                "match_score": score_result['score'],
-                "reasoning": score_result.get('reasoning', ''),
-                "matched_features": score_result.get('matched_features', []),
-                "concerns": score_result.get('concerns', [])
-            })
+        with span("scoring"):
+            scored_jobs = []
+            for job_dict in serialize_rows(jobs):
+                score_result = hybrid_scoring(
+                    user_intent=user_intent,
+                    job=job_dict,
+                    accumulated_insights=accumulated_insights,
+                    use_ai=use_ai
+                )
+
+                scored_jobs.append({
+                    **job_dict,
+                    "match_score": score_result['score'],
+                    "reasoning": score_result.get('reasoning', ''),
+                    "matched_features": score_result.get('matched_features', []),
+                    "concerns": score_result.get('concerns', [])
+                })
         
         # スコア順にソート
         scored_jobs.sort(key=lambda x: x['match_score'], reverse=True)
@@ -225,7 +320,7 @@ class MatchingService:
         limit: int = 20
     ) -> List[Dict[str, Any]]:
         """
-        代替求人を検索
+        代替求人を検索（関連職種グラフの近傍職種の求人）
         
         Args:
             original_job_title: 元の職種
@@ -235,21 +330,70 @@ class MatchingService:
         Returns:
             代替求人リスト
         """
+        related = JobTitleGraph.related_titles(original_job_title, limit=ALTERNATIVE_TITLE_LIMIT)
+        if not related:
+            return MatchingService._find_jobs_by_title_text(original_job_title, limit)
+        
+        titles = [title for title, _ in related]
+        relation_scores = dict(related)
+        
+        # 関連職種の求人を関連度順に一括取得（job_title の等価比較でインデックスを使う）
         conn = get_db_conn()
         cur = conn.cursor(cursor_factory=RealDictCursor)
         
-        # 類似職種を検索（簡易版）
-        cur.execute("""
-            SELECT cp.*
+        cur.execute(f"""
+            SELECT {SCORING_COLUMNS}
             FROM company_profile cp
+            LEFT JOIN company_date cd ON cp.company_id = cd.company_id
             WHERE cp.status = 'active'
-            AND cp.job_title ILIKE %s
-            ORDER BY cp.created_at DESC
+            AND cp.job_title = ANY(%s)
+            ORDER BY array_position(%s::text[], cp.job_title::text), cp.created_at DESC
+            LIMIT %s
+        """, (titles, titles, limit))
+        
+        jobs = cur.fetchall()
+        cur.close()
+        conn.close()
+        
+        if not jobs:
+            return MatchingService._find_jobs_by_title_text(original_job_title, limit)
+        
+        return serialize_rows(
+            {**job, "relation_score": relation_scores.get(job["job_title"], 0.0)}
+            for job in jobs
+        )
+    
+    @staticmethod
+    def _find_jobs_by_title_text(job_title: str, limit: int) -> List[Dict[str, Any]]:
+        """
+        職種名の全文検索で求人を検索（関連職種グラフに該当がない場合のフォールバック）
+        
+        Args:
+            job_title: 職種名
+            limit: 取得件数
+            
+        Returns:
+            求人リスト（関連度順）
+        """
+        title_match = JobSearchService.match(job_title, title_only=True)
+        if title_match is None:
+            return []
+        
+        conn = get_db_conn()
+        cur = conn.cursor(cursor_factory=RealDictCursor)
+        
+        cur.execute(f"""
+            SELECT {SCORING_COLUMNS}, {title_match.rank} AS search_rank
+            FROM company_profile cp
+            LEFT JOIN company_date cd ON cp.company_id = cd.company_id
+            WHERE cp.status = 'active'
+            AND {title_match.where}
+            ORDER BY search_rank DESC, cp.created_at DESC
             LIMIT %s
-        """, (f"%{original_job_title}%", limit))
+        """, (*title_match.rank_params, *title_match.params, limit))
         
         jobs = cur.fetchall()
         cur.close()
         conn.close()
         
-        return [clean_dict_for_json(dict(job)) for job in jobs]
+        return serialize_rows(jobs)
@@ -0,0 +1,111 @@
+"""
+ユーザー希望条件（Step2）読み込みサービス
+"""
+
+from typing import Any, Dict, Iterable
+import os
+from psycopg2.extras import RealDictCursor
+
+from config.database import get_db_conn
+from models.preference_models import UserPreferenceSnapshot
+from utils.cache import TTLCache
+
+
+PREFERENCE_CACHE_TTL = float(os.getenv("PREFERENCE_CACHE_TTL_SECONDS", "300"))
+PREFERENCE_CACHE_SIZE = int(os.getenv("PREFERENCE_CACHE_SIZE", "10000"))
+
+_PREFERENCE_COLUMNS = """
+    user_id, job_title, location_prefecture, location_city,
+    salary_min, salary_max, remote_work_preference, employment_type,
+    industry_preferences, work_hours_preference, company_size_preference,
+    updated_at
+"""
+
+
+class PreferenceService:
+    """希望条件スナップショットの取得とキャッシュ管理"""
+
+    _cache = TTLCache("user_preferences", maxsize=PREFERENCE_CACHE_SIZE, ttl=PREFERENCE_CACHE_TTL)
+
+    @staticmethod
+    def get_snapshot(user_id: Any) -> UserPreferenceSnapshot:
+        """
+        ユーザーの希望条件スナップショットを取得
+
+        Args:
+            user_id: ユーザーID
+
+        Returns:
+            UserPreferenceSnapshot（行がなければ found=False）
+        """
+        return PreferenceService.get_snapshots([user_id])[str(user_id)]
+
+    @staticmethod
+    def get_snapshots(user_ids: Iterable[Any]) -> Dict[str, UserPreferenceSnapshot]:
+        """
+        複数ユーザーの希望条件スナップショットを取得（未キャッシュ分は1クエリで読み込み）
+
+        Args:
+            user_ids: ユーザーIDのリスト
+
+        Returns:
+            {str(user_id): UserPreferenceSnapshot}
+        """
+        snapshots: Dict[str, UserPreferenceSnapshot] = {}
+        missing = {}
+
+        for user_id in user_ids:
+            key = str(user_id)
+            cached = PreferenceService._cache.get(key)
+            if cached is not None:
+                snapshots[key] = cached
+            else:
+                missing[key] = user_id
+
+        if missing:
+            loaded = PreferenceService._load(list(missing.values()))
+            for key in missing:
+                snapshot = loaded.get(key) or UserPreferenceSnapshot(user_id=key)
+                PreferenceService._cache.set(key, snapshot)
+                snapshots[key] = snapshot
+
+        return snapshots
+
+    @staticmethod
+    def invalidate(user_id: Any) -> None:
+        """
+        キャッシュを無効化（Step2保存・プロフィール更新時に呼び出す）
+
+        Args:
+            user_id: ユーザーID
+        """
+        PreferenceService._cache.invalidate(str(user_id))
+
+    @staticmethod
+    def _load(user_ids: list) -> Dict[str, UserPreferenceSnapshot]:
+        """DBから希望条件をまとめて読み込む"""
+        conn = get_db_conn()
+        cur = conn.cursor(cursor_factory=RealDictCursor)
+
+        try:
+            cur.execute(f"""
+                SELECT {_PREFERENCE_COLUMNS}
+                FROM user_preferences_profile
+                WHERE user_id IN %s
+            """, (tuple(user_ids),))
+
+            return {
+                str(row["user_id"]): UserPreferenceSnapshot(
+                    **{
+                        **row,
+                        "user_id": str(row["user_id"]),
+                        "industry_preferences": row["industry_preferences"] or [],
+                    },
+                    found=True
+                )
+                for row in cur.fetchall()
+            }
+
+        finally:
+            cur.close()
+            conn.close()
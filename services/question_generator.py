@@ -2,11 +2,16 @@
 AIによる動的質問生成サービス
 """
 
+import logging
 import os
 from typing import Dict, Any, List
 from openai import OpenAI
 
 from models.chat_models import QuestionContext, GeneratedQuestion
+from utils.ai_utils import create_chat_completion
+
+
+logger = logging.getLogger(__name__)
 
 
 class QuestionGenerator:
@@ -44,7 +49,9 @@ class QuestionGenerator:
         
         # OpenAI APIで質問生成
         try:
-            response = self.client.chat.completions.create(
+            response = create_chat_completion(
+                "generate_question",
+                openai_client=self.client,
                 model=self.model,
                 messages=messages,
                 temperature=0.7,
@@ -64,7 +71,7 @@ class QuestionGenerator:
             )
             
         except Exception as e:
-            print(f"❌ 質問生成エラー: {e}")
+            logger.warning("質問生成エラー: %s", e)
             # フォールバック質問
             return self._fallback_question(context)
     
@@ -2,11 +2,46 @@
 会話内容からマッチ度をスコアリングするサービス
 """
 
+import logging
 import os
 from typing import Dict, Any, List
 from openai import OpenAI
 
 from models.chat_models import ScoringInput, ScoringResult
+from utils.ai_utils import create_chat_completion
+
+
+logger = logging.getLogger(__name__)
+
+
+# キーワードパターン
+KEYWORD_PATTERNS = {
+    'skills': ['React', 'Python', 'JavaScript', 'Photoshop', 'Illustrator', 'Figma', 'HTML', 'CSS'],
+    'work_style': ['リモート', 'フレックス', '週3', '週4', '在宅'],
+    'environment': ['少人数', 'スタートアップ', 'ベンチャー', '大企業'],
+    'experience': ['経験', '実務', 'プロジェクト', 'チーム']
+}
+
+
+def extract_keywords(text: str) -> List[str]:
+    """
+    テキストに含まれるキーワードを抽出
+    
+    Args:
+        text: ユーザーのメッセージ（複数ターン分を連結したものも可）
+        
+    Returns:
+        キーワードのリスト（重複なし、最大10個）
+    """
+    keywords = []
+    lowered = text.lower()
+    
+    for category, patterns in KEYWORD_PATTERNS.items():
+        for pattern in patterns:
+            if pattern.lower() in lowered:
+                keywords.append(pattern)
+    
+    return list(set(keywords))[:10]  # 重複削除、最大10個
 
 
 class ScoringService:
@@ -32,7 +67,9 @@ class ScoringService:
         
         # OpenAI APIでスコア計算
         try:
-            response = self.client.chat.completions.create(
+            response = create_chat_completion(
+                "calculate_score",
+                openai_client=self.client,
                 model=self.model,
                 messages=[
                     {"role": "system", "content": system_prompt},
@@ -61,7 +98,7 @@ class ScoringService:
             )
             
         except Exception as e:
-            print(f"❌ スコア計算エラー: {e}")
+            logger.warning("スコア計算エラー: %s", e)
             # フォールバック: ルールベーススコア
             return self._fallback_scoring(scoring_input)
     
@@ -127,8 +164,6 @@ class ScoringService:
     def _extract_keywords(self, scoring_input: ScoringInput) -> List[str]:
         """会話からキーワードを抽出"""
         
-        keywords = []
-        
         # ユーザーメッセージのみを抽出
         user_messages = [
             msg['content'] 
@@ -136,22 +171,7 @@ class ScoringService:
             if msg['role'] == 'user'
         ]
         
-        all_text = " ".join(user_messages)
-        
-        # キーワードパターン
-        keyword_patterns = {
-            'skills': ['React', 'Python', 'JavaScript', 'Photoshop', 'Illustrator', 'Figma', 'HTML', 'CSS'],
-            'work_style': ['リモート', 'フレックス', '週3', '週4', '在宅'],
-            'environment': ['少人数', 'スタートアップ', 'ベンチャー', '大企業'],
-            'experience': ['経験', '実務', 'プロジェクト', 'チーム']
-        }
-        
-        for category, patterns in keyword_patterns.items():
-            for pattern in patterns:
-                if pattern.lower() in all_text.lower():
-                    keywords.append(pattern)
-        
-        return list(set(keywords))[:10]  # 重複削除、最大10個
+        return extract_keywords(" ".join(user_messages))
     
     def _fallback_scoring(self, scoring_input: ScoringInput) -> ScoringResult:
         """フォールバック: ルールベースのスコアリング"""
@@ -0,0 +1,140 @@
+"""
+求人全文検索サービス
+
+company_profile の search_vector（2-gram tsvector）と search_text（pg_trgm）を使い、
+ILIKE '%…%' の全件走査を避けてインデックス検索とランキングを行う。
+列はトリガー（db_schema_complete.sql の company_profile_search_update）で維持される。
+"""
+
+from typing import Any, List, NamedTuple, Optional
+import re
+import string
+import unicodedata
+
+
+# job_search_grams()（SQL側）と同じ区切り文字
+_TOKEN_SPLIT = re.compile(r"[\s" + re.escape(string.punctuation) + r"・、。「」『』【】〜]+")
+
+# 曖昧一致（pg_trgm）を併用する最小文字数（trigramは3文字未満では効かない）
+TRIGRAM_MIN_LENGTH = 3
+
+# 都道府県の接尾辞
+_PREFECTURE_SUFFIXES = ("都", "道", "府", "県")
+
+
+class SearchClause(NamedTuple):
+    """WHERE句とランキング式"""
+    where: str
+    params: List[Any]
+    rank: str
+    rank_params: List[Any]
+
+
+class JobSearchService:
+    """求人のテキスト検索条件を構築する"""
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """NFKC正規化＋小文字化（SQL側の lower(normalize(..., NFKC)) に対応）"""
+        return unicodedata.normalize("NFKC", text or "").lower().strip()
+
+    @staticmethod
+    def grams(text: str) -> List[str]:
+        """
+        テキストを2-gramに分割（SQL側の job_search_grams() と同じ規則）
+
+        Args:
+            text: 検索語
+
+        Returns:
+            重複を除いた2-gram（1文字のトークンはそのまま）
+        """
+        result: List[str] = []
+        for token in _TOKEN_SPLIT.split(JobSearchService.normalize(text)):
+            if len(token) == 1:
+                result.append(token)
+            else:
+                result.extend(token[i:i + 2] for i in range(len(token) - 1))
+        return list(dict.fromkeys(result))
+
+    @staticmethod
+    def build_tsquery(text: str, title_only: bool = False) -> Optional[str]:
+        """
+        2-gramのAND条件をtsquery文字列として構築
+
+        Args:
+            text: 検索語
+            title_only: True の場合、職種名（重みA）のみに一致させる
+
+        Returns:
+            tsquery文字列（検索語が空ならNone）
+        """
+        grams = JobSearchService.grams(text)
+        if not grams:
+            return None
+
+        weight = "A" if title_only else ""
+        terms = []
+        for gram in grams:
+            quoted = "'" + gram.replace("\\", "\\\\").replace("'", "''") + "'"
+            # 1文字の検索語は前方一致（2-gramの先頭文字に一致させる）
+            suffix = f":*{weight}" if len(gram) == 1 else (f":{weight}" if weight else "")
+            terms.append(quoted + suffix)
+        return " & ".join(terms)
+
+    @staticmethod
+    def match(text: str, alias: str = "cp", title_only: bool = False) -> Optional[SearchClause]:
+        """
+        テキスト検索条件を構築
+
+        Args:
+            text: 検索語
+            alias: company_profile のテーブル別名
+            title_only: 職種名のみを対象にするか
+
+        Returns:
+            SearchClause（検索語が空ならNone）
+        """
+        tsquery = JobSearchService.build_tsquery(text, title_only=title_only)
+        if tsquery is None:
+            return None
+
+        term = JobSearchService.normalize(text)
+        where = f"{alias}.search_vector @@ %s::tsquery"
+        params: List[Any] = [tsquery]
+
+        # 3文字以上なら表記ゆれ対策として trigram の曖昧一致も許可
+        if len(term) >= TRIGRAM_MIN_LENGTH:
+            if title_only:
+                where = f"({where} OR {alias}.job_title %% %s)"
+            else:
+                where = f"({where} OR {alias}.search_text %%> %s)"
+            params.append(term)
+
+        rank = (
+            f"(ts_rank({alias}.search_vector, %s::tsquery)"
+            f" + similarity({alias}.job_title, %s))::float8"
+        )
+        return SearchClause(where=where, params=params, rank=rank, rank_params=[tsquery, term])
+
+    @staticmethod
+    def location_match(location: str, alias: str = "cp") -> Optional[SearchClause]:
+        """
+        勤務地の一致条件を構築（「東京」「東京都」のどちらでも等価比較でインデックスを使う）
+
+        Args:
+            location: 希望勤務地（都道府県名または市区町村名）
+            alias: company_profile のテーブル別名
+
+        Returns:
+            SearchClause（勤務地が空ならNone）
+        """
+        location = unicodedata.normalize("NFKC", location or "").strip()
+        if not location:
+            return None
+
+        stem = location[:-1] if location.endswith(_PREFECTURE_SUFFIXES) and len(location) > 2 else location
+        prefectures = list(dict.fromkeys([location, stem, *[stem + s for s in _PREFECTURE_SUFFIXES]]))
+
+        where = f"({alias}.location_prefecture = ANY(%s) OR {alias}.location_city = %s)"
+        return SearchClause(where=where, params=[prefectures, location], rank="0", rank_params=[])
@@ -0,0 +1,215 @@
+"""
+システム統計・企業別統計
+
+集計はマテリアライズドビュー（system_stats / company_stats）に持たせ、
+定期タスクが STATS_REFRESH_SECONDS ごとに REFRESH MATERIALIZED VIEW CONCURRENTLY で作り直す。
+管理者APIや企業ダッシュボードはビューの1行を読むだけで、リクエストのたびに全件を集計しない。
+
+- 作り直しは advisory lock で1ワーカーに限り、他のワーカーが直前に作り直していれば何もしない
+- 作り直し中も CONCURRENTLY のため参照はブロックされない
+- 読み出した行は各ワーカーで STATS_CACHE_SECONDS 秒保持する
+
+実行:
+    python -m services.stats_service
+"""
+
+from datetime import datetime
+from typing import Any, Dict, Optional
+import asyncio
+import logging
+import os
+
+from psycopg2.extras import RealDictCursor
+
+from config.database import get_db_conn
+from utils.cache import TTLCache
+
+
+logger = logging.getLogger(__name__)
+
+
+# 統計ビューを作り直す間隔（秒、0で無効）
+STATS_REFRESH_SECONDS = float(os.getenv("STATS_REFRESH_SECONDS", "300"))
+
+# 読み出した統計をワーカー内に保持する時間（秒）
+STATS_CACHE_SECONDS = float(os.getenv("STATS_CACHE_SECONDS", "60"))
+
+# 作り直す順（system_stats の refreshed_at を最終更新日時として使うため最後にする）
+STATS_VIEWS = ("company_stats", "system_stats")
+
+_ADVISORY_LOCK_KEY = 0x7374617473  # "stats"
+
+# 企業の統計行がまだない場合（ビューの作り直し前に登録された企業など）の値
+_EMPTY_COMPANY_STATS = {
+    "total_jobs": 0,
+    "active_jobs": 0,
+    "job_views": 0,
+    "job_applies": 0,
+    "scouts_sent": 0,
+    "scouts_sent_this_month": 0,
+    "scouts_read": 0,
+    "scouts_replied": 0,
+    "avg_scout_match_score": None,
+    "refreshed_at": None,
+}
+
+
+def _rate(numerator: Optional[int], denominator: Optional[int]) -> float:
+    """割合（%、小数第1位まで）"""
+    if not denominator:
+        return 0.0
+    return round(100.0 * (numerator or 0) / denominator, 1)
+
+
+def _with_rates(row: Dict[str, Any]) -> Dict[str, Any]:
+    """スカウトの既読率・返信率を付ける"""
+    stats = dict(row)
+    stats["scout_read_rate"] = _rate(stats["scouts_read"], stats["scouts_sent"])
+    stats["scout_reply_rate"] = _rate(stats["scouts_replied"], stats["scouts_sent"])
+    return stats
+
+
+class StatsService:
+    """統計ビューの定期更新と読み出し"""
+
+    _task: Optional[asyncio.Task] = None
+    _cache = TTLCache("stats", maxsize=4096, ttl=STATS_CACHE_SECONDS)
+
+    @staticmethod
+    def refresh(min_age_seconds: float = 0) -> bool:
+        """
+        統計ビューを作り直す
+
+        Args:
+            min_age_seconds: 最後の作り直しがこの秒数より新しければ何もしない
+
+        Returns:
+            作り直した場合True（他のワーカーが実行中・作り直し不要ならFalse）
+        """
+        conn = get_db_conn()
+        cur = conn.cursor()
+        try:
+            cur.execute("SELECT pg_try_advisory_xact_lock(%s)", (_ADVISORY_LOCK_KEY,))
+            if not cur.fetchone()[0]:
+                conn.rollback()
+                return False
+
+            if min_age_seconds > 0:
+                cur.execute("""
+                    SELECT refreshed_at > CURRENT_TIMESTAMP - make_interval(secs => %s)
+                    FROM system_stats
+                """, (min_age_seconds,))
+                row = cur.fetchone()
+                if row is not None and row[0]:
+                    conn.rollback()
+                    return False
+
+            for view in STATS_VIEWS:
+                cur.execute(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {view}")
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            logger.error("統計ビューの更新エラー: %s", e)
+            raise
+        finally:
+            cur.close()
+            conn.close()
+
+        StatsService._cache.clear()
+        return True
+
+    @staticmethod
+    def get_system_stats() -> Dict[str, Any]:
+        """
+        システム全体の統計（ワーカー内に STATS_CACHE_SECONDS 秒キャッシュ）
+
+        Returns:
+            ユーザー・企業・求人・セッション・スカウトの件数と率、refreshed_at
+        """
+        stats = StatsService._cache.get("system")
+        if stats is not None:
+            return stats
+
+        conn = get_db_conn()
+        cur = conn.cursor(cursor_factory=RealDictCursor)
+        try:
+            cur.execute("""
+                SELECT total_users, new_users_7d, total_companies, total_jobs, active_jobs,
+                       total_sessions, sessions_7d, avg_session_match_percentage,
+                       scouts_sent, scouts_read, scouts_replied, avg_scout_match_score,
+                       refreshed_at
+                FROM system_stats
+            """)
+            row = cur.fetchone()
+        finally:
+            cur.close()
+            conn.close()
+
+        stats = _with_rates(row)
+        StatsService._cache.set("system", stats)
+        return stats
+
+    @staticmethod
+    def get_company_stats(company_id: str) -> Dict[str, Any]:
+        """
+        企業ごとの統計（ワーカー内に STATS_CACHE_SECONDS 秒キャッシュ）
+
+        Args:
+            company_id: 企業ID
+
+        Returns:
+            求人数・求人の閲覧/応募数・スカウトの件数と率、refreshed_at
+        """
+        key = ("company", str(company_id))
+        stats = StatsService._cache.get(key)
+        if stats is not None:
+            return stats
+
+        conn = get_db_conn()
+        cur = conn.cursor(cursor_factory=RealDictCursor)
+        try:
+            cur.execute("""
+                SELECT total_jobs, active_jobs, job_views, job_applies,
+                       scouts_sent, scouts_sent_this_month, scouts_read, scouts_replied,
+                       avg_scout_match_score, refreshed_at
+                FROM company_stats
+                WHERE company_id = %s
+            """, (company_id,))
+            row = cur.fetchone()
+        finally:
+            cur.close()
+            conn.close()
+
+        stats = _with_rates(row or _EMPTY_COMPANY_STATS)
+        StatsService._cache.set(key, stats)
+        return stats
+
+    @staticmethod
+    async def _refresh_loop() -> None:
+        while True:
+            await asyncio.sleep(STATS_REFRESH_SECONDS)
+            try:
+                # 全ワーカーが同じ周期で動くため、直前に他のワーカーが作り直していれば飛ばす
+                await asyncio.to_thread(StatsService.refresh, STATS_REFRESH_SECONDS / 2)
+            except Exception:
+                # エラーは記録済み。次の周期で再試行する
+                pass
+
+    @staticmethod
+    def start_refresher() -> None:
+        """定期更新タスクを開始（アプリ起動時に呼ぶ）"""
+        if StatsService._task is None and STATS_REFRESH_SECONDS > 0:
+            StatsService._task = asyncio.get_running_loop().create_task(StatsService._refresh_loop())
+
+    @staticmethod
+    def stop_refresher() -> None:
+        """定期更新タスクを止める（アプリ終了時に呼ぶ）"""
+        if StatsService._task is not None:
+            StatsService._task.cancel()
+            StatsService._task = None
+
+
+if __name__ == "__main__":
+    started = datetime.now()
+    StatsService.refresh()
+    print(f"✅ 統計ビュー更新完了 ({(datetime.now() - started).total_seconds():.1f}秒)")
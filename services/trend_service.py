@@ -0,0 +1,590 @@
+"""
+嗜好トレンド集計
+
+conversation_logs.extracted_intent / conversation_turns.extracted_info を
+前回処理したIDの続きから一定件数ずつ読み、(preference_key, preference_value) ごとに
+global_preference_trends へ加算する。過去のログは読み直さない。
+
+- occurrence_count: 出現回数
+- unique_users: ユーザー数（HyperLogLog のスケッチを user_sketch に保存して近似）
+- trend_score: 半減期 TREND_HALF_LIFE_DAYS で減衰させた出現回数（last_detected 時点の値）
+
+同じ値をログの日時の週ごとにも weekly_preference_trends へ加算し、
+週ごとのスナップショット（その週の上位の嗜好・行動イベントの集計）を current_weekly_trends に保存する。
+
+実行:
+    python -m services.trend_service
+"""
+
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import asyncio
+import logging
+import os
+import unicodedata
+
+from psycopg2.extras import RealDictCursor, execute_values
+
+from config.database import get_db_conn
+from utils.cache import TTLCache
+from utils.hll import HyperLogLog
+
+
+logger = logging.getLogger(__name__)
+
+
+# 1回の処理で読むログの行数（ソースごと）
+TREND_BATCH_SIZE = int(os.getenv("TREND_BATCH_SIZE", "5000"))
+
+# 定期集計の間隔（秒、0で無効）
+TREND_AGGREGATION_SECONDS = float(os.getenv("TREND_AGGREGATION_SECONDS", "300"))
+
+# trend_score の半減期（日）
+TREND_HALF_LIFE_DAYS = float(os.getenv("TREND_HALF_LIFE_DAYS", "7"))
+
+# 書き込み中のトランザクションの行を読み飛ばさないよう、直近この秒数の行は次回に回す
+# （ソースの created_at は書き込み時刻であること。conversation_turns はDBの既定値で入れる）
+TREND_COMMIT_LAG_SECONDS = int(os.getenv("TREND_COMMIT_LAG_SECONDS", "60"))
+
+# 週次スナップショットを作り直す間隔（秒）
+TREND_SNAPSHOT_SECONDS = float(os.getenv("TREND_SNAPSHOT_SECONDS", "3600"))
+
+# 読み出したスナップショットをワーカー内に保持する時間（秒）
+TREND_SNAPSHOT_CACHE_SECONDS = float(os.getenv("TREND_SNAPSHOT_CACHE_SECONDS", "300"))
+
+# スナップショットに含めるカテゴリごとの嗜好・求人の件数
+TREND_SNAPSHOT_TOP_N = int(os.getenv("TREND_SNAPSHOT_TOP_N", "20"))
+
+# (テーブル, 意図のJSONB列)
+TREND_SOURCES = (
+    ("conversation_logs", "extracted_intent"),
+    ("conversation_turns", "extracted_info"),
+)
+
+# 複数ワーカーで同時に集計しないためのアドバイザリロックのキー
+_ADVISORY_LOCK_KEY = 0x7472656E64  # "trend"
+
+_MAX_KEY_LENGTH = 100
+_MAX_VALUE_LENGTH = 200
+
+_HALF_LIFE_SECONDS = TREND_HALF_LIFE_DAYS * 86400
+
+# (preference_key, preference_value)
+_TrendKey = Tuple[str, str]
+
+# (week_start, preference_key, preference_value)
+_WeeklyKey = Tuple[date, str, str]
+
+
+# 1週間分のスナップショットを1文で作成して保存する
+# （嗜好はその週の出現回数・ユーザー数を週末時点の減衰スコア順に、行動イベントは週の範囲を1回だけ走査）
+_SNAPSHOT_SQL = """
+WITH bounds AS (
+    SELECT %(week_start)s::date AS week_start, %(week_start)s::date + 7 AS week_end
+),
+thresholds AS (
+    SELECT
+        COALESCE(MAX(threshold_value) FILTER (WHERE threshold_name = 'high_demand_threshold'), 10) AS high,
+        COALESCE(MAX(threshold_value) FILTER (WHERE threshold_name = 'medium_demand_threshold'), 5) AS medium
+    FROM trend_thresholds
+),
+scored AS (
+    SELECT COALESCE(w.category, 'other') AS category, w.preference_key, w.preference_value,
+           w.occurrence_count, w.unique_users,
+           w.trend_score * POWER(
+               2, -EXTRACT(EPOCH FROM (LEAST(b.week_end, NOW()) - w.last_detected)) / %(half_life_seconds)s
+           ) AS score
+    FROM weekly_preference_trends w, bounds b
+    WHERE w.week_start = b.week_start
+),
+ranked AS (
+    SELECT *, ROW_NUMBER() OVER (PARTITION BY category ORDER BY score DESC) AS rank
+    FROM scored
+),
+preferences AS (
+    SELECT r.category, jsonb_agg(jsonb_build_object(
+               'key', r.preference_key,
+               'value', r.preference_value,
+               'occurrences', r.occurrence_count,
+               'unique_users', r.unique_users,
+               'score', ROUND(r.score::numeric, 3),
+               'demand', CASE WHEN r.occurrence_count >= t.high THEN 'high'
+                              WHEN r.occurrence_count >= t.medium THEN 'medium'
+                              ELSE 'low' END
+           ) ORDER BY r.rank) AS items
+    FROM ranked r, thresholds t
+    WHERE r.rank <= %(top_n)s
+    GROUP BY r.category
+),
+interactions AS (
+    SELECT GROUPING(ui.job_id) = 1 AS is_total, ui.job_id,
+           COUNT(*) FILTER (WHERE ui.interaction_type = 'view') AS views,
+           COUNT(*) FILTER (WHERE ui.interaction_type = 'click') AS clicks,
+           COUNT(*) FILTER (WHERE ui.interaction_type = 'favorite') AS favorites,
+           COUNT(*) FILTER (WHERE ui.interaction_type = 'apply') AS applies,
+           COUNT(DISTINCT ui.user_id) AS users
+    FROM user_interactions ui, bounds b
+    WHERE ui.created_at >= b.week_start AND ui.created_at < b.week_end
+    GROUP BY GROUPING SETS ((ui.job_id), ())
+),
+top_jobs AS (
+    SELECT jsonb_agg(jsonb_build_object(
+               'job_id', i.job_id,
+               'job_title', cp.job_title,
+               'views', i.views,
+               'clicks', i.clicks,
+               'favorites', i.favorites,
+               'applies', i.applies,
+               'users', i.users
+           ) ORDER BY i.applies DESC, i.clicks DESC, i.views DESC) AS items
+    FROM (
+        SELECT * FROM interactions
+        WHERE NOT is_total
+        ORDER BY applies DESC, clicks DESC, views DESC
+        LIMIT %(top_n)s
+    ) i
+    JOIN company_profile cp ON cp.id = i.job_id
+),
+snapshot AS (
+    SELECT b.week_start, jsonb_build_object(
+               'week_start', b.week_start,
+               'week_end', b.week_end,
+               'preferences', COALESCE((SELECT jsonb_object_agg(category, items) FROM preferences), '{}'::jsonb),
+               'interactions', (
+                   SELECT jsonb_build_object(
+                       'views', views, 'clicks', clicks, 'favorites', favorites,
+                       'applies', applies, 'users', users
+                   )
+                   FROM interactions WHERE is_total
+               ),
+               'top_jobs', COALESCE((SELECT items FROM top_jobs), '[]'::jsonb)
+           ) AS trend_data
+    FROM bounds b
+)
+INSERT INTO current_weekly_trends (week_start, trend_data, generated_at)
+SELECT week_start, trend_data, CURRENT_TIMESTAMP FROM snapshot
+-- 他のワーカーが直近に作成済みなら集計自体を行わない
+WHERE NOT EXISTS (
+    SELECT 1 FROM current_weekly_trends
+    WHERE week_start = %(week_start)s::date
+      AND generated_at > CURRENT_TIMESTAMP - %(min_age_seconds)s * INTERVAL '1 second'
+)
+ON CONFLICT (week_start) DO UPDATE SET
+    trend_data = EXCLUDED.trend_data,
+    generated_at = EXCLUDED.generated_at
+RETURNING week_start, trend_data, generated_at
+"""
+
+
+def week_start_of(day: date) -> date:
+    """その日を含む週の月曜日"""
+    return day - timedelta(days=day.weekday())
+
+
+def _normalize_value(value: Any) -> str:
+    """比較用の正規化（NFKC＋小文字化）"""
+    return unicodedata.normalize("NFKC", str(value)).lower().strip()[:_MAX_VALUE_LENGTH]
+
+
+def extract_preferences(intent: Dict[str, Any]) -> Iterator[Tuple[str, str, str]]:
+    """
+    抽出済みの意図から (preference_key, preference_value, category) を列挙
+
+    Args:
+        intent: extract_user_intent の出力形式の辞書
+
+    Yields:
+        (キー, 正規化した値, カテゴリ)
+    """
+    for field, key in (("keywords", "keyword"), ("pain_points", "pain_point"), ("flexible_needs", "flexible_need")):
+        for value in intent.get(field) or []:
+            if isinstance(value, (str, int, float)) and str(value).strip():
+                yield key, _normalize_value(value), key
+
+    for field, category in (("explicit_preferences", "explicit"), ("implicit_values", "implicit")):
+        preferences = intent.get(field) or {}
+        if not isinstance(preferences, dict):
+            continue
+        for name, value in preferences.items():
+            key = f"{category}.{name}"[:_MAX_KEY_LENGTH]
+            values = value if isinstance(value, list) else [value]
+            for item in values:
+                if isinstance(item, (str, int, float, bool)) and str(item).strip():
+                    yield key, _normalize_value(item), category
+
+
+def _decay(seconds: float) -> float:
+    """経過秒数に対する減衰率"""
+    return 2.0 ** (-seconds / _HALF_LIFE_SECONDS)
+
+
+class _TrendDelta:
+    """1バッチ分の1キーの加算量"""
+
+    __slots__ = ("category", "count", "sketch", "last_detected", "weight")
+
+    def __init__(self, category: str):
+        self.category = category
+        self.count = 0
+        self.sketch = HyperLogLog()
+        self.last_detected: Optional[datetime] = None
+        # バッチ内の最新時刻の時点での減衰付き出現回数
+        self.weight = 0.0
+
+
+class TrendService:
+    """嗜好トレンドの差分集計と週次スナップショット"""
+
+    _task: Optional[asyncio.Task] = None
+    _snapshot_cache = TTLCache("weekly_trends", maxsize=16, ttl=TREND_SNAPSHOT_CACHE_SECONDS)
+
+    @staticmethod
+    def aggregate(max_batches: Optional[int] = None) -> int:
+        """
+        未処理のログがなくなるまで（または max_batches 回）集計
+
+        Args:
+            max_batches: 最大バッチ数（None は制限なし）
+
+        Returns:
+            処理したログの行数
+        """
+        total = 0
+        batches = 0
+        while max_batches is None or batches < max_batches:
+            processed, has_more = TrendService.run_batch()
+            total += processed
+            batches += 1
+            if not has_more:
+                break
+        return total
+
+    @staticmethod
+    def run_batch() -> Tuple[int, bool]:
+        """
+        各ソースから最大 TREND_BATCH_SIZE 行を読み、1トランザクションで加算してウォーターマークを進める
+
+        Returns:
+            (処理した行数, 未処理の行が残っているか)
+        """
+        conn = get_db_conn()
+        cur = conn.cursor()
+        try:
+            cur.execute("SELECT pg_try_advisory_xact_lock(%s)", (_ADVISORY_LOCK_KEY,))
+            if not cur.fetchone()[0]:
+                conn.rollback()
+                return 0, False
+
+            rows: List[Tuple[Any, ...]] = []
+            has_more = False
+            for table, column in TREND_SOURCES:
+                source_rows, last_id, source_has_more = TrendService._read_source(cur, table, column)
+                rows.extend(source_rows)
+                has_more = has_more or source_has_more
+                if last_id is not None:
+                    cur.execute("""
+                        UPDATE aggregation_watermarks SET last_id = %s, updated_at = CURRENT_TIMESTAMP
+                        WHERE source = %s
+                    """, (last_id, f"trends:{table}"))
+
+            # 日時や意図の形式が不正な行はウォーターマークだけ進めて読み飛ばす
+            valid_rows = [row for row in rows if row[3] is not None and isinstance(row[2], dict)]
+            if valid_rows:
+                batch_time = max(row[3] for row in valid_rows)
+                deltas: Dict[_TrendKey, _TrendDelta] = {}
+                weekly: Dict[_WeeklyKey, _TrendDelta] = {}
+                for _, user_id, intent, created_at in valid_rows:
+                    TrendService._accumulate(deltas, weekly, user_id, intent, created_at, batch_time)
+                if deltas:
+                    TrendService._apply(cur, deltas, batch_time)
+                    TrendService._apply_weekly(cur, weekly, batch_time)
+
+            conn.commit()
+            return len(rows), has_more
+        except Exception as e:
+            conn.rollback()
+            logger.error("トレンド集計エラー: %s", e)
+            raise
+        finally:
+            cur.close()
+            conn.close()
+
+    @staticmethod
+    def _read_source(cur, table: str, column: str) -> Tuple[List[Tuple[Any, ...]], Optional[int], bool]:
+        """ウォーターマーク以降の行を読む（直近 TREND_COMMIT_LAG_SECONDS 秒の行の手前で止める）"""
+        source = f"trends:{table}"
+        cur.execute(
+            "INSERT INTO aggregation_watermarks (source) VALUES (%s) ON CONFLICT (source) DO NOTHING",
+            (source,)
+        )
+        cur.execute("SELECT last_id FROM aggregation_watermarks WHERE source = %s", (source,))
+        watermark = cur.fetchone()[0]
+
+        cur.execute(f"""
+            SELECT id, user_id, {column}, created_at,
+                   created_at >= NOW() - %s * INTERVAL '1 second' AS is_recent
+            FROM {table}
+            WHERE id > %s
+            ORDER BY id
+            LIMIT %s
+        """, (TREND_COMMIT_LAG_SECONDS, watermark, TREND_BATCH_SIZE))
+        fetched = cur.fetchall()
+
+        rows = []
+        for row_id, user_id, intent, created_at, is_recent in fetched:
+            # ID順に読むため、まだ確定していない可能性のある行以降は次回に回す
+            if is_recent:
+                return rows, rows[-1][0] if rows else None, False
+            rows.append((row_id, user_id, intent, created_at))
+
+        return rows, rows[-1][0] if rows else None, len(fetched) == TREND_BATCH_SIZE
+
+    @staticmethod
+    def _accumulate(
+        deltas: Dict[_TrendKey, _TrendDelta],
+        weekly: Dict[_WeeklyKey, _TrendDelta],
+        user_id: Any,
+        intent: Dict[str, Any],
+        created_at: datetime,
+        batch_time: datetime
+    ) -> None:
+        """1件のログの嗜好を全期間と、ログの日時の週の両方に加算"""
+        week_start = week_start_of(created_at.date())
+        weight = _decay((batch_time - created_at).total_seconds())
+        for key, value, category in set(extract_preferences(intent)):
+            for table, table_key in ((deltas, (key, value)), (weekly, (week_start, key, value))):
+                delta = table.get(table_key)
+                if delta is None:
+                    delta = table[table_key] = _TrendDelta(category)
+                delta.count += 1
+                if user_id is not None:
+                    delta.sketch.add(user_id)
+                if delta.last_detected is None or created_at > delta.last_detected:
+                    delta.last_detected = created_at
+                delta.weight += weight
+
+    @staticmethod
+    def _merge(
+        delta: _TrendDelta,
+        existing: Tuple[Any, ...],
+        batch_time: datetime
+    ) -> Tuple[int, HyperLogLog, datetime, float]:
+        """
+        保存済みの集計と1バッチ分の加算量を合算
+
+        Args:
+            delta: 加算量
+            existing: 保存済みの (occurrence_count, user_sketch, trend_score, last_detected)
+            batch_time: バッチ内の最新時刻
+
+        Returns:
+            (出現回数, ユーザーのスケッチ, last_detected, trend_score)
+        """
+        count, sketch_bytes, score, last_detected = existing
+
+        sketch = delta.sketch
+        if sketch_bytes:
+            sketch = HyperLogLog.from_bytes(bytes(sketch_bytes))
+            sketch.merge(delta.sketch)
+
+        # trend_score は last_detected 時点の減衰付き出現回数として保持する
+        new_last = max(filter(None, (last_detected, delta.last_detected)))
+        score = (score or 0.0) * _decay((new_last - last_detected).total_seconds()) if last_detected else 0.0
+        score += delta.weight * _decay((new_last - batch_time).total_seconds())
+
+        return (count or 0) + delta.count, sketch, new_last, score
+
+    @staticmethod
+    def _apply(cur, deltas: Dict[_TrendKey, _TrendDelta], batch_time: datetime) -> None:
+        """既存の集計と合算して一括で書き込む"""
+        keys = sorted(deltas)
+        existing = {
+            (row[0], row[1]): row[2:]
+            for row in execute_values(cur, """
+                SELECT g.preference_key, g.preference_value, g.occurrence_count, g.user_sketch,
+                       g.trend_score, g.last_detected
+                FROM global_preference_trends g
+                JOIN (VALUES %s) AS k (preference_key, preference_value)
+                  ON g.preference_key = k.preference_key AND g.preference_value = k.preference_value
+            """, keys, page_size=len(keys), fetch=True)
+        }
+
+        rows = []
+        for key in keys:
+            delta = deltas[key]
+            count, sketch, last_detected, score = TrendService._merge(
+                delta, existing.get(key, (0, None, 0.0, None)), batch_time
+            )
+            rows.append((
+                key[0], key[1], count, sketch.count(), sketch.to_bytes(), last_detected, score, delta.category,
+            ))
+
+        execute_values(cur, """
+            INSERT INTO global_preference_trends AS g (
+                preference_key, preference_value, occurrence_count, unique_users, user_sketch,
+                last_detected, trend_score, category
+            ) VALUES %s
+            ON CONFLICT (preference_key, preference_value) DO UPDATE SET
+                occurrence_count = EXCLUDED.occurrence_count,
+                unique_users = EXCLUDED.unique_users,
+                user_sketch = EXCLUDED.user_sketch,
+                last_detected = EXCLUDED.last_detected,
+                trend_score = EXCLUDED.trend_score,
+                category = EXCLUDED.category
+        """, rows, page_size=1000)
+
+    @staticmethod
+    def _apply_weekly(cur, weekly: Dict[_WeeklyKey, _TrendDelta], batch_time: datetime) -> None:
+        """週ごとの集計（weekly_preference_trends）に合算して一括で書き込む"""
+        keys = sorted(weekly)
+        existing = {
+            (row[0], row[1], row[2]): row[3:]
+            for row in execute_values(cur, """
+                SELECT w.week_start, w.preference_key, w.preference_value, w.occurrence_count, w.user_sketch,
+                       w.trend_score, w.last_detected
+                FROM weekly_preference_trends w
+                JOIN (VALUES %s) AS k (week_start, preference_key, preference_value)
+                  ON w.week_start = k.week_start
+                 AND w.preference_key = k.preference_key
+                 AND w.preference_value = k.preference_value
+            """, keys, template="(%s::date, %s, %s)", page_size=len(keys), fetch=True)
+        }
+
+        rows = []
+        for key in keys:
+            delta = weekly[key]
+            count, sketch, last_detected, score = TrendService._merge(
+                delta, existing.get(key, (0, None, 0.0, None)), batch_time
+            )
+            rows.append((
+                *key, count, sketch.count(), sketch.to_bytes(), last_detected, score, delta.category,
+            ))
+
+        execute_values(cur, """
+            INSERT INTO weekly_preference_trends AS w (
+                week_start, preference_key, preference_value, occurrence_count, unique_users, user_sketch,
+                last_detected, trend_score, category
+            ) VALUES %s
+            ON CONFLICT (week_start, preference_key, preference_value) DO UPDATE SET
+                occurrence_count = EXCLUDED.occurrence_count,
+                unique_users = EXCLUDED.unique_users,
+                user_sketch = EXCLUDED.user_sketch,
+                last_detected = EXCLUDED.last_detected,
+                trend_score = EXCLUDED.trend_score,
+                category = EXCLUDED.category
+        """, rows, page_size=1000)
+
+    @staticmethod
+    def build_weekly_snapshot(week_start: Optional[date] = None, min_age_seconds: float = 0) -> Optional[Dict[str, Any]]:
+        """
+        週次スナップショットを作成して current_weekly_trends に保存
+
+        Args:
+            week_start: 週の開始日（省略時は今週。月曜日以外は週の月曜日に丸める）
+            min_age_seconds: 保存済みのものがこの秒数より新しければ作り直さない
+
+        Returns:
+            week_start / trend_data / generated_at（作り直さなかった場合はNone）
+        """
+        week_start = week_start_of(week_start or date.today())
+
+        conn = get_db_conn()
+        cur = conn.cursor(cursor_factory=RealDictCursor)
+        try:
+            cur.execute(_SNAPSHOT_SQL, {
+                "week_start": week_start,
+                "half_life_seconds": _HALF_LIFE_SECONDS,
+                "top_n": TREND_SNAPSHOT_TOP_N,
+                "min_age_seconds": min_age_seconds,
+            })
+            row = cur.fetchone()
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            logger.error("週次トレンド作成エラー: %s", e)
+            raise
+        finally:
+            cur.close()
+            conn.close()
+
+        if row is None:
+            return None
+
+        snapshot = dict(row)
+        TrendService._snapshot_cache.set(week_start, snapshot)
+        return snapshot
+
+    @staticmethod
+    def get_weekly_snapshot(week_start: Optional[date] = None) -> Optional[Dict[str, Any]]:
+        """
+        保存済みの週次スナップショットを取得（ワーカー内に TREND_SNAPSHOT_CACHE_SECONDS 秒キャッシュ）
+
+        今週分がまだなければその場で作成する。
+
+        Args:
+            week_start: 週の開始日（省略時は今週）
+
+        Returns:
+            week_start / trend_data / generated_at（過去の週で未作成ならNone）
+        """
+        current_week = week_start_of(date.today())
+        week_start = week_start_of(week_start or current_week)
+
+        snapshot = TrendService._snapshot_cache.get(week_start)
+        if snapshot is not None:
+            return snapshot
+
+        conn = get_db_conn()
+        cur = conn.cursor(cursor_factory=RealDictCursor)
+        try:
+            cur.execute("""
+                SELECT week_start, trend_data, generated_at
+                FROM current_weekly_trends
+                WHERE week_start = %s
+            """, (week_start,))
+            row = cur.fetchone()
+        finally:
+            cur.close()
+            conn.close()
+
+        if row is None:
+            return TrendService.build_weekly_snapshot(week_start) if week_start == current_week else None
+
+        snapshot = dict(row)
+        TrendService._snapshot_cache.set(week_start, snapshot)
+        return snapshot
+
+    @staticmethod
+    async def _aggregate_loop() -> None:
+        while True:
+            await asyncio.sleep(TREND_AGGREGATION_SECONDS)
+            try:
+                processed = await asyncio.to_thread(TrendService.aggregate, 20)
+                if processed:
+                    logger.info("トレンド集計", extra={"processed": processed})
+                await asyncio.to_thread(
+                    TrendService.build_weekly_snapshot, None, TREND_SNAPSHOT_SECONDS
+                )
+            except Exception:
+                # エラーは記録済み。次の周期で再試行する
+                pass
+
+    @staticmethod
+    def start_aggregator() -> None:
+        """定期集計タスクを開始（アプリ起動時に呼ぶ）"""
+        if TrendService._task is None and TREND_AGGREGATION_SECONDS > 0:
+            TrendService._task = asyncio.get_running_loop().create_task(TrendService._aggregate_loop())
+
+    @staticmethod
+    def stop_aggregator() -> None:
+        """定期集計タスクを止める（アプリ終了時に呼ぶ）"""
+        if TrendService._task is not None:
+            TrendService._task.cancel()
+            TrendService._task = None
+
+
+if __name__ == "__main__":
+    started = datetime.now()
+    processed = TrendService.aggregate()
+    TrendService.build_weekly_snapshot()
+    print(f"✅ トレンド集計完了: {processed:,}件 ({(datetime.now() - started).total_seconds():.1f}秒)")
@@ -0,0 +1,125 @@
+"""
+チャットのターン記録（conversation_turns / score_history）の一括書き込み
+
+1ターンで数十〜数百件の求人をスコアリングするため、score_history を1行ずつ INSERT すると
+ターンごとに往復が増える。ターンの要約とスコア行はワーカー内のバッファに積むだけにして、
+行数（TURN_LOG_FLUSH_ROWS）か経過時間（TURN_LOG_FLUSH_SECONDS）のどちらかに達したら
+COPY でまとめて書き込む（リクエスト処理中はDBに書かない）。
+
+created_at は書き込み時にDBの既定値（トランザクション開始時刻）で入れる。
+DB障害後の再試行で古いターンが新しいIDで書き込まれても、トレンド集計
+（services/trend_service.py）が確定前の行を読み飛ばさないようにするため。
+"""
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import os
+
+from utils.buffered_writer import BufferedWriter
+from utils.pg_copy import copy_rows
+
+
+# この行数（ターン＋スコア）たまったら書き込む
+TURN_LOG_FLUSH_ROWS = int(os.getenv("TURN_LOG_FLUSH_ROWS", "5000"))
+
+# 行数に達しなくてもこの間隔（秒）で書き込む
+TURN_LOG_FLUSH_SECONDS = float(os.getenv("TURN_LOG_FLUSH_SECONDS", "5"))
+
+# DB障害時などに溜めておく行数の上限（超えたターンは捨てる）
+TURN_LOG_BUFFER_MAX = int(os.getenv("TURN_LOG_BUFFER_MAX", "200000"))
+
+TURN_COLUMNS = (
+    "user_id", "session_id", "turn_number", "user_message", "bot_message",
+    "extracted_info", "top_score", "top_match_percentage", "candidate_count",
+)
+SCORE_COLUMNS = (
+    "user_id", "session_id", "turn_number", "job_id", "score", "match_percentage", "score_details",
+)
+
+# (ターンの行, スコアの行のリスト)
+_TurnRecord = Tuple[Tuple[Any, ...], List[Tuple[Any, ...]]]
+
+
+def _write(conn, records: List[_TurnRecord]) -> int:
+    """ターンとスコアを COPY で書き込む（コミットは呼び出し元）"""
+    cur = conn.cursor()
+    try:
+        written = copy_rows(cur, "conversation_turns", TURN_COLUMNS, (turn for turn, _ in records))
+        written += copy_rows(
+            cur, "score_history", SCORE_COLUMNS,
+            (score for _, scores in records for score in scores),
+        )
+    finally:
+        cur.close()
+    return written
+
+
+class TurnLogService:
+    """ターン記録のバッファリングと一括書き込み"""
+
+    # 行数（ターン＋スコア）で数える
+    _writer: BufferedWriter[_TurnRecord] = BufferedWriter(
+        "ターン記録",
+        write=_write,
+        flush_seconds=TURN_LOG_FLUSH_SECONDS,
+        flush_size=TURN_LOG_FLUSH_ROWS,
+        max_size=TURN_LOG_BUFFER_MAX,
+        size=lambda record: 1 + len(record[1]),
+    )
+
+    @staticmethod
+    def record_turn(
+        user_id: Any,
+        session_id: str,
+        turn_number: int,
+        user_message: Optional[str],
+        bot_message: Optional[str],
+        extracted_info: Optional[Dict[str, Any]] = None,
+        match_percentage: Optional[float] = None,
+        job_scores: Sequence[Tuple[str, float, Optional[Dict[str, Any]]]] = ()
+    ) -> None:
+        """
+        1ターン分の要約と求人ごとのスコアをバッファに追加（書き込みは後でまとめて行う）
+
+        Args:
+            user_id: ユーザーID
+            session_id: セッションID
+            turn_number: ターン番号
+            user_message: ユーザーのメッセージ
+            bot_message: AIの応答
+            extracted_info: ターンで抽出した情報
+            match_percentage: 会話のマッチ度（%）
+            job_scores: このターンでスコアリングした求人の (job_id, スコア, 詳細)
+        """
+        user = int(user_id)
+        top_score = max((score for _, score, _ in job_scores), default=None)
+
+        turn = (
+            user, session_id, turn_number, user_message, bot_message, extracted_info,
+            top_score, match_percentage, len(job_scores),
+        )
+        # 求人のスコアはそれ自体がマッチ度（%）のため、score と match_percentage に同じ値を入れる
+        scores = [
+            (user, session_id, turn_number, str(job_id), score, score, details)
+            for job_id, score, details in job_scores
+        ]
+        TurnLogService._writer.add((turn, scores))
+
+    @staticmethod
+    def flush() -> int:
+        """
+        バッファのターン記録を書き込む
+
+        Returns:
+            書き込んだ行数（conversation_turns と score_history の合計）
+        """
+        return TurnLogService._writer.flush()
+
+    @staticmethod
+    def start_flusher() -> None:
+        """定期書き込みタスクを開始（アプリ起動時に呼ぶ）"""
+        TurnLogService._writer.start()
+
+    @staticmethod
+    async def stop_flusher() -> None:
+        """定期書き込みタスクを止めて残りを書き込む（アプリ終了時に呼ぶ）"""
+        await TurnLogService._writer.stop()
@@ -19,6 +19,11 @@ pip install -r requirements.txt
 # ワーカー数（CPUコア数 x 2 + 1）
 WORKERS=${WORKERS:-4}
 
+# Prometheus multiprocess モード（ワーカー間でメトリクスを集計）
+export PROMETHEUS_MULTIPROC_DIR=${PROMETHEUS_MULTIPROC_DIR:-/tmp/prometheus_multiproc}
+rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+
 # サーバー起動
 echo ""
 echo "=================================="
@@ -26,6 +31,7 @@ echo "✅ Starting Gunicorn with $WORKERS workers..."
 echo "=================================="
 
 gunicorn main:app \
+    -c gunicorn.conf.py \
     -w $WORKERS \
     -k uvicorn.workers.UvicornWorker \
     --bind 0.0.0.0:8000 \
@@ -0,0 +1,81 @@
+"""
+BufferedWriter のテスト（DBは偽の接続で置き換える）
+"""
+
+import psycopg2
+import pytest
+
+from utils import buffered_writer
+from utils.buffered_writer import BufferedWriter
+
+
+class FakeConnection:
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+@pytest.fixture(autouse=True)
+def fake_conn(monkeypatch):
+    monkeypatch.setattr(buffered_writer, "get_db_conn", FakeConnection)
+
+
+def test_flush_splits_batch_and_drops_only_bad_items():
+    written = []
+
+    def write(conn, items):
+        if any(item < 0 for item in items):
+            raise ValueError("bad item")
+        written.extend(items)
+        return len(items)
+
+    writer = BufferedWriter("テスト", write=write, flush_seconds=1)
+    for item in [1, 2, -3, 4, -5, 6]:
+        writer.add(item)
+
+    assert writer.flush() == 4
+    assert written == [1, 2, 4, 6]
+    assert writer.flush() == 0
+
+
+def test_flush_restores_unwritten_items_on_retryable_error():
+    failing = {"on": True}
+    written = []
+
+    def write(conn, items):
+        if failing["on"]:
+            raise psycopg2.OperationalError("server closed the connection")
+        written.extend(items)
+        return len(items)
+
+    writer = BufferedWriter("テスト", write=write, flush_seconds=1)
+    writer.add(1)
+    writer.add(2)
+    assert writer.flush() == 0
+
+    writer.add(3)
+    failing["on"] = False
+    assert writer.flush() == 3
+    assert written == [1, 2, 3]
+
+
+def test_restore_drops_oldest_over_max_size():
+    def write(conn, items):
+        # 書き込み中に新しい要素が積まれた状態で接続が切れる
+        writer.add("efg")
+        raise psycopg2.InterfaceError("connection already closed")
+
+    writer = BufferedWriter("テスト", write=write, flush_seconds=1, max_size=5, size=len)
+    writer.add("ab")
+    writer.add("cd")
+    assert writer.flush() == 0
+
+    written = []
+    writer._write = lambda conn, items: written.extend(items) or len(items)
+    assert writer.flush() == 2
+    assert written == ["cd", "efg"]
@@ -0,0 +1,150 @@
+"""
+InteractionService の書き込みのテスト（DBは偽の接続で置き換える）
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import psycopg2
+import pytest
+
+from services import interaction_service
+from services.interaction_service import InteractionService
+from utils import buffered_writer
+
+
+JOB_ID = "00000000-0000-4000-8000-000000000001"
+
+
+class FakeCursor:
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self):
+        self.committed = False
+
+    def cursor(self):
+        return FakeCursor()
+
+    def commit(self):
+        self.committed = True
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def written(monkeypatch):
+    """flush で書き込まれる内容を {"copy": 行, "values": [VALUES の行]} に記録"""
+    result = {"copy": [], "values": []}
+
+    def fake_copy_rows(cur, table, columns, rows):
+        rows = list(rows)
+        result["copy"].extend(rows)
+        return len(rows)
+
+    def fake_execute_values(cur, query, values, fetch=False, **kwargs):
+        values = list(values)
+        result["values"].append(values)
+        if fetch:
+            # user_interaction_summary の更新後の (user_id, job_id, favorite_count, apply_count)
+            totals = result.setdefault("totals", {})
+            rows = []
+            for user_id, job_id, _, _, favorites, applies, _ in values:
+                previous = totals.get((user_id, job_id), (0, 0))
+                totals[(user_id, job_id)] = (previous[0] + favorites, previous[1] + applies)
+                rows.append((user_id, job_id, *totals[(user_id, job_id)]))
+            return rows
+
+    monkeypatch.setattr(interaction_service, "copy_rows", fake_copy_rows)
+    monkeypatch.setattr(interaction_service, "execute_values", fake_execute_values)
+    monkeypatch.setattr(buffered_writer, "get_db_conn", FakeConnection)
+    InteractionService.flush()
+    result["copy"].clear()
+    result["values"].clear()
+    yield result
+    InteractionService.flush()
+
+
+def test_flush_mixes_aware_and_naive_occurred_at(written):
+    occurred_at = datetime(2025, 1, 1, 0, 0, tzinfo=timezone.utc)
+    InteractionService.record(1, JOB_ID, "view", created_at=occurred_at)
+    InteractionService.record(1, JOB_ID, "click")
+
+    assert InteractionService.flush() == 2
+
+    assert all(event[5].tzinfo is None for event in written["copy"])
+    assert written["copy"][0][5] == occurred_at.astimezone().replace(tzinfo=None)
+    # 同じユーザー×求人の集計行は1行で、最終日時は新しい方（受信時刻）
+    (summary,) = written["values"][0]
+    assert summary[2:6] == (1, 1, 0, 0)
+    assert summary[6] == written["copy"][1][5]
+
+
+def test_flush_drops_only_the_bad_event(written, monkeypatch):
+    def failing_copy_rows(cur, table, columns, rows):
+        rows = list(rows)
+        if any(event[2] == "broken" for event in rows):
+            raise ValueError("bad event")
+        written["copy"].extend(rows)
+        return len(rows)
+
+    monkeypatch.setattr(interaction_service, "copy_rows", failing_copy_rows)
+    for i in range(5):
+        InteractionService.record(i + 1, JOB_ID, "broken" if i == 3 else "view")
+
+    assert InteractionService.flush() == 4
+    assert sorted(event[0] for event in written["copy"]) == [1, 2, 3, 5]
+    # 捨てたイベントはバッファに戻らない
+    assert InteractionService.flush() == 0
+
+
+def test_flush_keeps_events_on_connection_error(written, monkeypatch):
+    def failing_copy_rows(cur, table, columns, rows):
+        raise psycopg2.OperationalError("server closed the connection")
+
+    monkeypatch.setattr(interaction_service, "copy_rows", failing_copy_rows)
+    InteractionService.record(1, JOB_ID, "view")
+    InteractionService.record(2, JOB_ID, "view")
+    assert InteractionService.flush() == 0
+
+    # 接続が戻れば書き込まれる
+    monkeypatch.setattr(interaction_service, "copy_rows", lambda cur, table, columns, rows: len(list(rows)))
+    assert InteractionService.flush() == 2
+
+
+def test_favorite_and_apply_count_once_per_user(written):
+    for _ in range(3):
+        InteractionService.record(1, JOB_ID, "favorite")
+        InteractionService.record(1, JOB_ID, "apply")
+    InteractionService.record(2, JOB_ID, "favorite")
+    InteractionService.flush()
+    InteractionService.record(1, JOB_ID, "favorite")
+    InteractionService.record(1, JOB_ID, "view")
+    InteractionService.flush()
+
+    counters = [values for values in written["values"] if len(values[0]) == 5]
+    # (job_id, views, clicks, favorites, applies)
+    assert counters[0] == [(JOB_ID, 0, 0, 2, 1)]
+    assert counters[1] == [(JOB_ID, 1, 0, 0, 0)]
+
+
+def test_is_acceptable_time():
+    now = datetime.now()
+    assert InteractionService.is_acceptable_time(now - timedelta(hours=1))
+    assert InteractionService.is_acceptable_time(datetime.now(timezone.utc))
+    assert not InteractionService.is_acceptable_time(now + timedelta(days=1))
+    assert not InteractionService.is_acceptable_time(now - timedelta(days=30))
+
+
+def test_record_reports_dropped_event_when_buffer_is_full(written, monkeypatch):
+    monkeypatch.setattr(InteractionService._writer, "_max_size", 2)
+
+    assert InteractionService.record(1, JOB_ID, "view")
+    assert InteractionService.record(2, JOB_ID, "view")
+    assert not InteractionService.record(3, JOB_ID, "view")
+    assert InteractionService.flush() == 2
@@ -0,0 +1,123 @@
+"""
+TrendService のログの読み出しのテスト（DBは偽のテーブルで置き換える）
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from services import turn_log_service
+from services.trend_service import TREND_COMMIT_LAG_SECONDS, TrendService
+from services.turn_log_service import TurnLogService
+from utils import buffered_writer
+
+
+class FakeTurnTable:
+    """conversation_turns の代わり（ID の採番・created_at の既定値・コミット前の行の不可視を再現）"""
+
+    def __init__(self):
+        self.now = datetime.now()
+        self.rows = []
+        self.watermark = 0
+
+    def insert(self, columns, values, committed):
+        row = dict(zip(columns, values))
+        row.setdefault("created_at", self.now)
+        row["id"] = len(self.rows) + 1
+        row["committed"] = committed
+        self.rows.append(row)
+        return row
+
+    def cursor(self):
+        return FakeCursor(self)
+
+
+class FakeCursor:
+    def __init__(self, table):
+        self.table = table
+        self.result = []
+
+    def execute(self, query, params=()):
+        if "SELECT last_id" in query:
+            self.result = [(self.table.watermark,)]
+        elif "FROM conversation_turns" in query:
+            lag, watermark, limit = params
+            visible = [row for row in self.table.rows if row["committed"] and row["id"] > watermark]
+            self.result = [
+                (
+                    row["id"], row["user_id"], row["extracted_info"], row["created_at"],
+                    row["created_at"] >= self.table.now - timedelta(seconds=lag),
+                )
+                for row in visible[:limit]
+            ]
+
+    def fetchone(self):
+        return self.result[0]
+
+    def fetchall(self):
+        return self.result
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, table):
+        self.table = table
+        self.pending = []
+
+    def cursor(self):
+        return self.table.cursor()
+
+    def commit(self):
+        for row in self.pending:
+            row["committed"] = True
+        self.pending = []
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def table(monkeypatch):
+    table = FakeTurnTable()
+    connection = FakeConnection(table)
+
+    def fake_copy_rows(cur, name, columns, rows):
+        rows = list(rows)
+        if name == "conversation_turns":
+            connection.pending.extend(table.insert(columns, row, committed=False) for row in rows)
+        return len(rows)
+
+    monkeypatch.setattr(turn_log_service, "copy_rows", fake_copy_rows)
+    monkeypatch.setattr(buffered_writer, "get_db_conn", lambda: connection)
+    TurnLogService.flush()
+    yield table
+    TurnLogService.flush()
+
+
+def test_read_source_waits_for_out_of_order_commits(table):
+    # DB障害中に受けたターンはバッファに残る
+    TurnLogService.record_turn(1, "s1", 1, "東京で働きたい", "承知しました", {"location": "東京都"})
+    TurnLogService.record_turn(1, "s1", 2, "リモートがいい", "承知しました", {"remote": True})
+
+    # 復旧後、別のワーカーの書き込み中のトランザクションが小さいIDを確保し、
+    # 数時間前のターンが大きいIDで先にコミットされる
+    table.now += timedelta(hours=3)
+    in_flight = table.insert(("user_id", "extracted_info"), (2, {"location": "東京都"}), committed=False)
+    assert TurnLogService.flush() == 2
+
+    cur = table.cursor()
+    rows, last_id, _ = TrendService._read_source(cur, "conversation_turns", "extracted_info")
+    # コミット済みの行は書き込み時刻が新しいため、ウォーターマークを進めない
+    assert rows == []
+    assert last_id is None
+
+    in_flight["committed"] = True
+    table.now += timedelta(seconds=TREND_COMMIT_LAG_SECONDS + 1)
+    rows, last_id, _ = TrendService._read_source(cur, "conversation_turns", "extracted_info")
+    assert [row[0] for row in rows] == [1, 2, 3]
+    assert last_id == 3
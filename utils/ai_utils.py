@@ -5,14 +5,44 @@ AI関連のユーティリティ関数
 from openai import OpenAI
 import json
 from typing import Dict, Any, List
+import logging
 import os
+import time
 from dotenv import load_dotenv
 
+from services.llm_usage_service import LLMUsageService
+from utils.metrics import observe_llm_call
+from utils.tracing import span
+
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
 
+def create_chat_completion(operation: str, openai_client: OpenAI = None, **kwargs):
+    """
+    Chat Completions API を呼び出す（呼び出しごとに llm.<operation> として計測）
+
+    Args:
+        operation: 呼び出し元の処理名（例: extract_user_intent）
+        openai_client: 使用するクライアント（省略時はモジュール共通のクライアント）
+        **kwargs: chat.completions.create に渡す引数
+
+    Returns:
+        APIレスポンス
+    """
+    model = kwargs.get("model")
+    started = time.perf_counter()
+    with span(f"llm.{operation}", model=model):
+        response = (openai_client or client).chat.completions.create(**kwargs)
+    usage = getattr(response, "usage", None)
+    observe_llm_call(operation, model, time.perf_counter() - started, usage)
+    LLMUsageService.record(operation, model, usage)
+    return response
+
+
 def extract_user_intent(message: str, conversation_history: List[Dict] = None) -> Dict[str, Any]:
     """
     ユーザーの発言から意図を抽出
@@ -33,7 +63,8 @@ def extract_user_intent(message: str, conversation_history: List[Dict] = None) -
         ])
     
     try:
-        response = client.chat.completions.create(
+        response = create_chat_completion(
+            "extract_user_intent",
             model="gpt-4o",
             messages=[
                 {
@@ -63,7 +94,7 @@ JSON形式で返答してください。"""
         return result
     
     except Exception as e:
-        print(f"❌ 意図抽出エラー: {e}")
+        logger.warning("意図抽出エラー: %s", e)
         return {
             "keywords": [],
             "pain_points": [],
@@ -101,7 +132,8 @@ def generate_ai_response(
             })
     
     try:
-        response = client.chat.completions.create(
+        response = create_chat_completion(
+            "generate_ai_response",
             model="gpt-4o",
             messages=[
                 {
@@ -123,7 +155,7 @@ def generate_ai_response(
         return response.choices[0].message.content
     
     except Exception as e:
-        print(f"❌ AIレスポンス生成エラー: {e}")
+        logger.warning("AIレスポンス生成エラー: %s", e)
         return "申し訳ございません。エラーが発生しました。もう一度お試しください。"
 
 
@@ -137,14 +169,34 @@ def get_embedding(text: str) -> List[float]:
     Returns:
         embedding ベクトル
     """
+    embeddings = get_embeddings([text])
+    return embeddings[0] if embeddings else []
+
+
+def get_embeddings(texts: List[str]) -> List[List[float]]:
+    """
+    複数テキストのembeddingを1回のAPI呼び出しで取得
+    
+    Args:
+        texts: テキストのリスト
+        
+    Returns:
+        texts と同じ順の embedding ベクトルのリスト（エラー時は空リスト）
+    """
+    if not texts:
+        return []
     try:
-        response = client.embeddings.create(
-            input=[text],
-            model="text-embedding-ada-002"
-        )
-        return response.data[0].embedding
+        started = time.perf_counter()
+        with span("llm.embedding", model="text-embedding-ada-002"):
+            response = client.embeddings.create(
+                input=texts,
+                model="text-embedding-ada-002"
+            )
+        observe_llm_call("embedding", "text-embedding-ada-002", time.perf_counter() - started, response.usage)
+        LLMUsageService.record("embedding", "text-embedding-ada-002", response.usage)
+        return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
     except Exception as e:
-        print(f"❌ Embedding取得エラー: {e}")
+        logger.warning("Embedding取得エラー: %s", e)
         return []
 
 
@@ -175,7 +227,8 @@ def analyze_job_compatibility(
 """
     
     try:
-        response = client.chat.completions.create(
+        response = create_chat_completion(
+            "analyze_job_compatibility",
             model="gpt-4o",
             messages=[
                 {
@@ -208,7 +261,7 @@ JSON形式で返答:
         return result
     
     except Exception as e:
-        print(f"❌ 相性分析エラー: {e}")
+        logger.warning("相性分析エラー: %s", e)
         return {
             "score": 50,
             "reasoning": "エラーが発生しました",
@@ -285,7 +338,8 @@ def generate_scout_question(
 - **3ターン目では「十分な情報が集まりました。候補者を検索しています...」と伝える**"""
 
     try:
-        response = client.chat.completions.create(
+        response = create_chat_completion(
+            "generate_scout_question",
             model="gpt-4o",
             messages=[
                 {"role": "system", "content": system_prompt},
@@ -296,12 +350,10 @@ def generate_scout_question(
             max_tokens=300
         )
         
-        ai_response = response.choices[0].message.content
-        print(f"🤖 OpenAI応答生成成功: {ai_response[:100]}...")
-        return ai_response
+        return response.choices[0].message.content
         
     except Exception as e:
-        print(f"❌ OpenAI API エラー: {e}")
+        logger.warning("スカウト質問生成エラー: %s", e)
         
         # フォールバック: 固定の質問
         fallback_questions = {
@@ -0,0 +1,194 @@
+"""
+ワーカー内バッファからの一括書き込み
+
+リクエスト処理中はDBに書かずにバッファに積むだけにして、件数（flush_size）か
+経過時間（flush_seconds）のどちらかに達したら定期タスクがまとめて書き込む。
+
+- 接続・DB側の一時的なエラー（psycopg2.OperationalError / InterfaceError）の場合は、
+  書き込めなかった分をバッファの先頭に戻して次回に再試行する
+- それ以外のエラー（データの不正・プログラムの誤り）は再試行しても失敗するため戻さない。
+  バッチを半分ずつに分けて書き直し、書き込めない要素だけをログに残して捨てる
+- バッファが max_size を超える分は古い方から捨てる
+"""
+
+from typing import Any, Callable, Generic, List, Optional, TypeVar
+import asyncio
+import logging
+import threading
+
+import psycopg2
+
+from config.database import get_db_conn
+
+
+logger = logging.getLogger(__name__)
+
+
+T = TypeVar("T")
+
+# 再試行すれば書き込める可能性があるエラー
+RETRYABLE_ERRORS = (psycopg2.OperationalError, psycopg2.InterfaceError)
+
+
+def _rollback(conn) -> None:
+    try:
+        conn.rollback()
+    except psycopg2.Error:
+        pass
+
+
+class BufferedWriter(Generic[T]):
+    """バッファリングと定期的な一括書き込み"""
+
+    def __init__(
+        self,
+        name: str,
+        write: Callable[[Any, List[T]], int],
+        flush_seconds: float,
+        flush_size: Optional[int] = None,
+        max_size: Optional[int] = None,
+        size: Callable[[T], int] = lambda item: 1
+    ):
+        """
+        Args:
+            name: ログに出す名前（「行動イベント」など）
+            write: (接続, 要素のリスト) を受け取って書き込み、件数を返す関数（コミットはこのクラスが行う）
+            flush_seconds: 書き込みの間隔（秒）
+            flush_size: この量たまったら間隔を待たずに書き込む（Noneは間隔のみ）
+            max_size: バッファの上限（Noneは上限なし）
+            size: 1要素の量（既定は1要素=1）
+        """
+        self.name = name
+        self._write = write
+        self._flush_seconds = flush_seconds
+        self._flush_size = flush_size
+        self._max_size = max_size
+        self._size = size
+
+        self._buffer: List[T] = []
+        self._buffered = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._flusher: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def add(self, item: T) -> bool:
+        """
+        バッファに追加（書き込みは後でまとめて行う）
+
+        Returns:
+            追加した場合True（バッファが上限に達していて捨てた場合False）
+        """
+        size = self._size(item)
+        with self._lock:
+            if self._max_size is not None and self._buffered + size > self._max_size:
+                logger.warning("%sのバッファが上限に達したため破棄", self.name, extra={"buffered": self._buffered})
+                return False
+            self._buffer.append(item)
+            self._buffered += size
+            should_flush = self._flush_size is not None and self._buffered >= self._flush_size
+
+        if should_flush:
+            self._request_flush()
+        return True
+
+    def _request_flush(self) -> None:
+        """定期書き込みタスクを起こして、時間を待たずに書き込ませる"""
+        loop, wakeup = self._loop, self._wakeup
+        if loop is not None and wakeup is not None:
+            loop.call_soon_threadsafe(wakeup.set)
+
+    def flush(self) -> int:
+        """
+        バッファの内容を書き込む
+
+        Returns:
+            write が返した件数の合計
+        """
+        # 同時に2つ書き込むと同じ行のロック待ちになるため、ワーカー内では直列にする
+        with self._flush_lock:
+            with self._lock:
+                items = self._buffer
+                self._buffer = []
+                self._buffered = 0
+
+            if not items:
+                return 0
+
+            try:
+                conn = get_db_conn()
+            except Exception as e:
+                logger.warning("%sの書き込みを延期（DB接続エラー）: %s", self.name, e)
+                self._restore(items)
+                return 0
+
+            try:
+                return self._write_isolating(conn, items)
+            finally:
+                conn.close()
+
+    def _write_isolating(self, conn, items: List[T]) -> int:
+        """失敗したバッチを半分に分けて書き直し、書き込めない要素だけを捨てる"""
+        written = 0
+        parts = [items]
+        while parts:
+            part = parts.pop()
+            try:
+                count = self._write(conn, part)
+                conn.commit()
+                written += count
+            except RETRYABLE_ERRORS as e:
+                _rollback(conn)
+                logger.error("%sの書き込みエラー（次回再試行）: %s", self.name, e)
+                self._restore(part + [item for pending in reversed(parts) for item in pending])
+                break
+            except Exception as e:
+                _rollback(conn)
+                if len(part) == 1:
+                    logger.error("書き込めない%sを破棄: %s", self.name, e, extra={"item": repr(part[0])[:500]})
+                    continue
+                middle = len(part) // 2
+                parts.extend((part[middle:], part[:middle]))
+        return written
+
+    def _restore(self, items: List[T]) -> None:
+        """書き込めなかった分をバッファの先頭に戻す（上限を超える分は古い方から捨てる）"""
+        with self._lock:
+            restored = items + self._buffer
+            buffered = sum(self._size(item) for item in restored)
+            dropped = 0
+            while self._max_size is not None and dropped < len(restored) and buffered > self._max_size:
+                buffered -= self._size(restored[dropped])
+                dropped += 1
+            if dropped:
+                logger.warning("%sのバッファが上限に達したため破棄", self.name, extra={"dropped": dropped})
+                restored = restored[dropped:]
+            self._buffer = restored
+            self._buffered = buffered
+
+    async def _flush_loop(self) -> None:
+        wakeup = self._wakeup
+        while True:
+            try:
+                await asyncio.wait_for(wakeup.wait(), timeout=self._flush_seconds)
+            except asyncio.TimeoutError:
+                pass
+            wakeup.clear()
+            await asyncio.to_thread(self.flush)
+
+    def start(self) -> None:
+        """定期書き込みタスクを開始（アプリ起動時に呼ぶ）"""
+        if self._flusher is None:
+            self._loop = asyncio.get_running_loop()
+            self._wakeup = asyncio.Event()
+            self._flusher = self._loop.create_task(self._flush_loop())
+
+    async def stop(self) -> None:
+        """定期書き込みタスクを止めて残りを書き込む（アプリ終了時に呼ぶ）"""
+        if self._flusher is not None:
+            self._flusher.cancel()
+            self._flusher = None
+            self._loop = None
+            self._wakeup = None
+        await asyncio.to_thread(self.flush)
@@ -0,0 +1,103 @@
+"""
+プロセス内キャッシュ
+"""
+
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+import threading
+import time
+
+from utils.metrics import CACHE_REQUESTS
+
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    有効期限付きLRUキャッシュ（スレッドセーフ）
+
+    gunicornの各ワーカーごとに独立して保持されるため、
+    明示的な無効化は同一ワーカー内にのみ反映される。
+    他ワーカーの古いエントリはTTLで自然に失効する。
+    """
+
+    def __init__(self, name: str, maxsize: int = 1024, ttl: float = 300.0):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._hit_counter = CACHE_REQUESTS.labels(name, "hit")
+        self._miss_counter = CACHE_REQUESTS.labels(name, "miss")
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        値を取得（期限切れ・未登録ならdefault）
+
+        Args:
+            key: キー
+            default: 見つからない場合の戻り値
+
+        Returns:
+            キャッシュされた値
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                self._miss_counter.inc()
+                return default
+
+            value, expires_at = entry
+            if expires_at <= now:
+                del self._data[key]
+                self.misses += 1
+                self._miss_counter.inc()
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            self._hit_counter.inc()
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        値を登録
+
+        Args:
+            key: キー
+            value: 値
+            ttl: 有効期限（秒）。省略時はキャッシュ既定値
+        """
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        """指定キーを削除"""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """全エントリを削除"""
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """ヒット率などの統計を返す"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "name": self.name,
+                "size": len(self._data),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": (self.hits / total) if total else 0.0,
+            }
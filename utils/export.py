@@ -0,0 +1,169 @@
+"""
+CSV / JSONL のストリーミングエクスポート
+
+サーバーサイドカーソル（名前付きカーソル）から EXPORT_FETCH_SIZE 行ずつ読み、
+そのまま CSV / JSONL に変換して StreamingResponse に流す。全行をリストや dict に
+載せないため、10万行のエクスポートでもメモリ使用量は一定になる。
+"""
+
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Any, Callable, Dict, Iterable, Iterator, Sequence
+from uuid import UUID
+import csv
+import io
+import os
+
+from fastapi.responses import StreamingResponse
+
+from config.database import get_db_conn
+from utils.helpers import dumps_json
+
+
+# サーバーサイドカーソルから1回に取得する行数
+EXPORT_FETCH_SIZE = int(os.getenv("EXPORT_FETCH_SIZE", "2000"))
+
+# この行数ごとにまとめてクライアントへ送る
+EXPORT_CHUNK_ROWS = 500
+
+EXPORT_FORMATS = ("csv", "jsonl")
+
+_MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "jsonl": "application/x-ndjson",
+}
+
+
+# CSV のセルへの変換（型ごと。None は空欄）
+_CSV_CONVERTERS: Dict[type, Callable[[Any], Any]] = {
+    str: lambda v: v,
+    int: lambda v: v,
+    float: lambda v: v,
+    bool: lambda v: "true" if v else "false",
+    datetime: lambda v: v.isoformat(),
+    date: lambda v: v.isoformat(),
+    time: lambda v: v.isoformat(),
+    UUID: str,
+    Decimal: str,
+    # 配列は一括登録（services/job_import_service.py）と同じカンマ区切り
+    list: lambda v: ", ".join("" if item is None else str(item) for item in v),
+    dict: lambda v: dumps_json(v).decode("utf-8"),
+}
+
+
+def _csv_cell(value: Any) -> Any:
+    if value is None:
+        return ""
+    converter = _CSV_CONVERTERS.get(type(value))
+    return converter(value) if converter is not None else str(value)
+
+
+def _iterate(conn, cur) -> Iterator[tuple]:
+    try:
+        yield from cur
+        conn.commit()
+    finally:
+        cur.close()
+        conn.close()
+
+
+def stream_rows(query: str, params: Sequence[Any] = (), fetch_size: int = EXPORT_FETCH_SIZE) -> Iterator[tuple]:
+    """
+    名前付きカーソルでクエリを開始し、fetch_size 行ずつ読みながら行を返すイテレータを返す
+
+    クエリの実行まではこの関数の中で行うため、DBエラーはレスポンスの送信開始前に発生する。
+
+    Args:
+        query: SELECT 文
+        params: クエリパラメータ
+        fetch_size: 1回の取得行数
+
+    Returns:
+        行（タプル）のイテレータ（読み終えるか破棄されると接続を閉じる）
+    """
+    conn = get_db_conn()
+    try:
+        conn.set_session(readonly=True)
+        cur = conn.cursor(name="export")
+        cur.itersize = fetch_size
+        cur.execute(query, tuple(params))
+    except Exception:
+        conn.close()
+        raise
+    return _iterate(conn, cur)
+
+
+def encode_csv(columns: Sequence[str], rows: Iterable[Sequence[Any]]) -> Iterator[bytes]:
+    """
+    行を CSV に変換（Excel で開けるよう BOM 付き UTF-8、1行目はヘッダー）
+
+    Args:
+        columns: 列名
+        rows: 行のイテレータ
+
+    Yields:
+        EXPORT_CHUNK_ROWS 行ごとのバイト列
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    buffer.write("\ufeff")
+    writer.writerow(columns)
+
+    count = 0
+    for row in rows:
+        writer.writerow([_csv_cell(value) for value in row])
+        count += 1
+        if count % EXPORT_CHUNK_ROWS == 0:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+
+    yield buffer.getvalue().encode("utf-8")
+
+
+def encode_jsonl(columns: Sequence[str], rows: Iterable[Sequence[Any]]) -> Iterator[bytes]:
+    """
+    行を JSONL（1行1オブジェクト）に変換
+
+    Args:
+        columns: 列名（各オブジェクトのキー）
+        rows: 行のイテレータ
+
+    Yields:
+        EXPORT_CHUNK_ROWS 行ごとのバイト列
+    """
+    lines = []
+    for row in rows:
+        lines.append(dumps_json(dict(zip(columns, row))))
+        if len(lines) >= EXPORT_CHUNK_ROWS:
+            yield b"\n".join(lines) + b"\n"
+            lines = []
+
+    if lines:
+        yield b"\n".join(lines) + b"\n"
+
+
+def export_response(
+    columns: Sequence[str],
+    rows: Iterable[Sequence[Any]],
+    file_format: str,
+    filename: str
+) -> StreamingResponse:
+    """
+    行のイテレータを CSV / JSONL のダウンロードとして返す
+
+    Args:
+        columns: 列名
+        rows: 行のイテレータ（stream_rows など。レスポンス送信中に読まれる）
+        file_format: csv / jsonl
+        filename: 拡張子なしのファイル名
+
+    Returns:
+        StreamingResponse
+    """
+    encode = encode_csv if file_format == "csv" else encode_jsonl
+    return StreamingResponse(
+        encode(columns, rows),
+        media_type=_MEDIA_TYPES[file_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{file_format}"'},
+    )
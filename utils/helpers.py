@@ -2,11 +2,28 @@
 汎用ヘルパー関数
 """
 
-from typing import Any, Dict
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Tuple
 from datetime import datetime, date
 from decimal import Decimal
 import json
 
+import orjson
+
+
+def _isoformat(value: Any) -> str:
+    return value.isoformat()
+
+
+# そのまま返す型（type() の完全一致で判定）
+_PASSTHROUGH_TYPES = frozenset({str, int, float, bool, type(None)})
+
+# 変換が必要なスカラー型ごとの変換関数
+_SCALAR_CONVERTERS: Dict[type, Callable[[Any], Any]] = {
+    Decimal: float,
+    datetime: _isoformat,
+    date: _isoformat,
+}
+
 
 def serialize_for_json(obj: Any) -> Any:
     """
@@ -18,6 +35,14 @@ def serialize_for_json(obj: Any) -> Any:
     Returns:
         変換後のオブジェクト
     """
+    obj_type = type(obj)
+    if obj_type in _PASSTHROUGH_TYPES:
+        return obj
+    converter = _SCALAR_CONVERTERS.get(obj_type)
+    if converter is not None:
+        return converter(obj)
+
+    # サブクラス（RealDictRow など）
     if isinstance(obj, Decimal):
         return float(obj)
     elif isinstance(obj, (datetime, date)):
@@ -42,6 +67,85 @@ def clean_dict_for_json(data: Dict[str, Any]) -> Dict[str, Any]:
     return serialize_for_json(data)
 
 
+def _column_converter(value: Any) -> Optional[Callable[[Any], Any]]:
+    """列の値の型から変換関数を決める（変換不要ならNone）"""
+    value_type = type(value)
+    if value_type in _PASSTHROUGH_TYPES:
+        return None
+    return _SCALAR_CONVERTERS.get(value_type, serialize_for_json)
+
+
+def serialize_rows(rows: Iterable[Mapping[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    クエリ結果の行をまとめて clean_dict_for_json と同じ形に変換
+
+    同じクエリの行は列ごとの型が揃っているため、列ごとの変換関数を最初に値が入っている行で
+    一度だけ決め、以降の行は変換が必要な列（NUMERIC / 日時 / JSONB など）だけを書き換える。
+    列の組み合わせが変わった場合は決め直す。
+
+    Args:
+        rows: 行（RealDictRow など）のイテレータ
+
+    Returns:
+        変換後の辞書リスト
+    """
+    results = []
+    keys = None
+    pending: List[str] = []  # まだ None しか現れていない列
+    converters: List[Tuple[str, Callable[[Any], Any]]] = []
+
+    for row in rows:
+        item = dict(row)
+        if item.keys() != keys:
+            keys = item.keys()
+            pending = list(keys)
+            converters = []
+
+        if pending:
+            undecided = []
+            for column in pending:
+                value = item[column]
+                if value is None:
+                    undecided.append(column)
+                    continue
+                converter = _column_converter(value)
+                if converter is not None:
+                    converters.append((column, converter))
+            pending = undecided
+
+        for column, converter in converters:
+            value = item[column]
+            if value is not None:
+                item[column] = converter(value)
+        results.append(item)
+
+    return results
+
+
+def orjson_default(obj: Any) -> Any:
+    """
+    orjson が直接扱えない型の変換（orjson.dumps の default に渡す）
+
+    datetime / date / UUID は orjson がそのまま扱う。
+    """
+    if isinstance(obj, Decimal):
+        return float(obj)
+    raise TypeError(f"{type(obj).__name__} は JSON に変換できません")
+
+
+def dumps_json(obj: Any) -> bytes:
+    """
+    orjson で JSON（UTF-8 のバイト列）に変換
+
+    Args:
+        obj: 変換対象（dict / list / DBの行など。Decimal は float になる）
+
+    Returns:
+        JSON のバイト列
+    """
+    return orjson.dumps(obj, default=orjson_default, option=orjson.OPT_NON_STR_KEYS)
+
+
 def merge_accumulated_insights(
     current_insights: Dict[str, Any],
     new_intent: Dict[str, Any]
@@ -0,0 +1,79 @@
+"""
+HyperLogLog（ユニーク数の近似カウント）
+
+キーごとに 2^precision バイトのレジスタだけを保持し、要素そのものを覚えずに
+ユニーク数を推定する（precision=10 で標準誤差 約3%）。
+レジスタは bytes としてDBに保存でき、別々に作ったスケッチは merge で合算できる。
+"""
+
+from typing import Any, Optional
+import hashlib
+import math
+
+
+DEFAULT_PRECISION = 10
+
+
+def _hash64(value: Any) -> int:
+    """64bitハッシュ（プロセスやPythonのバージョンに依存しない）"""
+    return int.from_bytes(hashlib.blake2b(str(value).encode(), digest_size=8).digest(), "big")
+
+
+class HyperLogLog:
+    """HyperLogLog スケッチ"""
+
+    __slots__ = ("precision", "registers")
+
+    def __init__(self, precision: int = DEFAULT_PRECISION, registers: Optional[bytes] = None):
+        """
+        Args:
+            precision: レジスタ数の指数（4〜16）
+            registers: 保存済みのレジスタ（to_bytes の出力）
+        """
+        if not 4 <= precision <= 16:
+            raise ValueError("precision は4〜16で指定してください")
+        size = 1 << precision
+        if registers is not None and len(registers) != size:
+            raise ValueError(f"レジスタ長が precision と一致しません: {len(registers)} != {size}")
+
+        self.precision = precision
+        self.registers = bytearray(registers) if registers is not None else bytearray(size)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "HyperLogLog":
+        """保存済みのレジスタから復元（長さから precision を求める）"""
+        precision = len(data).bit_length() - 1
+        return cls(precision, bytes(data))
+
+    def to_bytes(self) -> bytes:
+        """保存用のバイト列"""
+        return bytes(self.registers)
+
+    def add(self, value: Any) -> None:
+        """要素を追加"""
+        hashed = _hash64(value)
+        index = hashed >> (64 - self.precision)
+        remaining_bits = 64 - self.precision
+        rest = hashed & ((1 << remaining_bits) - 1)
+        rank = remaining_bits - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other: "HyperLogLog") -> None:
+        """別のスケッチを合算（和集合のユニーク数になる）"""
+        if other.precision != self.precision:
+            raise ValueError("precision の異なるスケッチは合算できません")
+        self.registers = bytearray(map(max, self.registers, other.registers))
+
+    def count(self) -> int:
+        """ユニーク数の推定値"""
+        size = len(self.registers)
+        alpha = {16: 0.673, 32: 0.697, 64: 0.709}.get(size, 0.7213 / (1 + 1.079 / size))
+        estimate = alpha * size * size / sum(2.0 ** -r for r in self.registers)
+
+        # 少数のときは空レジスタの割合から数える方が正確（linear counting）
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * size and zeros:
+            estimate = size * math.log(size / zeros)
+
+        return int(round(estimate))
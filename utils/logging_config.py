@@ -0,0 +1,145 @@
+"""
+構造化ログ設定
+
+ログは QueueHandler でキューに積むだけにして、標準出力への書き込みは
+別スレッドの QueueListener が行う（リクエスト処理が stdout への書き込みで待たされない）。
+各行は JSON で、リクエスト中のログには trace_id（X-Trace-Id と同じ値）が付く。
+
+DEBUG ログはホットパスで大量に出るため、リクエスト単位で LOG_DEBUG_SAMPLE_RATE の割合だけ出力する。
+"""
+
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Optional
+import copy
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import zlib
+
+from utils.tracing import current_trace_id
+
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+LOG_DEBUG_SAMPLE_RATE = float(os.getenv("LOG_DEBUG_SAMPLE_RATE", "0.01"))
+
+# キューが溢れた場合は待たずに捨てる（ログのためにリクエストを止めない）
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+# LogRecord の標準属性（これ以外の extra をJSONのフィールドとして出力）
+_RESERVED_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "trace_id"}
+
+_listener: Optional[QueueListener] = None
+
+
+class CorrelationFilter(logging.Filter):
+    """現在のリクエストの trace_id をレコードに付与"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if getattr(record, "trace_id", None) is None:
+            record.trace_id = current_trace_id()
+        return True
+
+
+class DebugSamplingFilter(logging.Filter):
+    """DEBUG ログをリクエスト単位でサンプリング（同じリクエストのログは全部出るか全部出ないか）"""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG or self.rate >= 1.0:
+            return True
+        trace_id = getattr(record, "trace_id", None)
+        if trace_id:
+            return zlib.crc32(trace_id.encode()) < self.rate * 0xFFFFFFFF
+        return random.random() < self.rate
+
+
+class JsonFormatter(logging.Formatter):
+    """1レコード1行のJSON"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        trace_id = getattr(record, "trace_id", None)
+        if trace_id:
+            entry["trace_id"] = trace_id
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc_info"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class _NonBlockingQueueHandler(QueueHandler):
+    """キューが満杯なら待たずに破棄する QueueHandler"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # 標準の prepare はメッセージを整形済み文字列に置き換えるため、
+        # extra とトレースバックを JsonFormatter 側で扱えるように残す
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            pass
+
+
+def configure_logging() -> None:
+    """
+    アプリ全体のログ設定（プロセスごとに1回、多重呼び出しは無視）
+
+    ルートロガーに非同期の QueueHandler を設定する。
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    if LOG_FORMAT == "json":
+        formatter: logging.Formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter("%(asctime)s %(levelname)s %(name)s [%(trace_id)s] %(message)s")
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(formatter)
+
+    log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    queue_handler = _NonBlockingQueueHandler(log_queue)
+    # trace_id は contextvar から取るため、キューに積む前（呼び出し元スレッド）で付与する
+    queue_handler.addFilter(CorrelationFilter())
+    queue_handler.addFilter(DebugSamplingFilter(LOG_DEBUG_SAMPLE_RATE))
+
+    root = logging.getLogger()
+    root.handlers = [queue_handler]
+    root.setLevel(LOG_LEVEL)
+
+    _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+
+
+def shutdown_logging() -> None:
+    """キューに残ったログを書き出してリスナーを止める（アプリ終了時に呼ぶ）"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,213 @@
+"""
+Prometheus メトリクス
+
+gunicorn の複数ワーカーで集計できるよう、PROMETHEUS_MULTIPROC_DIR が設定されている場合は
+multiprocess モードで /metrics を出力する（start_prod.sh / gunicorn.conf.py で設定）。
+"""
+
+from functools import lru_cache
+from typing import Any, Optional, Tuple
+import os
+import re
+import time
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+
+# LLM呼び出しは秒単位で遅いため専用のバケットを使う
+_LLM_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.0, 3.0, 5.0, 8.0, 13.0, 20.0, 30.0, 60.0)
+_DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTPリクエストの処理時間",
+    ["method", "route", "status"],
+)
+
+LLM_LATENCY = Histogram(
+    "llm_request_duration_seconds",
+    "OpenAI API呼び出しの所要時間",
+    ["operation", "model"],
+    buckets=_LLM_BUCKETS,
+)
+
+LLM_TOKENS = Counter(
+    "llm_tokens_total",
+    "OpenAI APIのトークン使用量",
+    ["operation", "model", "kind"],
+)
+
+DB_CHECKOUT_WAIT = Histogram(
+    "db_connection_checkout_seconds",
+    "DB接続の取得にかかった時間",
+    buckets=_DB_BUCKETS,
+)
+
+DB_QUERY_LATENCY = Histogram(
+    "db_query_duration_seconds",
+    "SQL文ごとの実行時間",
+    ["statement"],
+    buckets=_DB_BUCKETS,
+)
+
+CACHE_REQUESTS = Counter(
+    "cache_requests_total",
+    "プロセス内キャッシュの参照回数（ヒット率は hit / (hit + miss)）",
+    ["cache", "result"],
+)
+
+CHAT_TURNS = Counter(
+    "chat_turns_total",
+    "求人表示判定を行ったチャットターン数",
+)
+
+CHAT_JOB_DISPLAY_DECISIONS = Counter(
+    "chat_job_display_decisions_total",
+    "求人表示判定の結果（理由別）",
+    ["reason"],
+)
+
+CHAT_TURNS_BEFORE_JOBS = Histogram(
+    "chat_turns_before_jobs",
+    "求人を表示するまでに要したターン数",
+    buckets=(1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 15, 20),
+)
+
+
+# ============================================
+# 記録用ヘルパー
+# ============================================
+
+def observe_request(method: str, route: str, status: int, seconds: float) -> None:
+    """HTTPリクエストの処理時間を記録"""
+    REQUEST_LATENCY.labels(method, route, str(status)).observe(seconds)
+
+
+def observe_llm_call(operation: str, model: Optional[str], seconds: float, usage: Any = None) -> None:
+    """
+    LLM呼び出しの所要時間とトークン使用量を記録
+
+    Args:
+        operation: 呼び出し元の処理名
+        model: モデル名
+        seconds: 所要時間（秒）
+        usage: レスポンスの usage（prompt_tokens / completion_tokens）
+    """
+    model = model or "unknown"
+    LLM_LATENCY.labels(operation, model).observe(seconds)
+    if usage is None:
+        return
+    prompt_tokens = getattr(usage, "prompt_tokens", None) or 0
+    completion_tokens = getattr(usage, "completion_tokens", None) or 0
+    if prompt_tokens:
+        LLM_TOKENS.labels(operation, model, "prompt").inc(prompt_tokens)
+    if completion_tokens:
+        LLM_TOKENS.labels(operation, model, "completion").inc(completion_tokens)
+
+
+def observe_db_checkout(seconds: float) -> None:
+    """DB接続の取得時間を記録"""
+    DB_CHECKOUT_WAIT.observe(seconds)
+
+
+def observe_db_query(query: Any, seconds: float) -> None:
+    """SQLの実行時間を文の種類ごとに記録"""
+    DB_QUERY_LATENCY.labels(statement_name(query)).observe(seconds)
+
+
+def record_job_display_decision(turn_count: int, should_show: bool, reason: str) -> None:
+    """求人表示判定の結果を記録"""
+    CHAT_TURNS.inc()
+    CHAT_JOB_DISPLAY_DECISIONS.labels(reason).inc()
+    if should_show:
+        CHAT_TURNS_BEFORE_JOBS.observe(turn_count)
+
+
+# ============================================
+# SQL文の名前付け
+# ============================================
+
+_LEADING_COMMENTS = re.compile(r"^\s*(?:(?:--[^\n]*\n|/\*.*?\*/)\s*)*", re.S)
+_TABLE_PATTERN = re.compile(r"\b(?:FROM|INTO|UPDATE|TABLE)\s+([A-Za-z_][\w.]*)", re.I)
+
+
+@lru_cache(maxsize=2048)
+def _name_for_sql(query: str) -> str:
+    """'SELECT company_profile' のように、先頭の動詞と最初のテーブル名で文を識別"""
+    body = _LEADING_COMMENTS.sub("", query, count=1)
+    verb = body.split(None, 1)[0].upper() if body.strip() else "UNKNOWN"
+    match = _TABLE_PATTERN.search(body)
+    return f"{verb} {match.group(1).lower()}" if match else verb
+
+
+def statement_name(query: Any) -> str:
+    """
+    メトリクスのラベルに使うSQL文の名前（パラメータを含まないので種類数が限られる）
+
+    Args:
+        query: SQL（str / bytes / psycopg2.sql.Composed など）
+
+    Returns:
+        文の名前
+    """
+    if isinstance(query, bytes):
+        query = query.decode("utf-8", errors="replace")
+    elif not isinstance(query, str):
+        # Composed はカーソルなしでは文字列化できないため種別のみ
+        return "COMPOSED"
+    return _name_for_sql(query)
+
+
+# ============================================
+# /metrics 出力・ASGIミドルウェア
+# ============================================
+
+def render_metrics() -> Tuple[bytes, str]:
+    """
+    Prometheus のテキスト形式でメトリクスを出力
+
+    Returns:
+        (本文, Content-Type)
+    """
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+class MetricsMiddleware:
+    """ルート（パスのテンプレート）ごとにリクエストの処理時間を記録"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] == "/metrics" or scope["path"].startswith("/static"):
+            await self.app(scope, receive, send)
+            return
+
+        status_holder = {"status": 500}
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status_holder["status"] = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # パスパラメータ込みの実パスではなくルート定義を使い、ラベルの種類数を抑える
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            observe_request(scope["method"], route_path, status_holder["status"], time.perf_counter() - started)
@@ -0,0 +1,83 @@
+"""
+キーセットページネーション（カーソル）ユーティリティ
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import base64
+import json
+
+from utils.helpers import serialize_for_json
+
+
+# 1ページあたりの既定件数と上限
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def encode_cursor(*values: Any) -> str:
+    """
+    ソートキーの値を不透明なカーソル文字列に変換
+
+    Args:
+        values: 最後の行のソートキー（例: created_at, id）
+
+    Returns:
+        URLセーフなカーソル文字列
+    """
+    raw = json.dumps(serialize_for_json(list(values)), separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int = 2) -> List[Any]:
+    """
+    カーソル文字列をソートキーの値に戻す
+
+    Args:
+        cursor: encode_cursor で生成したカーソル
+        size: 期待するキーの数
+
+    Returns:
+        ソートキーの値のリスト
+
+    Raises:
+        ValueError: カーソルが不正な場合
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except Exception as e:
+        raise ValueError(f"不正なカーソルです: {cursor}") from e
+
+    if not isinstance(values, list) or len(values) != size or any(v is None for v in values):
+        raise ValueError(f"不正なカーソルです: {cursor}")
+
+    return values
+
+
+def clamp_page_size(limit: Optional[int]) -> int:
+    """ページサイズを 1〜MAX_PAGE_SIZE に丸める"""
+    if not limit:
+        return DEFAULT_PAGE_SIZE
+    return max(1, min(int(limit), MAX_PAGE_SIZE))
+
+
+def split_page(
+    rows: Sequence[Dict[str, Any]],
+    limit: int,
+    key: Callable[[Dict[str, Any]], Tuple[Any, ...]]
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    limit+1件取得した結果をページと次カーソルに分割
+
+    Args:
+        rows: LIMIT limit+1 で取得した行
+        limit: ページサイズ
+        key: 行からソートキーを取り出す関数
+
+    Returns:
+        (ページの行, 次ページのカーソル。最終ページならNone)
+    """
+    page = list(rows[:limit])
+    if len(rows) > limit and page:
+        return page, encode_cursor(*key(page[-1]))
+    return page, None
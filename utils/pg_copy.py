@@ -0,0 +1,135 @@
+"""
+COPY による一括投入ユーティリティ
+
+行のイテレータを COPY ... FROM STDIN（テキスト形式）のストリームに変換し、
+INSERT を1行ずつ発行するより桁違いに速く投入する。
+"""
+
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Any, Iterable, Iterator, Optional, Sequence
+from uuid import UUID
+import io
+import json
+
+from psycopg2 import sql
+
+
+# COPYテキスト形式でエスケープが必要な文字
+_COPY_ESCAPES = str.maketrans({
+    "\\": "\\\\",
+    "\t": "\\t",
+    "\n": "\\n",
+    "\r": "\\r",
+})
+
+
+def _array_literal(values: Sequence[Any]) -> str:
+    """Pythonのリストを PostgreSQL の配列リテラルに変換"""
+    items = []
+    for value in values:
+        if value is None:
+            items.append("NULL")
+        else:
+            text = str(value).replace("\\", "\\\\").replace('"', '\\"')
+            items.append(f'"{text}"')
+    return "{" + ",".join(items) + "}"
+
+
+def format_copy_value(value: Any) -> str:
+    """
+    1つの値をCOPYテキスト形式に変換
+
+    Args:
+        value: 値（None / bool / 数値 / 文字列 / 日時 / UUID / list / dict）
+
+    Returns:
+        COPYテキスト形式の文字列（NULLは \\N）
+    """
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, (int, float, Decimal)):
+        return str(value)
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    if isinstance(value, (list, tuple)):
+        text = _array_literal(value)
+    elif isinstance(value, dict):
+        text = json.dumps(value, ensure_ascii=False)
+    else:
+        text = str(value)
+    return text.translate(_COPY_ESCAPES)
+
+
+class CopyStream(io.TextIOBase):
+    """行イテレータを COPY 用のファイルライクオブジェクトとして読み出す"""
+
+    def __init__(self, rows: Iterable[Sequence[Any]]):
+        self._rows: Iterator[Sequence[Any]] = iter(rows)
+        self._buffer = ""
+        self.row_count = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def read(self, size: Optional[int] = -1) -> str:
+        if size is None or size < 0:
+            chunks = [self._buffer]
+            self._buffer = ""
+            for row in self._rows:
+                chunks.append(self._format_row(row))
+            return "".join(chunks)
+
+        chunks = [self._buffer]
+        length = len(self._buffer)
+        while length < size:
+            row = next(self._rows, None)
+            if row is None:
+                break
+            line = self._format_row(row)
+            chunks.append(line)
+            length += len(line)
+
+        data = "".join(chunks)
+        self._buffer = data[size:]
+        return data[:size]
+
+    def readline(self, size: Optional[int] = -1) -> str:
+        return self.read(size)
+
+    def _format_row(self, row: Sequence[Any]) -> str:
+        self.row_count += 1
+        return "\t".join(format_copy_value(v) for v in row) + "\n"
+
+
+def copy_rows(
+    cur,
+    table: str,
+    columns: Sequence[str],
+    rows: Iterable[Sequence[Any]],
+    buffer_size: int = 1 << 20
+) -> int:
+    """
+    行を COPY で一括投入
+
+    Args:
+        cur: psycopg2 カーソル
+        table: テーブル名
+        columns: 列名（rows の各要素と同じ順序）
+        rows: 行のイテレータ（全件をメモリに載せずに流せる）
+        buffer_size: 1回に送るバッファサイズ（文字数）
+
+    Returns:
+        投入した行数
+    """
+    stream = CopyStream(rows)
+    query = sql.SQL("COPY {} ({}) FROM STDIN").format(
+        sql.Identifier(table),
+        sql.SQL(", ").join(sql.Identifier(c) for c in columns),
+    )
+    cur.copy_expert(query.as_string(cur), stream, size=buffer_size)
+    return stream.row_count
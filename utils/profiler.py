@@ -0,0 +1,205 @@
+"""
+サンプリングプロファイラ
+
+別スレッドから一定間隔で sys._current_frames() を読み、全スレッドのスタックを
+「frame;frame;frame 回数」の folded 形式で集計する（flamegraph.pl / speedscope / inferno で描画可能）。
+対象コードに計測用の処理を差し込まないため、オーバーヘッドはサンプリング間隔だけで決まる。
+
+- ProfilingMiddleware: PROFILE_SAMPLE_RATE の割合のリクエストについて、処理中だけサンプリングを有効にする
+- capture_profile: 実行中のワーカーを指定秒数だけプロファイルする（管理者API用）
+"""
+
+from collections import Counter
+from typing import Dict, Optional
+import asyncio
+import os
+import random
+import sys
+import threading
+import time
+
+
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "10"))
+
+# 集計するスタックの種類の上限（超えた分は捨てる）
+PROFILE_MAX_STACKS = int(os.getenv("PROFILE_MAX_STACKS", "20000"))
+
+# 1回のスタックで辿るフレーム数の上限
+_MAX_DEPTH = 128
+
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _frame_label(code) -> str:
+    """フレームの表示名（関数名とファイル:定義行）"""
+    filename = code.co_filename
+    if filename.startswith(_PROJECT_ROOT):
+        filename = os.path.relpath(filename, _PROJECT_ROOT)
+    else:
+        filename = os.path.basename(filename)
+    name = getattr(code, "co_qualname", code.co_name)
+    return f"{name} ({filename}:{code.co_firstlineno})".replace(";", ":").replace(" ", "_")
+
+
+class StackSampler:
+    """全スレッドのスタックを定期的に採取して folded 形式で集計"""
+
+    def __init__(
+        self,
+        interval: float = PROFILE_INTERVAL_MS / 1000,
+        max_stacks: int = PROFILE_MAX_STACKS,
+        gate: Optional[threading.Event] = None
+    ):
+        """
+        Args:
+            interval: サンプリング間隔（秒）
+            max_stacks: 集計するスタックの種類の上限
+            gate: 指定時はこのイベントがセットされている間だけ採取する
+        """
+        self.interval = interval
+        self.gate = gate
+        self.max_stacks = max_stacks
+        self.stacks: Counter = Counter()
+        self.sample_count = 0
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._running = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._label_cache: Dict[object, str] = {}
+
+    def start(self) -> None:
+        """サンプリングスレッドを開始（実行中なら何もしない）"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._running.set()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """サンプリングスレッドを停止"""
+        self._running.clear()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        thread_names = {}
+        while self._running.is_set():
+            if self.gate is not None and not self.gate.wait(timeout=0.5):
+                continue
+            started = time.perf_counter()
+            if len(thread_names) != threading.active_count():
+                thread_names = {t.ident: t.name for t in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id != own_id:
+                    self._add(thread_names.get(thread_id, str(thread_id)), frame)
+            self.sample_count += 1
+            time.sleep(max(0.0, self.interval - (time.perf_counter() - started)))
+
+    def _add(self, thread_name: str, frame) -> None:
+        labels = []
+        while frame is not None and len(labels) < _MAX_DEPTH:
+            code = frame.f_code
+            label = self._label_cache.get(code)
+            if label is None:
+                label = self._label_cache[code] = _frame_label(code)
+            labels.append(label)
+            frame = frame.f_back
+        labels.append(f"thread:{thread_name}")
+        key = ";".join(reversed(labels))
+
+        with self._lock:
+            if key in self.stacks or len(self.stacks) < self.max_stacks:
+                self.stacks[key] += 1
+            else:
+                self.dropped += 1
+
+    def folded(self) -> str:
+        """folded 形式（1行1スタック、多い順）"""
+        with self._lock:
+            return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def reset(self) -> str:
+        """集計を取り出して空にする"""
+        with self._lock:
+            output = "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+            self.stacks.clear()
+            self.sample_count = 0
+            self.dropped = 0
+        return output
+
+
+# 管理者APIからのオンデマンド計測は1ワーカーにつき同時に1つまで
+_capture_lock = asyncio.Lock()
+
+
+async def capture_profile(seconds: float, interval_ms: float = PROFILE_INTERVAL_MS) -> StackSampler:
+    """
+    実行中のワーカーを指定秒数プロファイル
+
+    Args:
+        seconds: 計測時間（秒）
+        interval_ms: サンプリング間隔（ミリ秒）
+
+    Returns:
+        計測済みの StackSampler
+
+    Raises:
+        RuntimeError: 別の計測が実行中
+    """
+    if _capture_lock.locked():
+        raise RuntimeError("別のプロファイル計測が実行中です")
+
+    async with _capture_lock:
+        sampler = StackSampler(interval=interval_ms / 1000)
+        sampler.start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            await asyncio.to_thread(sampler.stop)
+        return sampler
+
+
+class _RequestSampling:
+    """サンプル対象のリクエストが処理中の間だけ共有サンプラーで採取する"""
+
+    def __init__(self):
+        self._gate = threading.Event()
+        self.sampler = StackSampler(gate=self._gate)
+        self.active = 0
+        self._lock = threading.Lock()
+
+    def enter(self) -> None:
+        with self._lock:
+            self.active += 1
+            self._gate.set()
+        self.sampler.start()
+
+    def exit(self) -> None:
+        with self._lock:
+            self.active -= 1
+            if self.active == 0:
+                self._gate.clear()
+
+
+request_sampling = _RequestSampling()
+
+
+class ProfilingMiddleware:
+    """PROFILE_SAMPLE_RATE の割合のリクエストの処理中にスタックを採取"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or PROFILE_SAMPLE_RATE <= 0 or random.random() >= PROFILE_SAMPLE_RATE:
+            await self.app(scope, receive, send)
+            return
+
+        request_sampling.enter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            request_sampling.exit()
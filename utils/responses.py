@@ -0,0 +1,20 @@
+"""
+orjson による JSON レスポンス
+
+main.py でアプリ全体の既定のレスポンスクラスにしている。json.dumps より速く、
+エンドポイントが DB の行（Decimal / datetime / UUID を含む dict）をこのクラスで直接返す場合も
+utils.helpers.dumps_json と同じ規則で変換する。
+"""
+
+from typing import Any
+
+from fastapi.responses import ORJSONResponse as _ORJSONResponse
+
+from utils.helpers import dumps_json
+
+
+class ORJSONResponse(_ORJSONResponse):
+    """Decimal を float に変換する ORJSONResponse"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps_json(content)
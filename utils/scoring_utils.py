@@ -3,11 +3,15 @@
 元のrule_based_scoring.pyとai_matching_scoring_fix.pyを統合
 """
 
+import logging
 from typing import Dict, Any, List, Tuple
 import re
 from utils.ai_utils import analyze_job_compatibility
 
 
+logger = logging.getLogger(__name__)
+
+
 # ルールベーススコアリングの重み
 WEIGHTS = {
     "base": 40,
@@ -314,5 +318,5 @@ def hybrid_scoring(
         }
     
     except Exception as e:
-        print(f"⚠️ AIスコアリング失敗、ルールベースのみ使用: {e}")
+        logger.warning("AIスコアリング失敗、ルールベースのみ使用: %s", e)
         return rule_result
@@ -2,6 +2,7 @@
 チャットセッション管理サービス
 """
 
+import logging
 from typing import Optional, Dict, Any
 from datetime import datetime
 import uuid
@@ -9,6 +10,10 @@ import json
 
 from models.chat_models import ChatSession
 from config.database import get_db_conn
+from services.preference_service import PreferenceService
+
+
+logger = logging.getLogger(__name__)
 
 
 class SessionManager:
@@ -136,7 +141,7 @@ class SessionManager:
             
         except Exception as e:
             conn.rollback()
-            print(f"❌ セッション保存エラー: {e}")
+            logger.error("セッション保存エラー: %s", e)
             raise
         finally:
             cur.close()
@@ -144,31 +149,8 @@ class SessionManager:
     
     @staticmethod
     def get_user_preferences(user_id: str) -> Dict[str, Any]:
-        """ユーザーのStep2情報を取得"""
-        conn = get_db_conn()
-        cur = conn.cursor()
-        
-        try:
-            cur.execute("""
-                SELECT job_title, location_prefecture, salary_min
-                FROM user_preferences_profile
-                WHERE user_id = %s
-            """, (user_id,))
-            
-            result = cur.fetchone()
-            
-            if result:
-                return {
-                    'job_title': result[0],
-                    'location': result[1],
-                    'salary_min': result[2]
-                }
-            
-            return {}
-            
-        finally:
-            cur.close()
-            conn.close()
+        """ユーザーのStep2情報を取得（スナップショットキャッシュ経由）"""
+        return PreferenceService.get_snapshot(user_id).to_session_preferences()
 
 
 # chat_sessionsテーブルのスキーマ（必要に応じて実行）
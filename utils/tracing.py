@@ -0,0 +1,294 @@
+"""
+リクエスト単位のレイテンシ内訳計測（トレーシング）
+
+contextvar で現在のリクエストのトレースを保持し、DB・LLM・スコアリングの各区間（span）を
+名前ごとに集計する。レスポンスには Server-Timing ヘッダーを付け、リクエスト終了時に
+1行の構造化ログ（JSON）を出力する。
+
+OpenTelemetry がインストールされていて TRACING_OTEL_ENABLED=true の場合は、
+同じ span を OTLP エクスポーターにも送る。
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+import functools
+import inspect
+import logging
+import os
+import threading
+import time
+import uuid
+
+import psycopg2.extensions
+from dotenv import load_dotenv
+
+from utils.metrics import observe_db_query
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "true").lower() == "true"
+TRACE_LOG_REQUESTS = os.getenv("TRACE_LOG_REQUESTS", "true").lower() == "true"
+TRACING_OTEL_ENABLED = os.getenv("TRACING_OTEL_ENABLED", "false").lower() == "true"
+
+# ログ・ヘッダーに出さないパス（静的ファイルなど）
+_SKIP_PREFIXES = ("/static",)
+
+
+class RequestTrace:
+    """1リクエスト分の区間集計"""
+
+    def __init__(self, method: str, path: str, trace_id: Optional[str] = None):
+        self.trace_id = trace_id or uuid.uuid4().hex
+        self.method = method
+        self.path = path
+        self.started = time.perf_counter()
+        self.status: Optional[int] = None
+        # 名前 -> [回数, 合計ミリ秒]（スレッドプールからも記録されるためロックで保護）
+        self._spans: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, name: str, duration_ms: float) -> None:
+        with self._lock:
+            entry = self._spans.setdefault(name, [0, 0.0])
+            entry[0] += 1
+            entry[1] += duration_ms
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+    def spans(self) -> Dict[str, Tuple[int, float]]:
+        with self._lock:
+            return {name: (int(count), total) for name, (count, total) in self._spans.items()}
+
+    def server_timing(self) -> str:
+        """Server-Timing ヘッダー値（区間ごと＋全体）"""
+        parts = [
+            f'{name};desc="{name} x{count}";dur={total:.1f}'
+            for name, (count, total) in sorted(self.spans().items())
+        ]
+        parts.append(f"total;dur={self.elapsed_ms():.1f}")
+        return ", ".join(parts)
+
+    def to_log(self) -> Dict[str, Any]:
+        """構造化ログ用の辞書"""
+        return {
+            "trace_id": self.trace_id,
+            "method": self.method,
+            "path": self.path,
+            "status": self.status,
+            "duration_ms": round(self.elapsed_ms(), 1),
+            # span は入れ子になり得る（scoring 内の llm.* など）ため合計は duration_ms を超えることがある
+            "spans": {name: {"count": count, "ms": round(ms, 1)} for name, (count, ms) in self.spans().items()},
+        }
+
+
+_current_trace: ContextVar[Optional[RequestTrace]] = ContextVar("current_trace", default=None)
+
+
+def current_trace() -> Optional[RequestTrace]:
+    """現在のリクエストのトレース（リクエスト外ならNone）"""
+    return _current_trace.get()
+
+
+def current_trace_id() -> Optional[str]:
+    """現在のトレースID"""
+    trace = _current_trace.get()
+    return trace.trace_id if trace else None
+
+
+# ============================================
+# OpenTelemetry（任意）
+# ============================================
+
+_tracer = None
+
+
+def _init_otel() -> None:
+    """OpenTelemetry のトレーサーを初期化（未インストールなら無効）"""
+    global _tracer
+    if not TRACING_OTEL_ENABLED:
+        return
+
+    try:
+        from opentelemetry import trace as otel_trace
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+    except ImportError:
+        logger.warning("TRACING_OTEL_ENABLED=true ですが opentelemetry がインストールされていません")
+        return
+
+    provider = TracerProvider(resource=Resource.create({
+        "service.name": os.getenv("OTEL_SERVICE_NAME", "job-matching-api")
+    }))
+    # エンドポイントは OTEL_EXPORTER_OTLP_ENDPOINT 環境変数で指定
+    provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter()))
+    otel_trace.set_tracer_provider(provider)
+    _tracer = otel_trace.get_tracer("job-matching")
+
+
+_init_otel()
+
+
+# ============================================
+# span
+# ============================================
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[None]:
+    """
+    区間を計測して現在のトレースに記録
+
+    Args:
+        name: 区間名（例: db.query, llm.extract_user_intent, scoring）
+        attributes: OpenTelemetry の span 属性
+    """
+    trace = _current_trace.get()
+    if trace is None and _tracer is None:
+        yield
+        return
+
+    started = time.perf_counter()
+    try:
+        if _tracer is not None:
+            with _tracer.start_as_current_span(name, attributes=attributes or None):
+                yield
+        else:
+            yield
+    finally:
+        if trace is not None:
+            trace.record(name, (time.perf_counter() - started) * 1000)
+
+
+def traced(name: str) -> Callable:
+    """
+    関数全体を span で計測するデコレーター（同期・非同期の両方に対応）
+
+    Args:
+        name: 区間名
+    """
+    def decorator(func: Callable) -> Callable:
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+
+    return decorator
+
+
+# ============================================
+# psycopg2 計測
+# ============================================
+
+@contextmanager
+def _query_span(name: str, query: Any) -> Iterator[None]:
+    """SQL実行を span として記録し、文の種類ごとの実行時間メトリクスにも反映"""
+    started = time.perf_counter()
+    try:
+        with span(name):
+            yield
+    finally:
+        observe_db_query(query, time.perf_counter() - started)
+
+
+class _TracedCursorMixin:
+    """execute 系を db.query として計測"""
+
+    def execute(self, query, vars=None):
+        with _query_span("db.query", query):
+            return super().execute(query, vars)
+
+    def executemany(self, query, vars_list):
+        with _query_span("db.query", query):
+            return super().executemany(query, vars_list)
+
+    def callproc(self, procname, parameters=None):
+        with _query_span("db.query", f"CALL {procname}"):
+            return super().callproc(procname, parameters)
+
+    def copy_expert(self, sql, file, size=8192):
+        with _query_span("db.copy", sql):
+            return super().copy_expert(sql, file, size)
+
+
+_traced_cursor_classes: Dict[type, type] = {}
+
+
+def _traced_cursor_class(cursor_class: type) -> type:
+    """カーソルクラスの計測版を生成（クラスごとにキャッシュ）"""
+    traced_class = _traced_cursor_classes.get(cursor_class)
+    if traced_class is None:
+        traced_class = type(f"Traced{cursor_class.__name__}", (_TracedCursorMixin, cursor_class), {})
+        _traced_cursor_classes[cursor_class] = traced_class
+    return traced_class
+
+
+class TracedConnection(psycopg2.extensions.connection):
+    """cursor() が計測版カーソルを返す接続クラス"""
+
+    def cursor(self, *args, **kwargs):
+        factory = kwargs.get("cursor_factory") or self.cursor_factory or psycopg2.extensions.cursor
+        kwargs["cursor_factory"] = _traced_cursor_class(factory)
+        return super().cursor(*args, **kwargs)
+
+
+# ============================================
+# ASGIミドルウェア
+# ============================================
+
+def _header(scope, name: bytes) -> Optional[str]:
+    """ASGIスコープからヘッダー値を取得（長すぎる値は無視）"""
+    for key, value in scope.get("headers", []):
+        if key == name and 0 < len(value) <= 128:
+            return value.decode("latin-1")
+    return None
+
+
+class TracingMiddleware:
+    """リクエストごとにトレースを開始し、Server-Timing ヘッダーと構造化ログを出力"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not TRACING_ENABLED or scope["path"].startswith(_SKIP_PREFIXES):
+            await self.app(scope, receive, send)
+            return
+
+        # 上流（ロードバランサーなど）が付けた X-Request-ID があれば相関IDとして引き継ぐ
+        request_id = _header(scope, b"x-request-id")
+        trace = RequestTrace(scope["method"], scope["path"], trace_id=request_id)
+        token = _current_trace.set(trace)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                trace.status = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", trace.server_timing().encode("latin-1")))
+                headers.append((b"x-trace-id", trace.trace_id.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            if _tracer is not None:
+                with _tracer.start_as_current_span(f"{scope['method']} {scope['path']}"):
+                    await self.app(scope, receive, send_with_timing)
+            else:
+                await self.app(scope, receive, send_with_timing)
+        finally:
+            if TRACE_LOG_REQUESTS:
+                logger.info("request", extra=trace.to_log())
+            _current_trace.reset(token)